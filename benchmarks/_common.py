@@ -0,0 +1,51 @@
+""" Helpers shared by the benchmark scripts """
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# allow running the scripts from a source checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "fake_key")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "fake_secret")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+# see tests/conftest.py
+os.environ.setdefault("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+
+
+def add_latency(seconds: float) -> None:
+    """Delay every S3 request by `seconds`
+
+    moto answers in-process almost instantly, which hides the round trips
+    that dominate transfers against real S3.
+    """
+    from botocore.endpoint import Endpoint  # type: ignore
+
+    original = Endpoint._do_get_response
+
+    def _delayed(self, *args, **kwargs):
+        time.sleep(seconds)
+        return original(self, *args, **kwargs)
+
+    Endpoint._do_get_response = _delayed
+
+
+@contextmanager
+def timed(label: str, count: int = 1):
+    """ Print the elapsed time (and per-item rate) of the wrapped block """
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else float("inf")
+    print("{:<48} {:>10.3f}s {:>12.0f}/s".format(label, elapsed, rate))
+
+
+def populate(client, bucket: str, count: int, prefix: str = "data", size: int = 0):
+    """ Create a bucket holding `count` objects of `size` bytes """
+    client.create_bucket(Bucket=bucket)
+    body = b"x" * size
+    for i in range(count):
+        client.put_object(
+            Bucket=bucket, Key="{}/{:06d}/file.bin".format(prefix, i), Body=body
+        )
@@ -0,0 +1,89 @@
+""" 10k concurrent exists checks: serial, thread pool and AsyncPath
+
+Runs against moto in server mode (``pip install moto[server]``), so requests
+go over real HTTP connections; falls back to the in-process mock with
+injected latency otherwise.
+
+Usage: python benchmarks/bench_aio.py [count]
+"""
+import asyncio
+import logging
+import sys
+from concurrent import futures
+
+import _common  # noqa: F401
+from _common import add_latency, populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+from pathman.aio import gather_exists
+
+PORT = 5123
+
+
+def _run(coroutine):
+    """ `asyncio.run`, which needs Python 3.7 """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def run(count: int, endpoint_url=None):
+    client_kwargs = {"endpoint_url": endpoint_url} if endpoint_url else {}
+    s3 = boto3.client("s3", **client_kwargs)
+    # half of the paths exist
+    populate(s3, "bucket", count // 2)
+    paths = [
+        Path("s3://bucket/data/{:06d}/file.bin".format(i), client_kwargs=client_kwargs)
+        for i in range(count)
+    ]
+    if not endpoint_url:
+        add_latency(0.005)
+    serial = paths[: count // 10]
+
+    def _fresh():
+        clients.get_stat_cache(client_kwargs=client_kwargs).invalidate()
+
+    # the first concurrent burst opens connections and warms up the server
+    _run(gather_exists(paths, limit=64))
+
+    _fresh()
+    with timed("serial exists (first {})".format(len(serial)), len(serial)):
+        for path in serial:
+            path.exists()
+
+    _fresh()
+    with timed("ThreadPoolExecutor(32).map(exists)", count):
+        with futures.ThreadPoolExecutor(32) as executor:
+            list(executor.map(lambda p: p.exists(), paths))
+
+    for limit in [32, 64]:
+        _fresh()
+        with timed("gather_exists, limit={}".format(limit), count):
+            _run(gather_exists(paths, limit=limit))
+
+
+def main(count: int):
+    try:
+        from moto.server import ThreadedMotoServer  # type: ignore
+    except ImportError:
+        print("moto[server] is not installed, using the in-process mock")
+        mock_s3()(run)(count)
+        return
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=PORT, verbose=False)
+    server.start()
+    try:
+        run(count, "http://127.0.0.1:{}".format(PORT))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,64 @@
+""" Reading a large local file: read_bytes vs. read_buffer (mmap)
+
+Each method runs in a fresh process, which computes a CRC of the whole file
+and reports its anonymous (private heap) and file-backed resident memory
+while still holding the data. Mapped pages are file-backed: they count in
+RSS but are shared with the page cache and can be dropped under pressure.
+Needs Linux for /proc/self/status.
+
+Usage: python benchmarks/bench_buffers.py [size in MiB]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+import _common  # noqa: F401
+
+from pathman import Path
+
+
+def _resident() -> dict:
+    """ Resident memory in MiB, by kind """
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return {k: int(fields[k].split()[0]) / 1024 for k in ("RssAnon", "RssFile")}
+
+
+def _run(method: str, filename: str, results) -> None:
+    start = time.perf_counter()
+    if method == "read_bytes":
+        data = Path(filename).read_bytes()
+    else:
+        data = Path(filename).read_buffer()
+    zlib.crc32(data)
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, _resident()))
+
+
+def main(size_mb: int):
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "large.bin")
+        with open(filename, "wb") as f:
+            block = os.urandom(2 ** 20)
+            for _ in range(size_mb):
+                f.write(block)
+
+        for method in ["read_bytes", "read_buffer"]:
+            results = context.Queue()
+            process = context.Process(target=_run, args=(method, filename, results))
+            process.start()
+            elapsed, resident = results.get()
+            process.join()
+            print(
+                "{:<24} {:>10.3f}s  anonymous {:>8.0f} MiB  file {:>8.0f} MiB".format(
+                    method, elapsed, resident["RssAnon"], resident["RssFile"]
+                )
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2048)
@@ -0,0 +1,41 @@
+""" Per-path construction cost and walk throughput with the client registry """
+import _common  # noqa: F401
+from _common import populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+from s3fs import S3FileSystem  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+
+N_PATHS = 5000
+N_KEYS = 1000
+
+
+@mock_s3
+def main():
+    populate(boto3.client("s3"), "bench", N_KEYS)
+
+    with timed("S3FileSystem() per path (fsspec cache)", N_PATHS):
+        for i in range(N_PATHS):
+            S3FileSystem(anon=False)
+
+    with timed("S3FileSystem() per path (uncached)", 20):
+        for i in range(20):
+            S3FileSystem(anon=False, skip_instance_cache=True)
+
+    with timed("clients.get_filesystem() per path", N_PATHS):
+        for i in range(N_PATHS):
+            clients.get_filesystem(anon=False)
+
+    with timed("Path('s3://...') construction", N_PATHS):
+        for i in range(N_PATHS):
+            Path("s3://bench/data/{:06d}/file.bin".format(i))
+
+    with timed("Path.walk() over {} keys".format(N_KEYS), N_KEYS):
+        assert sum(1 for _ in Path("s3://bench/data").walk()) == N_KEYS
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+""" Local directory copies: shutil.copytree vs. copy() from local to local
+
+Copies a tree of many small files and a tree of a few large files, created
+in a temporary directory, with `shutil.copytree` and with `copy`, which
+copies files in the kernel (`copy_file_range`, or a reflink on
+copy-on-write file systems) on a pool of threads.
+
+Usage: python benchmarks/bench_copy_local.py [small count] [large count]
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import _common  # noqa: F401
+from _common import timed
+
+from pathman import Path
+from pathman._impl import filecopy
+from pathman.copy import copy
+
+PER_DIRECTORY = 1000
+SMALL_SIZE = 4096
+LARGE_SIZE = 256 * 2 ** 20
+
+
+def populate(root: str, count: int, size: int) -> None:
+    block = os.urandom(min(size, 2 ** 20))
+    for i in range(count):
+        directory = os.path.join(root, "d{:04d}".format(i // PER_DIRECTORY))
+        if i % PER_DIRECTORY == 0:
+            os.makedirs(directory)
+        with open(os.path.join(directory, "{:07d}.bin".format(i)), "wb") as f:
+            for _ in range(size // len(block)):
+                f.write(block)
+
+
+def compare(workdir: str, label: str, count: int, size: int) -> None:
+    src = os.path.join(workdir, label)
+    populate(src, count, size)
+
+    def _run(name, function):
+        dest = os.path.join(workdir, "copy")
+        # start each copy without writes of the previous one pending
+        getattr(os, "sync", lambda: None)()
+        with timed("{}: {}".format(label, name), count):
+            function(dest)
+        shutil.rmtree(dest)
+
+    _run("shutil.copytree", lambda dest: shutil.copytree(src, dest))
+    for parallelism in (1, 8):
+        _run(
+            "copy(parallelism={})".format(parallelism),
+            lambda dest: copy(Path(src), Path(dest), parallelism=parallelism),
+        )
+
+    # the userspace fallback, as on systems without kernel copies
+    reflink = filecopy._reflink
+    filecopy._reflink = lambda *args: False
+    filecopy._missing.update({"copy_file_range", "sendfile"})
+    try:
+        _run(
+            "copy(parallelism=8), userspace",
+            lambda dest: copy(Path(src), Path(dest), parallelism=8),
+        )
+    finally:
+        filecopy._reflink = reflink
+        filecopy._missing.clear()
+    shutil.rmtree(src)
+
+
+def main(small: int, large: int) -> None:
+    workdir = tempfile.mkdtemp(dir=os.environ.get("BENCH_DIR"))
+    try:
+        compare(workdir, "small files", small, SMALL_SIZE)
+        compare(workdir, "large files", large, LARGE_SIZE)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    small = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    large = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    main(small, large)
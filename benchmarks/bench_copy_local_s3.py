@@ -0,0 +1,67 @@
+""" Directory upload throughput for many small files and a few large files
+
+Usage: python benchmarks/bench_copy_local_s3.py [small_count]
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import _common  # noqa: F401
+from _common import add_latency, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman.copy import copy
+
+MB = 2 ** 20
+
+
+def make_tree(root: str, count: int, size: int) -> str:
+    for i in range(count):
+        directory = os.path.join(root, "{:03d}".format(i % 100))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "{:06d}.bin".format(i)), "wb") as f:
+            f.write(os.urandom(size))
+    return root
+
+
+@mock_s3
+def main(small_count: int):
+    boto3.client("s3").create_bucket(Bucket="bench")
+    add_latency(0.02)
+    tmp = tempfile.mkdtemp()
+    try:
+        small = make_tree(os.path.join(tmp, "small"), small_count, 1024)
+        large = make_tree(os.path.join(tmp, "large"), 4, 64 * MB)
+
+        for parallelism in [1, 8, 32]:
+            with timed("small files, parallelism={}".format(parallelism), small_count):
+                copy(
+                    Path(small),
+                    Path("s3://bench/small-{}".format(parallelism)),
+                    parallelism=parallelism,
+                )
+
+        for chunksize, concurrency in [(64 * MB, 1), (8 * MB, 4), (8 * MB, 10)]:
+            label = "large files, chunk={}MB, concurrency={}".format(
+                chunksize // MB, concurrency
+            )
+            with timed(label, 4):
+                stats = copy(
+                    Path(large),
+                    Path("s3://bench/large-{}".format(concurrency)),
+                    parallelism=2,
+                    multipart_threshold=8 * MB,
+                    multipart_chunksize=chunksize,
+                    max_concurrency=concurrency,
+                )
+            print("    {:.1f} MB/s".format(stats.bytes_per_second / MB))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,66 @@
+""" Directory download: page-at-a-time pool vs. the streaming pipeline
+
+Usage: python benchmarks/bench_copy_s3_local.py [count]
+"""
+import os
+import shutil
+import sys
+import tempfile
+from concurrent import futures
+
+import _common  # noqa: F401
+from _common import add_latency, populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman.copy import copy
+
+PARALLELISM = 16
+
+
+def copy_paged(bucket: str, prefix: str, dest: str):
+    """ The previous implementation: a fresh pool per listing page """
+    s3 = boto3.client("s3")
+
+    def _download_key(key: str):
+        destination = os.path.join(dest, key[len(prefix) :])
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        s3.download_file(Bucket=bucket, Key=key, Filename=destination)
+
+    kwargs = {"Bucket": bucket, "Prefix": prefix}
+    while True:
+        batch = s3.list_objects_v2(**kwargs)
+        with futures.ThreadPoolExecutor(max_workers=PARALLELISM) as executor:
+            futures.wait(
+                [executor.submit(_download_key, o["Key"]) for o in batch["Contents"]]
+            )
+        if "NextContinuationToken" not in batch:
+            break
+        kwargs["ContinuationToken"] = batch["NextContinuationToken"]
+
+
+@mock_s3
+def main(count: int):
+    populate(boto3.client("s3"), "bench", count, size=128)
+    add_latency(0.02)
+
+    dest = tempfile.mkdtemp()
+    try:
+        with timed("paged pool", count):
+            copy_paged("bench", "data/", os.path.join(dest, "paged"))
+
+        with timed("streaming pipeline", count):
+            stats = copy(
+                Path("s3://bench/data"),
+                Path(os.path.join(dest, "pipeline")),
+                parallelism=PARALLELISM,
+            )
+        print("    {}".format(stats))
+    finally:
+        shutil.rmtree(dest)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,40 @@
+""" Prefix copy between buckets: one object at a time vs. the worker pool
+
+Usage: python benchmarks/bench_copy_s3_s3.py [count]
+"""
+import sys
+
+import _common  # noqa: F401
+from _common import add_latency, populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+from pathman.copy import copy
+
+
+@mock_s3
+def main(count: int):
+    s3 = boto3.client("s3")
+    populate(s3, "source", count, size=256)
+    s3.create_bucket(Bucket="dest")
+    add_latency(0.02)
+
+    fs = clients.get_filesystem()
+    with timed("one at a time (s3fs.copy)", count):
+        for path in Path("s3://source/data").walk():
+            fs.copy(str(path), str(path).replace("source/data", "dest/serial"))
+
+    for parallelism in [4, 16, 32]:
+        with timed("pipeline, parallelism={}".format(parallelism), count):
+            copy(
+                Path("s3://source/data"),
+                Path("s3://dest/parallel-{}".format(parallelism)),
+                parallelism=parallelism,
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
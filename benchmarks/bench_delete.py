@@ -0,0 +1,38 @@
+""" Removing a prefix: one DeleteObject per key vs. batched DeleteObjects
+
+Usage: python benchmarks/bench_delete.py [count]
+"""
+import sys
+
+import _common  # noqa: F401
+from _common import add_latency, populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+
+
+@mock_s3
+def main(count: int):
+    s3 = boto3.client("s3")
+    for prefix in ["serial", "batched", "rmdir"]:
+        populate(s3, prefix, count)
+    # list up front so only the removals are timed
+    serial = list(Path("s3://serial/data").walk())
+    batched = list(Path("s3://batched/data").walk())
+    add_latency(0.02)
+
+    with timed("per-key Path.remove", count):
+        for path in serial:
+            path.remove()
+
+    with timed("Path.remove_many", count):
+        Path.remove_many(batched)
+
+    with timed("Path.rmdir(recursive=True)", count):
+        Path("s3://rmdir/data").rmdir(recursive=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
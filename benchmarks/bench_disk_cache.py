@@ -0,0 +1,41 @@
+""" Repeated reads of the same objects, with and without the disk cache
+
+Usage: python benchmarks/bench_disk_cache.py [count]
+"""
+import sys
+import tempfile
+
+import _common  # noqa: F401
+from _common import add_latency, populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import disk_cache
+
+ROUNDS = 3
+
+
+@mock_s3
+def main(count: int):
+    s3 = boto3.client("s3")
+    populate(s3, "reference", count, size=2 ** 20)
+    keys = ["s3://reference/data/{:06d}/file.bin".format(i) for i in range(count)]
+    add_latency(0.02)
+
+    for i in range(ROUNDS):
+        with timed("no cache, round {}".format(i + 1), count):
+            for key in keys:
+                Path(key).read_bytes()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(ROUNDS):
+            with timed("disk cache, round {}".format(i + 1), count):
+                for key in keys:
+                    Path(key, cache_dir=directory).read_bytes()
+        print(disk_cache.get(directory).stats())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,96 @@
+""" Downloading one large object: boto3's download_file vs. ranged downloads
+
+`copy_s3_local` of a single object fetches byte ranges concurrently and
+writes them in place into a preallocated file. moto serves ranges of large
+objects slowly and under the GIL, so after a moto run the same downloads
+are replayed against an in-memory object that answers like S3 does: after
+a fixed latency, at a fixed bandwidth per connection.
+
+Usage: python benchmarks/bench_download.py [size_mb]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import _common  # noqa: F401
+from _common import add_latency, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import download
+from pathman._impl.stat_cache import StatInfo
+from pathman.copy import copy_s3_local
+
+MB = 2 ** 20
+#: time to first byte of a GET on S3
+LATENCY = 0.05
+#: throughput of a single S3 connection
+BANDWIDTH = 80 * MB
+
+
+class ModelledObject(object):
+    """ Just enough of GetObject, answered from memory at S3-like speeds """
+
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+
+    def get_object(self, Bucket, Key, Range, **kwargs):
+        start, end = (int(b) for b in Range[len("bytes=") :].split("-"))
+        return {"Body": _Body(self.data[start : end + 1])}
+
+
+class _Body(object):
+    def __init__(self, data: memoryview) -> None:
+        time.sleep(LATENCY)
+        self.data = data
+
+    def read(self, size: int) -> bytes:
+        block, self.data = self.data[:size], self.data[size:]
+        time.sleep(len(block) / BANDWIDTH)
+        return bytes(block)
+
+
+@mock_s3
+def moto(directory: str, size_mb: int):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    s3.put_object(Bucket="bucket", Key="large.bin", Body=os.urandom(size_mb * MB))
+    add_latency(LATENCY)
+    src = Path("s3://bucket/large.bin")
+    destination = os.path.join(directory, "moto.bin")
+    with timed("moto: s3.download_file", size_mb):
+        s3.download_file("bucket", "large.bin", destination)
+    for parallelism in (1, 16):
+        os.remove(destination)
+        with timed("moto: copy_s3_local(parallelism={})".format(parallelism), size_mb):
+            copy_s3_local(src._impl, Path(destination)._impl, parallelism=parallelism)
+
+
+def modelled(directory: str, size_mb: int):
+    data = os.urandom(MB) * size_mb
+    s3 = ModelledObject(data)
+    info = StatInfo("file", size=len(data))
+    destination = os.path.join(directory, "modelled.bin")
+    for parallelism in (1, 4, 16, 64):
+        with timed("modelled S3: parallelism={}".format(parallelism), size_mb):
+            download.download(
+                s3, "bucket", "large.bin", destination, info, parallelism=parallelism
+            )
+        os.remove(destination)
+
+
+def main(size_mb: int):
+    directory = tempfile.mkdtemp()
+    try:
+        moto(directory, min(size_mb, 128))
+        modelled(directory, size_mb)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1024)
@@ -0,0 +1,59 @@
+""" Globbing a deep hierarchy: s3fs.glob vs. Path.glob
+
+Keys are laid out as logs/<year>/<month>/<day>/<hour>.json. `s3fs.glob`
+lists everything below the directory holding the first wildcard, while
+`Path.glob` lists only the levels and prefixes the pattern can match.
+
+Usage: python benchmarks/bench_glob.py [years]
+"""
+import sys
+
+import _common  # noqa: F401
+from _common import add_latency, timed
+
+import boto3  # type: ignore
+import s3fs  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+
+PATTERNS = [
+    # the leading literal segments narrow the listing
+    "logs/2000/03/*/*.json",
+    # a wildcard near the root, then literal segments
+    "logs/*/03/01/*.json",
+    # the literal text of a segment narrows its listing
+    "logs/2000/1*/0*/12.json",
+    # below "**", the prefix is listed flat
+    "logs/2001/**/23.json",
+]
+
+
+@mock_s3
+def main(years: int):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    keys = [
+        "logs/{}/{:02d}/{:02d}/{:02d}.json".format(2000 + y, m, d, h)
+        for y in range(years)
+        for m in range(1, 13)
+        for d in range(1, 29)
+        for h in range(24)
+    ]
+    for key in keys:
+        s3.put_object(Bucket="bucket", Key=key, Body=b"")
+    print("{} keys".format(len(keys)))
+    add_latency(0.02)
+
+    fs = s3fs.S3FileSystem()
+    root = Path("s3://bucket")
+    for pattern in PATTERNS:
+        fs.invalidate_cache()
+        with timed("s3fs.glob({!r})".format(pattern)):
+            expected = len(fs.glob("bucket/" + pattern))
+        with timed("Path.glob({!r})".format(pattern)):
+            assert sum(1 for _ in root.glob(pattern)) == expected
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2)
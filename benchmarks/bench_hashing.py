@@ -0,0 +1,46 @@
+""" Set membership and dict lookup over large collections of paths
+
+Usage: python benchmarks/bench_hashing.py [count]
+"""
+import sys
+
+import _common  # noqa: F401
+from _common import timed
+
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+
+
+@mock_s3
+def main(count: int):
+    for label, template in [
+        ("local", "/data/manifests/part-{:07d}/file.bin"),
+        ("s3", "s3://bench/manifests/part-{:07d}/file.bin"),
+    ]:
+        paths = [Path(template.format(i)) for i in range(count)]
+        # equal but distinct objects, as produced by re-reading a manifest
+        probes = [Path(template.format(i)) for i in range(0, count, 2)]
+
+        with timed("{} build set".format(label), count):
+            index = set(paths)
+        with timed("{} set membership (first hash)".format(label), len(probes)):
+            assert all(p in index for p in probes)
+        with timed("{} set membership (cached hash)".format(label), len(probes)):
+            assert all(p in index for p in probes)
+
+        with timed("{} build dict".format(label), count):
+            lookup = {p: i for i, p in enumerate(paths)}
+        with timed("{} dict lookup".format(label), len(probes)):
+            for p in probes:
+                lookup[p]
+
+        table: dict = {}
+        with timed("{} intern".format(label), count):
+            for p in paths + probes:
+                p.intern(table)
+        assert len(table) == count
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
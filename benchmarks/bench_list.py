@@ -0,0 +1,78 @@
+""" Listing a large prefix: sequential pages vs. parallel key-range shards
+
+moto scans the whole bucket to answer every ListObjectsV2 request, holding
+the GIL, so against moto the listing is CPU bound and sharding cannot help.
+The second part replays the same requests against an in-memory bucket that
+answers like S3 does, from a sorted index, after a fixed latency.
+
+Usage: python benchmarks/bench_list.py [count]
+"""
+import bisect
+import sys
+import time
+
+import _common  # noqa: F401
+from _common import add_latency, populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import listing
+
+#: ListObjectsV2 pages of 1000 keys take around 100 ms on S3
+LATENCY = 0.1
+
+
+class SortedBucket(object):
+    """ Just enough of the ListObjectsV2 API, answered from a sorted key list """
+
+    def __init__(self, keys, latency=LATENCY):
+        self.keys = sorted(keys)
+        self.latency = latency
+        self.requests = 0
+
+    def list_objects_v2(
+        self, Bucket, Prefix="", MaxKeys=1000, StartAfter="", ContinuationToken=""
+    ):
+        time.sleep(self.latency)
+        self.requests += 1
+        after = max(StartAfter, ContinuationToken, Prefix)
+        i = bisect.bisect_right(self.keys, after)
+        page = []
+        while i < len(self.keys) and len(page) < MaxKeys:
+            if not self.keys[i].startswith(Prefix):
+                break
+            page.append({"Key": self.keys[i], "Size": 0})
+            i += 1
+        truncated = i < len(self.keys) and self.keys[i].startswith(Prefix)
+        response = {"Contents": page, "IsTruncated": truncated}
+        if truncated:
+            response["NextContinuationToken"] = page[-1]["Key"]
+        return response
+
+
+@mock_s3
+def main(count: int):
+    s3 = boto3.client("s3")
+    populate(s3, "bucket", count)
+    add_latency(LATENCY)
+    root = Path("s3://bucket/data")
+
+    with timed("moto: walk()", count):
+        assert sum(1 for _ in root.walk()) == count
+    with timed("moto: walk(parallel=16)", count):
+        assert sum(1 for _ in root.walk(parallel=16)) == count
+
+    keys = ["data/{:06d}/file.bin".format(i) for i in range(count)]
+    for parallel in (None, 4, 16, 64):
+        bucket = SortedBucket(keys)
+        label = "modelled S3: parallel={}".format(parallel)
+        with timed(label, count):
+            entries = listing.list_objects(bucket, "bucket", "data/", parallel)
+            assert sum(1 for _ in entries) == count
+        print("{:>48} {:>10} requests".format("", bucket.requests))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,67 @@
+""" Walking a large local tree: os.walk + stat vs. the scandir-based LocalPath.walk
+
+Creates `count` empty files, 1000 per directory, in a temporary directory
+(or in the directory given as second argument, reused if it exists).
+
+Usage: python benchmarks/bench_local_walk.py [count] [directory]
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import _common  # noqa: F401
+from _common import timed
+
+from pathman import Path
+from pathman._impl import LocalPath
+
+PER_DIRECTORY = 1000
+
+
+def populate(root: str, count: int) -> None:
+    for i in range(count):
+        directory = os.path.join(root, "d{:04d}".format(i // PER_DIRECTORY))
+        if i % PER_DIRECTORY == 0:
+            os.makedirs(directory, exist_ok=True)
+        suffix = ".txt" if i % 10 == 0 else ".bin"
+        open(os.path.join(directory, "{:07d}{}".format(i, suffix)), "wb").close()
+
+
+def main(count: int, root: str):
+    if not os.path.isdir(root) or not os.listdir(root):
+        populate(root, count)
+
+    def _baseline():
+        # what walking and stat-ing every file cost before
+        for directory, _, files in os.walk(root):
+            for name in files:
+                path = LocalPath(os.path.join(directory, name))
+                if path.is_file():
+                    path.stat()
+                    yield path
+
+    with timed("os.walk + is_file + stat", count):
+        assert sum(1 for _ in _baseline()) == count
+    with timed("Path.walk() + is_file + stat", count):
+        walked = (p for p in Path(root).walk() if p.is_file() and p.stat())
+        assert sum(1 for _ in walked) == count
+    with timed("Path.walk(parallel=8) + stat", count):
+        assert sum(1 for p in Path(root).walk(parallel=8) if p.stat()) == count
+    with timed("Path.walk(include=['*.txt'])", count):
+        assert sum(1 for _ in Path(root).walk(include=["*.txt"])) == count // 10
+    with timed("Path.walk(include=['d0000/*'])", count):
+        walked = Path(root).walk(include=["d0000/*"])
+        assert sum(1 for _ in walked) == min(count, PER_DIRECTORY)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    if len(sys.argv) > 2:
+        main(count, sys.argv[2])
+    else:
+        root = tempfile.mkdtemp()
+        try:
+            main(count, root)
+        finally:
+            shutil.rmtree(root)
@@ -0,0 +1,44 @@
+""" Bytes-per-path for large in-memory collections of local and S3 paths
+
+Usage: python benchmarks/bench_memory.py [count]
+"""
+import gc
+import sys
+import tracemalloc
+
+import _common  # noqa: F401
+
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+
+
+def bytes_per_path(template: str, count: int) -> float:
+    # build the strings first so that only the Path overhead is measured
+    strings = [template.format(i) for i in range(count)]
+    # warm up so the shared S3 client is not counted against the paths
+    Path(strings[0]).parts
+    gc.collect()
+    tracemalloc.start()
+    paths = [Path(s) for s in strings]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del paths
+    return current / count
+
+
+@mock_s3
+def main(count: int):
+    for label, template in [
+        ("local", "/data/manifests/part-{:07d}/file.bin"),
+        ("s3", "s3://bench/manifests/part-{:07d}/file.bin"),
+    ]:
+        print(
+            "{:<8} {:>10} paths {:>8.1f} bytes/path".format(
+                label, count, bytes_per_path(template, count)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,37 @@
+""" Microbenchmarks for path arithmetic on local and S3 paths """
+import _common  # noqa: F401
+from _common import timed
+
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+
+N = 20000
+
+OPERATIONS = [
+    ("/", lambda p: p / "child.txt"),
+    ("join", lambda p: p.join("a", "b", "c.txt")),
+    ("dirname", lambda p: p.dirname()),
+    ("with_suffix", lambda p: p.with_suffix(".csv")),
+    ("expanduser", lambda p: p.expanduser()),
+]
+
+
+@mock_s3
+def main():
+    for base in ["/data/some/dir/file", "s3://bench/some/dir/file"]:
+        path = Path(base)
+        kind = path._location
+        for name, op in OPERATIONS:
+            with timed("{} {}".format(kind, name), N):
+                for _ in range(N):
+                    op(path)
+
+            # the previous behaviour: derive, then re-parse the string in Path()
+            with timed("{} {} (re-parsed)".format(kind, name), N):
+                for _ in range(N):
+                    Path(str(op(path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+""" Reading 100 scattered 64KiB ranges of a large file
+
+The local file is `size` MiB (1GiB by default). moto copies the whole object
+for every ranged GET, so the S3 object is kept at 64MiB; against real S3 the
+cost of a ranged GET does not depend on the object size, while reading the
+whole object does.
+
+Usage: python benchmarks/bench_ranges.py [size in MiB]
+"""
+import os
+import random
+import sys
+import tempfile
+
+import _common  # noqa: F401
+from _common import add_latency, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+
+RANGES = 100
+RANGE_SIZE = 64 * 2 ** 10
+S3_SIZE = 64 * 2 ** 20
+
+
+def scattered(size: int):
+    random.seed(0)
+    starts = random.sample(range(0, size - RANGE_SIZE, RANGE_SIZE), RANGES)
+    return [(start, start + RANGE_SIZE) for start in starts]
+
+
+def compare(path: Path, size: int):
+    wanted = scattered(size)
+    print("{}: {} MiB".format(path, size // 2 ** 20))
+
+    with timed("  whole file, then slice", RANGES):
+        data = path.read_bytes()
+        [data[start:end] for start, end in wanted]
+    del data
+
+    with timed("  open + seek + read", RANGES):
+        with path.open("rb") as f:
+            for start, end in wanted:
+                f.seek(start)
+                f.read(end - start)
+
+    with timed("  read_bytes(start, end) per range", RANGES):
+        for start, end in wanted:
+            path.read_bytes(start=start, end=end)
+
+    for parallelism in [8, 32]:
+        with timed("  read_ranges, parallelism={}".format(parallelism), RANGES):
+            path.read_ranges(wanted, parallelism=parallelism)
+
+
+@mock_s3
+def main(size_mb: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "large.bin")
+        with open(filename, "wb") as f:
+            f.truncate(size_mb * 2 ** 20)
+        compare(Path(filename), size_mb * 2 ** 20)
+
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    s3.put_object(Bucket="bucket", Key="large.bin", Body=b"x" * S3_SIZE)
+    add_latency(0.02)
+    compare(Path("s3://bucket/large.bin"), S3_SIZE)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1024)
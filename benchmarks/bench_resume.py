@@ -0,0 +1,96 @@
+""" Resuming an interrupted directory upload from its journal
+
+Uploads `count` small files with and without a journal, to show what the
+journal costs, then interrupts a journaled upload halfway and times the
+rerun that resumes it, against a rerun from scratch.
+
+Usage: python benchmarks/bench_resume.py [count]
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import _common  # noqa: F401
+from _common import add_latency, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+from pathman.copy import copy
+from pathman.exc import TransferError
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptingClient(object):
+    """ An S3 client failing every upload after the first `limit` ones """
+
+    def __init__(self, s3, limit):
+        self.s3 = s3
+        self.limit = limit
+
+    def __getattr__(self, name):
+        return getattr(self.s3, name)
+
+    def upload_file(self, *args, **kwargs):
+        self.limit -= 1
+        if self.limit < 0:
+            raise Interrupted()
+        return self.s3.upload_file(*args, **kwargs)
+
+
+def make_tree(root: str, count: int) -> str:
+    for i in range(count):
+        directory = os.path.join(root, "{:03d}".format(i % 100))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "{:06d}.bin".format(i)), "wb") as f:
+            f.write(os.urandom(1024))
+    return root
+
+
+@mock_s3
+def main(count: int):
+    boto3.client("s3").create_bucket(Bucket="bench")
+    add_latency(0.02)
+    tmp = tempfile.mkdtemp()
+    try:
+        src = Path(make_tree(os.path.join(tmp, "src"), count))
+        with timed("full upload, no journal", count):
+            copy(src, Path("s3://bench/plain"), parallelism=16)
+        with timed("full upload, journal", count):
+            copy(
+                src,
+                Path("s3://bench/journaled"),
+                parallelism=16,
+                journal=os.path.join(tmp, "journaled"),
+            )
+
+        journal = os.path.join(tmp, "interrupted")
+        get_client = clients.get_client
+        clients.get_client = lambda **kwargs: InterruptingClient(
+            get_client(**kwargs), count // 2
+        )
+        try:
+            copy(src, Path("s3://bench/resumed"), parallelism=16, journal=journal)
+        except TransferError:
+            pass
+        finally:
+            clients.get_client = get_client
+        with timed("rerun of a halfway upload, journal", count):
+            stats = copy(
+                src, Path("s3://bench/resumed"), parallelism=16, journal=journal
+            )
+        print("    {} uploaded, {} skipped".format(stats.files, stats.skipped))
+        with timed("rerun of a halfway upload, no journal", count):
+            copy(src, Path("s3://bench/resumed"), parallelism=16)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
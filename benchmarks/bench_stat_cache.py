@@ -0,0 +1,43 @@
+""" S3 requests issued by the usual exists / is_file / read sequence """
+import _common  # noqa: F401
+from _common import populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+
+N_KEYS = 500
+
+
+def count_requests(fs) -> list:
+    calls = []
+    fs.s3.meta.events.register("before-call.s3", lambda **kw: calls.append(1))
+    return calls
+
+
+def run(label: str, ttl: float):
+    clients.clear()
+    # paths as read back from a manifest, so no listing has been cached
+    paths = [Path("s3://bench/data/{:06d}/file.bin".format(i)) for i in range(N_KEYS)]
+    clients.get_stat_cache().ttl = ttl
+    calls = count_requests(paths[0]._impl._path)
+
+    with timed(label, N_KEYS):
+        for path in paths:
+            if path.exists() and path.is_file():
+                path.read_bytes()
+
+    print("    requests: {}  cache: {}".format(len(calls), clients.get_stat_cache().stats()))
+
+
+@mock_s3
+def main():
+    populate(boto3.client("s3"), "bench", N_KEYS, size=16)
+    run("exists + is_file + read (no cache)", ttl=0)
+    run("exists + is_file + read (cache)", ttl=30)
+
+
+if __name__ == "__main__":
+    main()
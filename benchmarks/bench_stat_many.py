@@ -0,0 +1,56 @@
+""" Existence checks of many S3 paths: exists() vs. stat_many
+
+Paths are laid out 100 per "directory", and a tenth of those checked do
+not exist. `stat_many` is run once with HEAD requests only, and once
+answering each directory from a listing.
+
+Usage: python benchmarks/bench_stat_many.py [count]
+"""
+import sys
+
+import _common  # noqa: F401
+from _common import add_latency, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path, metadata, stat_many
+from pathman._impl import clients
+
+LATENCY = 0.01
+
+
+def key(i: int) -> str:
+    return "data/{:04d}/{:06d}.bin".format(i // 100, i)
+
+
+@mock_s3
+def main(count: int):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    for i in range(count):
+        if i % 10:
+            s3.put_object(Bucket="bucket", Key=key(i), Body=b"")
+    add_latency(LATENCY)
+    paths = [Path("s3://bucket/" + key(i)) for i in range(count)]
+    expected = count - len(range(0, count, 10))
+
+    clients.clear()
+    with timed("exists(), one path at a time", count):
+        assert sum(p.exists() for p in paths) == expected
+
+    clients.clear()
+    metadata.MIN_LISTED = count + 1
+    with timed("stat_many, HEAD requests", count):
+        infos = stat_many(paths)
+        assert sum(i.type == "file" for i in infos) == expected
+
+    clients.clear()
+    metadata.MIN_LISTED = 2
+    with timed("stat_many, listings", count):
+        infos = stat_many(paths)
+        assert sum(i.type == "file" for i in infos) == expected
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,55 @@
+""" Re-copying a prefix where 1% of the objects changed: full copy vs. sync
+
+Usage: python benchmarks/bench_sync.py [count]
+"""
+import sys
+import tempfile
+
+import _common  # noqa: F401
+from _common import add_latency, populate, timed
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman.copy import copy
+
+
+@mock_s3
+def main(count: int):
+    s3 = boto3.client("s3")
+    populate(s3, "source", count, size=1024)
+    s3.create_bucket(Bucket="dest")
+    src = Path("s3://source/data")
+
+    with tempfile.TemporaryDirectory() as local:
+        copy(src, Path(local))
+        copy(src, Path("s3://dest/data"))
+        for i in range(0, count, 100):
+            s3.put_object(
+                Bucket="source", Key="data/{:06d}/file.bin".format(i), Body=b"y" * 1024
+            )
+        add_latency(0.02)
+
+        with timed("s3 -> local, sync (size_mtime)", count):
+            report(copy(src, Path(local), sync=True))
+        with timed("s3 -> local, sync (checksum)", count):
+            report(copy(src, Path(local), sync=True, compare="checksum"))
+        with timed("s3 -> local, full copy", count):
+            copy(src, Path(local))
+
+        with timed("s3 -> s3, sync (checksum)", count):
+            report(copy(src, Path("s3://dest/data"), sync=True, compare="checksum"))
+        with timed("s3 -> s3, full copy", count):
+            copy(src, Path("s3://dest/data"))
+
+        with timed("local -> s3, sync (size_mtime)", count):
+            report(copy(Path(local), Path("s3://dest/data"), sync=True))
+
+
+def report(stats):
+    print("  copied {}, skipped {}".format(stats.files, stats.skipped))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
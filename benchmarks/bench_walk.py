@@ -0,0 +1,59 @@
+""" Walking a large prefix: s3fs.walk vs. the streaming Path.walk
+
+Reports the time to the first path, the total time and the peak memory
+allocated while iterating (without keeping the paths).
+
+Usage: python benchmarks/bench_walk.py [count]
+"""
+import sys
+import time
+import tracemalloc
+
+import _common  # noqa: F401
+from _common import add_latency, populate
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+
+
+def measure(label: str, paths):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in paths:
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        "{:<24} first {:>8.3f}s  total {:>8.3f}s  peak {:>8.1f} MiB  ({} paths)".format(
+            label, first or 0.0, total, peak / 2 ** 20, count
+        )
+    )
+
+
+@mock_s3
+def main(count: int):
+    s3 = boto3.client("s3")
+    populate(s3, "bucket", count)
+    add_latency(0.02)
+    # create the shared clients outside of the measurements
+    Path("s3://bucket/data/000000/file.bin").exists()
+
+    fs = clients.get_filesystem()
+    measure(
+        "s3fs.walk",
+        (f for _, _, files in fs.walk("bucket/data") for f in files),
+    )
+    fs.invalidate_cache()
+    measure("Path.walk", Path("s3://bucket/data").walk())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
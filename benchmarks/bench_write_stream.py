@@ -0,0 +1,56 @@
+""" Streaming a large object to S3 with 1, 4 and 16 parts in flight
+
+The stream is generated in 1 MiB chunks, so only the writer's part buffers
+are ever held in memory. moto stores every part in memory, so the default
+size is scaled down from the multi-GB streams this is meant for; pass a
+size in MiB to change it. Each request is delayed to model S3 latency.
+
+Usage: python benchmarks/bench_write_stream.py [size_mb]
+"""
+import sys
+
+import _common  # noqa: F401
+from _common import add_latency, timed
+
+import boto3  # type: ignore
+import s3fs  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+
+MB = 2 ** 20
+PART_SIZE = 8 * MB
+#: upload_part of an 8 MiB part takes a few hundred ms on S3
+LATENCY = 0.2
+
+
+def chunks(size_mb: int):
+    chunk = b"x" * MB
+    for _ in range(size_mb):
+        yield chunk
+
+
+@mock_s3
+def main(size_mb: int):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    add_latency(LATENCY)
+    print("{} MiB in parts of {} MiB".format(size_mb, PART_SIZE // MB))
+
+    fs = s3fs.S3FileSystem()
+    with timed("s3fs open('wb')", size_mb):
+        with fs.open("bucket/s3fs", "wb", block_size=PART_SIZE) as f:
+            for chunk in chunks(size_mb):
+                f.write(chunk)
+
+    path = Path("s3://bucket/pathman")
+    for max_concurrency in (1, 4, 16):
+        with timed("write_stream(max_concurrency={})".format(max_concurrency), size_mb):
+            path.write_stream(
+                chunks(size_mb), part_size=PART_SIZE, max_concurrency=max_concurrency
+            )
+        assert path.stat().size == size_mb * MB
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 512)
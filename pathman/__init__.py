@@ -1,3 +1,4 @@
 from .path import Path
+from .metadata import stat_many
 
 __version__ = "0.2.2"
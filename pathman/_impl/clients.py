@@ -0,0 +1,151 @@
+""" Process-wide registry of shared S3 filesystems and boto3 clients """
+import os
+import threading
+from typing import Any, Dict, Hashable, Tuple
+
+from pathman import limits
+from pathman.utils import freeze
+from pathman._impl.stat_cache import StatCache
+
+#: Connection pool size of shared boto3 clients, sized for concurrent transfers
+MAX_POOL_CONNECTIONS = 64
+
+_lock = threading.Lock()
+_filesystems: Dict[Hashable, Any] = {}
+_clients: Dict[Hashable, Any] = {}
+_stat_caches: Dict[Hashable, StatCache] = {}
+
+
+def normalize_kwargs(kwargs: Dict[str, Any]) -> Tuple:
+    """Build the registry key for a set of S3 connection kwargs
+
+    Parameters
+    ----------
+    kwargs: dict
+        Keyword arguments as accepted by `s3fs.S3FileSystem`
+
+    Returns
+    -------
+    tuple: A hashable, order-independent representation of the kwargs
+
+    Notes
+    -----
+    `anon` defaults to False, `profile_name` is treated as an alias of
+    `profile`, and `endpoint_url` / `region_name` may be given either at the
+    `top level or inside `client_kwargs`; all of these spellings share a key.
+    """
+    return freeze(_normalize(kwargs))
+
+
+def _normalize(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """ Canonical spelling of connection kwargs, see `normalize_kwargs` """
+    kwargs = dict(kwargs)
+    kwargs.setdefault("anon", False)
+    if "profile_name" in kwargs:
+        kwargs.setdefault("profile", kwargs.pop("profile_name"))
+    client_kwargs = dict(kwargs.pop("client_kwargs", None) or {})
+    for name in ("endpoint_url", "region_name"):
+        if name in kwargs:
+            client_kwargs.setdefault(name, kwargs.pop(name))
+    if client_kwargs:
+        kwargs["client_kwargs"] = client_kwargs
+    return kwargs
+
+
+def get_filesystem(**kwargs):
+    """Return the shared `s3fs.S3FileSystem` for the given connection kwargs
+
+    The filesystem is created on first use and reused by every caller that
+    passes equivalent kwargs.
+    """
+    key = normalize_kwargs(kwargs)
+    try:
+        return _filesystems[key]
+    except KeyError:
+        pass
+
+    from s3fs import S3FileSystem  # type: ignore
+
+    with _lock:
+        if key not in _filesystems:
+            filesystem = S3FileSystem(skip_instance_cache=True, **_normalize(kwargs))
+            limits.install(filesystem.s3)
+            _filesystems[key] = filesystem
+        return _filesystems[key]
+
+
+def get_client(**kwargs):
+    """Return the shared boto3 S3 client for the given connection kwargs
+
+    Unlike the botocore client held by `s3fs`, this client exposes the boto3
+    managed transfer methods (`upload_file`, `download_file`, ...).
+    """
+    key = normalize_kwargs(kwargs)
+    try:
+        return _clients[key]
+    except KeyError:
+        pass
+
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _create_client(_normalize(kwargs))
+        return _clients[key]
+
+
+def get_stat_cache(**kwargs) -> StatCache:
+    """Return the metadata cache shared by paths using the given connection kwargs
+
+    Adjust its `ttl` and `maxsize` attributes to tune caching, and read its
+    `stats()` to see how many requests it saved.
+    """
+    key = normalize_kwargs(kwargs)
+    try:
+        return _stat_caches[key]
+    except KeyError:
+        pass
+
+    with _lock:
+        return _stat_caches.setdefault(key, StatCache())
+
+
+def _create_client(kwargs: Dict[str, Any]):
+    import boto3  # type: ignore
+    from botocore import UNSIGNED  # type: ignore
+    from botocore.config import Config  # type: ignore
+
+    session = boto3.session.Session(
+        aws_access_key_id=kwargs.get("key"),
+        aws_secret_access_key=kwargs.get("secret"),
+        aws_session_token=kwargs.get("token"),
+        profile_name=kwargs.get("profile"),
+    )
+    config_kwargs = dict(kwargs.get("config_kwargs", {}))
+    config_kwargs.setdefault("max_pool_connections", MAX_POOL_CONNECTIONS)
+    if kwargs["anon"]:
+        config_kwargs["signature_version"] = UNSIGNED
+    client = session.client(
+        "s3", config=Config(**config_kwargs), **kwargs.get("client_kwargs", {})
+    )
+    return limits.install(client)
+
+
+def clear() -> None:
+    """ Drop every registered filesystem, client and metadata cache """
+    with _lock:
+        _filesystems.clear()
+        _clients.clear()
+        _stat_caches.clear()
+
+
+def _reset_after_fork() -> None:
+    # connection pools must never be shared with a parent process, and the
+    # lock may have been held by another thread at the time of the fork
+    global _lock
+    _lock = threading.Lock()
+    _filesystems.clear()
+    _clients.clear()
+    _stat_caches.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,269 @@
+""" Read-through cache of S3 object contents on local disk """
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+#: Default size cap of a cache directory
+DEFAULT_MAX_SIZE = 10 * 2 ** 30
+#: Eviction removes entries until the cache is this fraction of its cap, so
+#: that it does not rescan the directory on every fill
+EVICT_TO = 0.9
+#: Environment variable naming the cache directory used by default
+CACHE_DIR_ENV = "PATHMAN_CACHE_DIR"
+
+_CHUNK_SIZE = 2 ** 20
+
+_lock = threading.Lock()
+_caches: Dict[str, "DiskCache"] = {}
+# (directory, max_size) set by `configure`, None to use `CACHE_DIR_ENV`
+_default: Optional[Tuple[Optional[str], Optional[int]]] = None
+
+
+class DiskCache(object):
+    """Content cache of S3 objects, keyed on bucket, key and ETag
+
+    Each object is stored as ``<directory>/<xx>/<sha256(bucket/key)>/<etag>``.
+    Files are written to a temporary name and renamed into place, so several
+    processes can share a directory. Reading an entry bumps its modification
+    time, which eviction uses to drop the least recently used entries once
+    the directory grows beyond `max_size` bytes.
+
+    Parameters
+    ----------
+    directory: str
+        Cache directory, created if needed
+    max_size: int, optional
+        Size cap in bytes
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_dir(self, bucket: str, key: str) -> str:
+        digest = hashlib.sha256("{}/{}".format(bucket, key).encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def lookup(self, bucket: str, key: str) -> Optional[Tuple[str, str]]:
+        """ Return the (filename, ETag) of the cached copy of an object, if any """
+        entry_dir = self._entry_dir(bucket, key)
+        try:
+            names = [n for n in os.listdir(entry_dir) if not n.startswith(".")]
+        except FileNotFoundError:
+            return None
+        if not names:
+            return None
+        return os.path.join(entry_dir, names[0]), names[0]
+
+    def fetch(
+        self, s3, bucket: str, key: str, etag: Optional[str] = None
+    ) -> Optional[str]:
+        """Return the name of a local file holding the current object
+
+        Parameters
+        ----------
+        s3: boto3 S3 client
+        bucket, key: str
+            Object to read
+        etag: str, optional
+            ETag of the current version of the object, if known from a
+            recent listing or HEAD. A cached copy with this ETag is used
+            without asking S3; otherwise the copy is revalidated with a
+            conditional GET, which only transfers the object if it changed
+
+        Returns
+        -------
+        str, or None if the object is larger than the whole cache
+        """
+        cached = self.lookup(bucket, key)
+        if cached is not None and etag is not None:
+            if cached[1] == _safe_etag(etag):
+                return self._hit(cached[0])
+
+        kwargs = {"IfNoneMatch": '"{}"'.format(cached[1])} if cached else {}
+        try:
+            response = s3.get_object(Bucket=bucket, Key=key, **kwargs)
+        except s3.exceptions.NoSuchKey:
+            raise FileNotFoundError("s3://{}/{}".format(bucket, key))
+        except s3.exceptions.ClientError as e:
+            not_modified = e.response.get("Error", {}).get("Code") == "304"
+            if cached is not None and not_modified:
+                return self._hit(cached[0])
+            raise
+
+        body = response["Body"]
+        if response["ContentLength"] > self.max_size:
+            body.close()
+            return None
+        with self._lock:
+            self.misses += 1
+        return self._fill(bucket, key, response["ETag"], body, cached)
+
+    def _hit(self, filename: str) -> str:
+        try:
+            os.utime(filename)
+            size = os.path.getsize(filename)
+        except FileNotFoundError:
+            # evicted by another process in the meantime: not fatal, as an
+            # open file handle or mapping keeps the data readable
+            size = 0
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += size
+        return filename
+
+    def _fill(
+        self, bucket: str, key: str, etag: str, body, stale: Optional[Tuple[str, str]]
+    ) -> str:
+        entry_dir = self._entry_dir(bucket, key)
+        os.makedirs(entry_dir, exist_ok=True)
+        filename = os.path.join(entry_dir, _safe_etag(etag))
+        fd, tmp = tempfile.mkstemp(dir=entry_dir, prefix=".")
+        try:
+            size = 0
+            with os.fdopen(fd, "wb") as f:
+                for chunk in body.iter_chunks(_CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp, filename)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        if stale is not None and stale[0] != filename:
+            _remove(stale[0])
+        self._grow(size)
+        return filename
+
+    def _grow(self, size: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(s for _, s, _ in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_size:
+                self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """ (mtime, size, filename) of every cached file """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith("."):
+                    continue
+                filename = os.path.join(root, name)
+                try:
+                    st = os.stat(filename)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, filename))
+        return entries
+
+    def _evict(self) -> None:
+        # rescan, since other processes fill and evict the same directory
+        entries = sorted(self._entries())
+        size = sum(s for _, s, _ in entries)
+        target = self.max_size * EVICT_TO
+        for _, entry_size, filename in entries:
+            if size <= target:
+                break
+            _remove(filename)
+            size -= entry_size
+            self.evictions += 1
+        self._size = size
+
+    def clear(self) -> None:
+        """ Remove every cached object """
+        with self._lock:
+            for _, _, filename in self._entries():
+                _remove(filename)
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters
+
+        `bytes_saved` is the number of bytes served from disk instead of S3.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_saved": self.bytes_saved,
+            "evictions": self.evictions,
+        }
+
+
+def _safe_etag(etag: str) -> str:
+    return re.sub(r"[^0-9A-Za-z-]", "_", etag.strip('"'))
+
+
+def _remove(filename: str) -> None:
+    try:
+        os.remove(filename)
+        os.rmdir(os.path.dirname(filename))
+    except OSError:
+        # already evicted, or the entry directory is not empty
+        pass
+
+
+def configure(directory: Optional[str], max_size: Optional[int] = None) -> None:
+    """Set the cache used by S3 paths created without a `cache_dir`
+
+    Parameters
+    ----------
+    directory: str or None
+        Cache directory; None disables the default cache. Until this is
+        called, the `PATHMAN_CACHE_DIR` environment variable is used
+    max_size: int, optional
+        Size cap in bytes
+    """
+    global _default
+    _default = (directory, max_size)
+
+
+def get(
+    directory: Optional[str] = None, max_size: Optional[int] = None
+) -> Optional[DiskCache]:
+    """Return the shared `DiskCache` of a directory
+
+    Without a `directory`, return the default cache set with `configure` or
+    through `PATHMAN_CACHE_DIR`, or None if there is none. Without a
+    `max_size`, a new cache gets the size given to `configure`, or
+    `DEFAULT_MAX_SIZE`.
+
+    Raises
+    ------
+    ValueError
+        If `max_size` differs from the size of the existing cache of the
+        directory, which is shared; set its `max_size` to resize it
+    """
+    default_size = None
+    if directory is None:
+        if _default is not None:
+            directory, default_size = _default
+        else:
+            directory = os.environ.get(CACHE_DIR_ENV)
+        if not directory:
+            return None
+    directory = os.path.abspath(os.path.expanduser(directory))
+    with _lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = DiskCache(
+                directory, max_size or default_size or DEFAULT_MAX_SIZE
+            )
+        elif max_size is not None and max_size != cache.max_size:
+            raise ValueError(
+                "the cache in {} has a max_size of {} bytes, not {}".format(
+                    directory, cache.max_size, max_size
+                )
+            )
+        return cache
@@ -0,0 +1,267 @@
+""" Downloads of single S3 objects as concurrent byte ranges """
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent import futures
+from typing import Any, Dict, List, Optional, Tuple
+
+from pathman import sync
+from pathman._impl.stat_cache import StatInfo
+from pathman.exc import ChecksumMismatch
+from pathman.transfer import default_parallelism
+
+#: Bytes per range request: boto3's default multipart chunk size, so that
+#: ranges line up with the parts of most multipart uploads
+DEFAULT_CHUNK_SIZE = 8 * 2 ** 20
+#: Suffix of the file an object is downloaded to before being renamed
+PARTIAL_SUFFIX = ".pathman-part"
+
+_READ_SIZE = 2 ** 20
+# seconds between checkpoints of the chunks downloaded so far
+_CHECKPOINT_INTERVAL = 1.0
+
+_seek_lock = threading.Lock()
+
+# a chunk: its index, first byte and end offset
+_Chunk = Tuple[int, int, int]
+
+
+class _Cancelled(Exception):
+    """ Raised in the workers once another chunk has failed """
+
+
+class _Journal(object):
+    """Chunks of a partial download known to be on disk, with their MD5s
+
+    Kept next to the partial file as JSON, so that a later download of the
+    same object (same ETag, size and chunk size) can skip them. Chunks are
+    only recorded after the partial file has been synced to disk.
+    """
+
+    def __init__(self, filename: str, info: StatInfo, chunk_size: int) -> None:
+        self.filename = filename
+        self.identity = {"etag": info.etag, "size": info.size, "chunk_size": chunk_size}
+        self.done: Dict[int, bytes] = {}
+        self._recorded = 0
+        self._checkpointed = time.monotonic()
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """ Read the chunks of a previous attempt, if it was of this object """
+        try:
+            with open(self.filename) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("object") == self.identity:
+            self.done = {int(i): bytes.fromhex(d) for i, d in state["chunks"].items()}
+            self._recorded = len(self.done)
+
+    def add(self, fd: int, index: int, digest: bytes) -> None:
+        with self._lock:
+            self.done[index] = digest
+            if time.monotonic() - self._checkpointed >= _CHECKPOINT_INTERVAL:
+                self._checkpoint(fd)
+
+    def checkpoint(self, fd: int) -> None:
+        with self._lock:
+            if len(self.done) > self._recorded:
+                self._checkpoint(fd)
+
+    def _checkpoint(self, fd: int) -> None:
+        # a single sync covers every chunk written since the last one
+        getattr(os, "fdatasync", os.fsync)(fd)
+        state = {
+            "object": self.identity,
+            "chunks": {str(i): d.hex() for i, d in self.done.items()},
+        }
+        temporary = self.filename + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.filename)
+        self._recorded = len(self.done)
+        self._checkpointed = time.monotonic()
+
+    def remove(self) -> None:
+        _remove(self.filename)
+
+
+def download(
+    s3,
+    bucket: str,
+    key: str,
+    filename: str,
+    info: StatInfo,
+    chunk_size: Optional[int] = None,
+    parallelism: Optional[int] = None,
+    verify: bool = False,
+    resume: bool = False,
+    extra_args: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Download an object as concurrent range requests
+
+    The object is written to `filename` + `PARTIAL_SUFFIX`, preallocated to
+    its full size, each range being written at its offset with `pwrite` as
+    it arrives. The partial file is renamed to `filename` once complete, so
+    that `filename` never holds a partial object. Every range is requested
+    with the ETag of `info` as If-Match, so a concurrent overwrite of the
+    object fails the download instead of mixing two versions.
+
+    Parameters
+    ----------
+    s3: boto3 S3 client
+    bucket, key: str
+        Object to download
+    filename: str
+        Destination file
+    info: StatInfo
+        Metadata of the object, as from a HEAD request
+    chunk_size: int, optional
+        Bytes per range request
+    parallelism: int, optional
+        Number of concurrent range requests
+    verify: bool, optional
+        Check the downloaded file against the ETag of the object, and raise
+        `ChecksumMismatch` if it differs. Objects encrypted with SSE-KMS or
+        SSE-C do not have MD5 based ETags and always fail verification
+    resume: bool, optional
+        Keep the partial file after a failure, with a journal of the chunks
+        written, and skip those chunks when downloading the same object
+        (with the same ETag and `chunk_size`) again. Without it, partial
+        files are removed on failure
+    extra_args: dict, optional
+        Passed on to every GetObject request, e.g. `VersionId`
+
+    Returns
+    -------
+    int: bytes downloaded, excluding the chunks of a resumed download
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    partial = filename + PARTIAL_SUFFIX
+    journal = _Journal(partial + ".json", info, chunk_size)
+    if resume and os.path.exists(partial):
+        journal.load()
+    else:
+        journal.remove()
+    chunks = [
+        (i, start, min(start + chunk_size, info.size))
+        for i, start in enumerate(range(0, info.size, chunk_size))
+    ]
+    pending = [chunk for chunk in chunks if chunk[0] not in journal.done]
+
+    request = dict(extra_args or {}, Bucket=bucket, Key=key)
+    if info.etag:
+        request["IfMatch"] = info.etag
+    stop = threading.Event()
+
+    def _fetch(chunk: _Chunk) -> int:
+        index, start, end = chunk
+        response = s3.get_object(Range="bytes={}-{}".format(start, end - 1), **request)
+        digest = hashlib.md5()
+        offset = start
+        for block in iter(lambda: response["Body"].read(_READ_SIZE), b""):
+            if stop.is_set():
+                raise _Cancelled()
+            _pwrite(fd, block, offset)
+            digest.update(block)
+            offset += len(block)
+        if offset != end:
+            raise IOError(
+                "s3://{}/{}: expected {} bytes at offset {}, got {}".format(
+                    bucket, key, end - start, start, offset - start
+                )
+            )
+        journal.add(fd, index, digest.digest())
+        return end - start
+
+    flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    fd = os.open(partial, flags, 0o666)
+    downloaded = 0
+    try:
+        _preallocate(fd, info.size)
+        workers = max(1, min(parallelism or default_parallelism(), len(pending)))
+        with futures.ThreadPoolExecutor(workers) as executor:
+            running = [executor.submit(_fetch, chunk) for chunk in pending]
+            try:
+                for future in futures.as_completed(running):
+                    downloaded += future.result()
+            except BaseException:
+                stop.set()
+                for future in running:
+                    future.cancel()
+                raise
+    except BaseException:
+        if resume:
+            journal.checkpoint(fd)
+            os.close(fd)
+        else:
+            os.close(fd)
+            _remove(partial)
+            journal.remove()
+        raise
+    os.close(fd)
+
+    digests = [journal.done[i] for i, _, _ in chunks]
+    if verify and not _verify(partial, info, chunk_size, digests):
+        _remove(partial)
+        journal.remove()
+        raise ChecksumMismatch(
+            "s3://{}/{} does not match its ETag {}".format(bucket, key, info.etag)
+        )
+    os.replace(partial, filename)
+    journal.remove()
+    return downloaded
+
+
+def _verify(
+    filename: str, info: StatInfo, chunk_size: int, digests: List[bytes]
+) -> bool:
+    """ Whether the file has the ETag of `info` """
+    if not info.etag:
+        return False
+    etag = info.etag.strip('"')
+    # the MD5s of the chunks give the ETag directly when the chunks are the
+    # parts of the upload; otherwise the file has to be hashed again
+    if "-" not in etag:
+        if len(digests) == 1:
+            return digests[0].hex() == etag
+    elif int(etag.rsplit("-", 1)[1]) == len(digests):
+        combined = hashlib.md5(b"".join(digests)).hexdigest()
+        if "{}-{}".format(combined, len(digests)) == etag:
+            return True
+    return sync.etag_matches(filename, etag, chunk_size)
+
+
+def _preallocate(fd: int, size: int) -> None:
+    """ Reserve `size` bytes for the file, so that writes cannot run out of space """
+    os.ftruncate(fd, size)
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            # not supported by the file system: the file is sparse
+            pass
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> None:
+    """ Write all of `data` at `offset`, without moving the file position """
+    view = memoryview(data)
+    while view:
+        if hasattr(os, "pwrite"):
+            written = os.pwrite(fd, view, offset)
+        else:
+            # Windows: no positional writes, seek and write under a lock
+            with _seek_lock:
+                os.lseek(fd, offset, os.SEEK_SET)
+                written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+
+def _remove(filename: str) -> None:
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
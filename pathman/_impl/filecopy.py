@@ -0,0 +1,158 @@
+""" Local file copies through the kernel, without passing data through Python """
+import errno
+import functools
+import os
+import stat
+import sys
+from typing import Callable, Set, Tuple
+
+from pathman.exc import UnsupportedCopyOperation
+
+#: Largest single kernel copy request
+_MAX_REQUEST = 2 ** 30
+_MIN_REQUEST = 8 * 2 ** 20
+#: Block size of the userspace fallback
+_BUFFER_SIZE = 2 ** 20
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+# ioctl cloning a whole file on Linux (btrfs, XFS, and others)
+_FICLONE = 0x40049409
+
+# errors meaning a method does not apply to these two files, as opposed to
+# a failure of the copy itself
+_UNSUPPORTED = {
+    getattr(errno, name)
+    for name in (
+        "ENOSYS",
+        "EXDEV",
+        "EINVAL",
+        "ENOTTY",
+        "EOPNOTSUPP",
+        "ENOTSUP",
+        "ENOTSOCK",
+        "EBADF",
+    )
+    if hasattr(errno, name)
+}
+
+# (source device, destination device) pairs that cannot share blocks
+_no_reflink: Set[Tuple[int, int]] = set()
+# kernel copy functions this system lacks altogether
+_missing: Set[str] = set()
+
+
+def copy_file(src: str, dest: str) -> int:
+    """Copy the contents and permission bits of the file `src` to `dest`
+
+    The fastest available method is used, falling back to the next one when
+    a method does not apply to the two files:
+
+    1. a reflink (`FICLONE`), sharing the blocks of `src` on copy-on-write
+       file systems, so that no data is copied at all
+    2. `os.copy_file_range`, copying inside the kernel (and server-side on
+       some network file systems)
+    3. `os.sendfile`, copying inside the kernel on Linux
+    4. reading and writing blocks of up to 1 MiB
+
+    A `dest` left incomplete by a failure is removed.
+
+    Returns
+    -------
+    int: the size of the copied file
+    """
+    # raw file descriptors, cheaper than file objects for small files
+    src_fd = os.open(src, os.O_RDONLY | _O_BINARY)
+    try:
+        st = os.fstat(src_fd)
+        try:
+            if os.path.samestat(st, os.stat(dest)):
+                raise UnsupportedCopyOperation(
+                    "{} and {} are the same file".format(src, dest)
+                )
+        except FileNotFoundError:
+            pass
+        dst_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY)
+        try:
+            try:
+                _copy_contents(src_fd, dst_fd, st)
+            finally:
+                os.close(dst_fd)
+            os.chmod(dest, stat.S_IMODE(st.st_mode))
+        except BaseException:
+            _remove(dest)
+            raise
+    finally:
+        os.close(src_fd)
+    return st.st_size
+
+
+def _copy_contents(src_fd: int, dst_fd: int, st: os.stat_result) -> None:
+    if _reflink(src_fd, dst_fd, st):
+        return
+    request = min(max(st.st_size, _MIN_REQUEST), _MAX_REQUEST)
+    if "copy_file_range" not in _missing and hasattr(os, "copy_file_range"):
+        call = functools.partial(os.copy_file_range, src_fd, dst_fd, request)
+        if _kernel_copy("copy_file_range", call, st.st_size):
+            return
+    if "sendfile" not in _missing and sys.platform.startswith("linux"):
+        call = functools.partial(os.sendfile, dst_fd, src_fd, None, request)
+        if _kernel_copy("sendfile", call, st.st_size):
+            return
+    # no larger than the file: small files are the common case
+    block_size = max(1, min(st.st_size, _BUFFER_SIZE))
+    while True:
+        block = os.read(src_fd, block_size)
+        if not block:
+            return
+        view = memoryview(block)
+        while view:
+            view = view[os.write(dst_fd, view) :]
+
+
+def _reflink(src_fd: int, dst_fd: int, st: os.stat_result) -> bool:
+    """ Clone `src_fd` into `dst_fd`, False if the file systems cannot """
+    if not sys.platform.startswith("linux"):
+        return False
+    devices = (st.st_dev, os.fstat(dst_fd).st_dev)
+    if devices in _no_reflink:
+        return False
+    import fcntl
+
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+        _no_reflink.add(devices)
+        return False
+    return True
+
+
+def _kernel_copy(name: str, call: Callable[[], int], size: int) -> bool:
+    """Repeat `call` until it copies nothing more
+
+    Returns False, without having copied anything, if the method does not
+    apply to these files.
+    """
+    copied = 0
+    while True:
+        try:
+            sent = call()
+        except OSError as e:
+            if copied or e.errno not in _UNSUPPORTED:
+                raise
+            if e.errno == errno.ENOSYS:
+                _missing.add(name)
+            return False
+        if not sent:
+            # some file systems (e.g. procfs) report nothing to copy instead
+            # of an error
+            return bool(copied) or not size
+        copied += sent
+
+
+def _remove(filename: str) -> None:
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
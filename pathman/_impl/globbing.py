@@ -0,0 +1,236 @@
+""" Glob patterns matched one path segment at a time """
+import fnmatch
+import re
+from abc import ABC, abstractmethod
+from typing import Any, FrozenSet, Generator, Iterable, List, Optional, Sequence, Tuple
+
+#: Segment matching any number of path segments, including none
+RECURSIVE = "**"
+
+_MAGIC = re.compile(r"[*?[]")
+
+#: A listed path: its "/" separated name, whether it is a directory, and
+#: whatever metadata the listing returned for it
+Entry = Tuple[str, bool, Any]
+
+
+class Pattern(object):
+    """A glob pattern over "/" separated relative paths
+
+    `*`, `?` and `[...]` match within a single segment, as in `fnmatch`,
+    and a `**` segment matches any number of segments. Matching is done
+    segment by segment, so that a walk can tell whether a directory may
+    hold matches before listing it, see `may_contain`.
+
+    Parameters
+    ----------
+    pattern: str
+        Glob pattern, relative to the directory it is matched against
+    """
+
+    __slots__ = ("pattern", "segments", "_regexes")
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        segments = [s for s in pattern.split("/") if s]
+        # consecutive "**" are equivalent to a single one
+        self.segments = [
+            s
+            for i, s in enumerate(segments)
+            if not (s == RECURSIVE and i and segments[i - 1] == RECURSIVE)
+        ]
+        self._regexes = [
+            None if s == RECURSIVE else re.compile(fnmatch.translate(s))
+            for s in self.segments
+        ]
+
+    def __repr__(self) -> str:
+        return "Pattern({!r})".format(self.pattern)
+
+    def _closure(self, states: FrozenSet[int]) -> FrozenSet[int]:
+        # a "**" may match no segment at all
+        closed = set(states)
+        for state in sorted(states):
+            while state < len(self.segments) and self.segments[state] == RECURSIVE:
+                state += 1
+                closed.add(state)
+        return frozenset(closed)
+
+    def start(self) -> FrozenSet[int]:
+        """ Matching state of the directory the pattern is relative to """
+        return self._closure(frozenset([0]))
+
+    def advance(self, states: FrozenSet[int], part: str) -> FrozenSet[int]:
+        """ Matching state of the child `part` of a path in `states` """
+        following = set()
+        for state in states:
+            if state == len(self.segments):
+                continue
+            regex = self._regexes[state]
+            if regex is None:
+                following.add(state)
+            elif regex.match(part):
+                following.add(state + 1)
+        return self._closure(frozenset(following))
+
+    def matches(self, states: FrozenSet[int]) -> bool:
+        """ Whether a path in `states` matches the whole pattern """
+        return len(self.segments) in states
+
+    def continues(self, states: FrozenSet[int]) -> bool:
+        """ Whether a path below a directory in `states` may match """
+        return any(state < len(self.segments) for state in states)
+
+    def recursive(self, states: FrozenSet[int]) -> bool:
+        """ Whether a `**` segment applies below a directory in `states` """
+        return any(
+            state < len(self.segments) and self.segments[state] == RECURSIVE
+            for state in states
+        )
+
+    def literal_prefix(self, states: FrozenSet[int]) -> str:
+        """Prefix shared by the names of every child that may match
+
+        This is the text before the first wildcard of the next segment, e.g.
+        "data-" for "data-*.csv", or "" if any name may match.
+        """
+        heads = []
+        for state in states:
+            if state == len(self.segments):
+                continue
+            segment = self.segments[state]
+            if segment == RECURSIVE:
+                return ""
+            heads.append(_MAGIC.split(segment, 1)[0])
+        if not heads:
+            return ""
+        return _common_prefix(heads)
+
+    def literal_child(self, states: FrozenSet[int]) -> Optional[str]:
+        """The only child of a directory in `states` that may match, if any
+
+        This is the next segment when it has no wildcard and is not the
+        last one, so that the child can be entered without listing its
+        parent, e.g. "a" and then "b" for "a/b/*.txt".
+        """
+        if len(states) != 1:
+            return None
+        state, = states
+        if state >= len(self.segments) - 1:
+            return None
+        segment = self.segments[state]
+        if segment == RECURSIVE or _MAGIC.search(segment):
+            return None
+        return segment
+
+    def states(
+        self, parts: Sequence[str], start: Optional[FrozenSet[int]] = None
+    ) -> FrozenSet[int]:
+        """ Matching state of the path made of `parts`, below `start` """
+        states = self.start() if start is None else start
+        for part in parts:
+            states = self.advance(states, part)
+        return states
+
+    def match(self, parts: Sequence[str]) -> bool:
+        """ Whether the pattern matches the path made of `parts` """
+        return self.matches(self.states(parts))
+
+    def may_contain(self, parts: Sequence[str]) -> bool:
+        """ Whether a path below the directory made of `parts` may match """
+        return self.continues(self.states(parts))
+
+
+def name_patterns(patterns: Sequence[str]) -> List[Pattern]:
+    """Compile walk filters
+
+    Patterns without a "/" apply to file and directory names at any depth,
+    e.g. "*.txt" is equivalent to "**/*.txt".
+    """
+    return [Pattern(p if "/" in p else RECURSIVE + "/" + p) for p in patterns]
+
+
+def _common_prefix(names: Sequence[str]) -> str:
+    first, last = min(names), max(names)
+    for i, char in enumerate(first):
+        if last[i] != char:
+            return first[:i]
+    return first
+
+
+class Tree(ABC):
+    """Directory listings a `glob` is evaluated against
+
+    Directories are named by their "/" separated path relative to the root
+    of the glob followed by a "/", or "" for the root itself.
+    """
+
+    #: Whether `descendants` lists a whole subtree with fewer requests than
+    #: listing each of its directories, as with object stores
+    flat = False
+
+    @abstractmethod
+    def children(
+        self, directory: str, prefix: str, recursive: bool
+    ) -> Iterable[Entry]:
+        """List the entries of `directory` with names starting with `prefix`
+
+        `recursive` is set when listing below a `**` segment, where trees
+        that can hold cycles, e.g. through symbolic links, should not
+        report them as directories.
+        """
+
+    @abstractmethod
+    def descendants(self, directory: str) -> Iterable[Entry]:
+        """ List every entry below `directory`, named relative to it """
+
+
+def glob(pattern: Pattern, tree: Tree) -> Generator[Entry, None, None]:
+    """Yield the entries of `tree` matching `pattern`, as they are listed
+
+    Directories are only listed if a path below them may match, and only
+    for the names starting with the literal text of the next segment, see
+    `Pattern.literal_prefix`; leading literal segments are entered without
+    listing at all. Below a `**` segment, a `Tree.flat` tree is listed in
+    one go rather than directory by directory. Matching directories are
+    yielded before their contents, and the root itself is never yielded.
+    """
+    return _expand(pattern, tree, "", pattern.start())
+
+
+def _expand(
+    pattern: Pattern, tree: Tree, directory: str, states: FrozenSet[int]
+) -> Generator[Entry, None, None]:
+    while True:
+        child = pattern.literal_child(states)
+        if child is None:
+            break
+        directory += child + "/"
+        states = pattern.advance(states, child)
+
+    recursive = pattern.recursive(states)
+    if recursive and tree.flat:
+        yield from _expand_flat(pattern, tree, directory, states)
+        return
+    entries = tree.children(directory, pattern.literal_prefix(states), recursive)
+    for name, is_dir, info in entries:
+        following = pattern.advance(states, name)
+        if pattern.matches(following):
+            yield directory + name, is_dir, info
+        if is_dir and pattern.continues(following):
+            yield from _expand(pattern, tree, directory + name + "/", following)
+
+
+def _expand_flat(
+    pattern: Pattern, tree: Tree, directory: str, states: FrozenSet[int]
+) -> Generator[Entry, None, None]:
+    # entries of the same directory are listed together: remember the state
+    # of the last one seen
+    parent, parent_states = "", states
+    for name, is_dir, info in tree.descendants(directory):
+        head, _, tail = name.rpartition("/")
+        if head != parent:
+            parent = head
+            parent_states = pattern.states(head.split("/") if head else [], states)
+        if pattern.matches(pattern.advance(parent_states, tail)):
+            yield directory + name, is_dir, info
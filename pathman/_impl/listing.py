@@ -0,0 +1,501 @@
+""" Paginated listing of S3 prefixes, optionally split into concurrent shards """
+import bisect
+import heapq
+import queue
+import threading
+from concurrent import futures
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, Iterator, List, Optional, Tuple
+
+#: Keys per ListObjectsV2 page; S3 returns at most 1000
+PAGE_SIZE = 1000
+#: Keys in the first page, so that the first objects reach the caller sooner
+FIRST_PAGE_SIZE = 100
+#: Pages listed ahead of the consumer of an unordered parallel listing, per
+#: listing thread
+QUEUED_PAGES = 2
+
+# split points are computed over the characters seen in the keys listed, or
+# printable ASCII; other keys are still listed, only the shards covering them
+# are less balanced
+_PRINTABLE = "".join(chr(c) for c in range(0x20, 0x7F))
+# split keys are at most this many characters longer than the prefix
+_MAX_DIGITS = 8
+_POLL_INTERVAL = 0.1
+
+
+def list_objects(
+    s3,
+    bucket: str,
+    prefix: str,
+    parallel: Optional[int] = None,
+    start_after: Optional[str] = None,
+    max_items: Optional[int] = None,
+    page_size: Optional[int] = None,
+    ordered: bool = False,
+) -> Generator[Dict[str, Any], None, None]:
+    """Yield the ListObjectsV2 entries of every key starting with `prefix`
+
+    The first page is always listed on the calling thread. If there is more
+    and `parallel` is above one, the remaining keyspace is listed by
+    `parallel` threads, see `ShardedListing`. "Directory" marker objects,
+    with keys ending in "/", are skipped.
+
+    Parameters
+    ----------
+    s3: boto3 S3 client
+    bucket, prefix: str
+        Keys to list
+    parallel: int, optional
+        Number of concurrent ListObjectsV2 requests
+    start_after: str, optional
+        Only list keys sorting after this one
+    max_items: int, optional
+        Stop after this many entries
+    page_size: int, optional
+        Keys requested per page, at most 1000
+    ordered: bool, optional
+        With `parallel`, yield entries in key order (as a sequential listing
+        does) rather than as soon as they are listed
+
+    Returns
+    -------
+    iterator of dict: entries with "Key", "Size", "ETag" and "LastModified"
+    """
+    page_size = page_size or PAGE_SIZE
+    request: Dict[str, Any] = {"Bucket": bucket, "Prefix": prefix}
+    if start_after:
+        request["StartAfter"] = start_after
+    remaining = max_items
+    max_keys = min(page_size, FIRST_PAGE_SIZE)
+    while remaining is None or remaining > 0:
+        if remaining is not None:
+            max_keys = min(max_keys, remaining)
+        page = s3.list_objects_v2(MaxKeys=max_keys, **request)
+        contents = page.get("Contents", [])
+        objects = _without_markers(contents)
+        if remaining is not None:
+            remaining -= len(objects)
+        yield from objects
+        if not page.get("IsTruncated"):
+            return
+        if parallel is not None and parallel > 1 and contents:
+            listing = ShardedListing(
+                s3,
+                bucket,
+                prefix,
+                contents[-1]["Key"],
+                parallel,
+                page_size,
+                alphabet=_alphabet(contents, prefix),
+            )
+            entries = listing.ordered() if ordered else listing.unordered()
+            try:
+                for obj in entries:
+                    if remaining is not None:
+                        if remaining <= 0:
+                            return
+                        remaining -= 1
+                    yield obj
+            finally:
+                entries.close()
+            return
+        request["ContinuationToken"] = page["NextContinuationToken"]
+        max_keys = page_size
+
+
+def list_level(
+    s3, bucket: str, prefix: str, page_size: Optional[int] = None
+) -> Generator[Dict[str, Any], None, None]:
+    """Yield the entries of a single level of `prefix`, in key order
+
+    Keys are grouped on the next "/" after the prefix with the Delimiter of
+    ListObjectsV2, so that a whole "directory" is one entry, however many
+    keys it holds. "Directory" marker objects are skipped.
+
+    Returns
+    -------
+    iterator of dict: objects, as listed by `list_objects`, and directories
+    as {"Prefix": str}, with a trailing "/"
+    """
+    request: Dict[str, Any] = {
+        "Bucket": bucket,
+        "Prefix": prefix,
+        "Delimiter": "/",
+        "MaxKeys": page_size or PAGE_SIZE,
+    }
+    while True:
+        page = s3.list_objects_v2(**request)
+        yield from heapq.merge(
+            page.get("CommonPrefixes", []),
+            _without_markers(page.get("Contents", [])),
+            key=_entry_name,
+        )
+        if not page.get("IsTruncated"):
+            return
+        request["ContinuationToken"] = page["NextContinuationToken"]
+
+
+def list_range(
+    s3,
+    bucket: str,
+    prefix: str,
+    start_after: Optional[str] = None,
+    last: Optional[str] = None,
+    page_size: Optional[int] = None,
+) -> Generator[Tuple[List[Dict[str, Any]], Optional[str]], None, None]:
+    """Yield the pages of a single level of `prefix`, from `start_after`
+    until past `last`
+
+    Entries are as yielded by `list_level`. Each page comes with the last
+    key or "directory" it covers: everything between `start_after` and it
+    has been listed. It is None once the listing is complete.
+    """
+    request: Dict[str, Any] = {
+        "Bucket": bucket,
+        "Prefix": prefix,
+        "Delimiter": "/",
+        "MaxKeys": page_size or PAGE_SIZE,
+    }
+    if start_after:
+        request["StartAfter"] = start_after
+    while True:
+        page = s3.list_objects_v2(**request)
+        entries = list(
+            heapq.merge(
+                page.get("CommonPrefixes", []),
+                _without_markers(page.get("Contents", [])),
+                key=_entry_name,
+            )
+        )
+        if not page.get("IsTruncated"):
+            yield entries, None
+            return
+        # the last entry of either list, as listed: with markers
+        ends = page.get("CommonPrefixes", [])[-1:] + page.get("Contents", [])[-1:]
+        covered = max(_entry_name(e) for e in ends)
+        yield entries, covered
+        if last is not None and covered >= last:
+            return
+        request["ContinuationToken"] = page["NextContinuationToken"]
+
+
+def _entry_name(entry: Dict[str, Any]) -> str:
+    return entry.get("Prefix") or entry["Key"]
+
+
+def _without_markers(contents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # skip "directory" marker objects
+    return [obj for obj in contents if not obj["Key"].endswith("/")]
+
+
+class _Shard(object):
+    """ Keys in `(after, last]`, with an unbounded `last` if None """
+
+    __slots__ = ("start", "after", "last", "truncated", "alphabet", "done", "items")
+
+    def __init__(self, after: str, last: Optional[str], truncated: bool) -> None:
+        # `after` moves forward as pages are listed, `start` does not
+        self.start = after
+        self.after = after
+        self.last = last
+        # whether the last page listed was truncated, and the shard has not
+        # been split since: only then is it known to hold more keys
+        self.truncated = truncated
+        # characters of the keys of the last page listed
+        self.alphabet = _PRINTABLE
+        self.done = False
+        self.items: List[Dict[str, Any]] = []
+
+
+class ShardedListing(object):
+    """Concurrent listing of the keys of a prefix, split by key range
+
+    S3 cannot tell how keys are distributed without listing them, so the
+    keyspace is split on demand: whenever a thread runs out of work it
+    takes a shard whose last page came back truncated and cuts its
+    unlisted part into equal key ranges, one per idle thread. Keys are
+    read as numbers written with the characters seen in the last page, so
+    that e.g. numbered keys are not split on letters they never contain.
+    Each shard is listed using StartAfter and split at most once per page
+    it lists; threads with nothing to split wait for the next page. Dense
+    ranges are thus split repeatedly, while empty ones cost one request.
+
+    Parameters
+    ----------
+    s3: boto3 S3 client
+    bucket, prefix: str
+        Keys to list
+    after: str
+        Only list keys sorting after this one
+    alphabet: str, optional
+        Sorted characters of the keys of the page ending at `after`, if known
+    parallel: int
+        Number of listing threads
+    page_size: int, optional
+        Keys requested per page
+    """
+
+    def __init__(
+        self,
+        s3,
+        bucket: str,
+        prefix: str,
+        after: str,
+        parallel: int,
+        page_size: int = PAGE_SIZE,
+        alphabet: Optional[str] = None,
+    ) -> None:
+        self._s3 = s3
+        self._bucket = bucket
+        self._prefix = prefix
+        self._parallel = parallel
+        self._page_size = page_size
+        # split points are computed below this key; keys sorting after it
+        # are listed by the last shard
+        self._bound = prefix + _PRINTABLE[-1]
+        # the page ending at `after` was truncated
+        self._first = _Shard(after, None, True)
+        self._first.alphabet = alphabet or _PRINTABLE
+        # shards in key order, waiting for a thread, and being listed
+        self._shards = [self._first]
+        self._pending = [self._first]
+        self._active: List[_Shard] = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        # threads waiting for a shard to split
+        self._idle = 0
+        self._output: Optional["queue.Queue"] = None
+        #: ListObjectsV2 requests made so far
+        self.requests = 0
+
+    def unordered(self) -> Generator[Dict[str, Any], None, None]:
+        """ Yield entries as soon as any shard lists them """
+        self._output = queue.Queue(maxsize=QUEUED_PAGES * self._parallel)
+        with self._running() as workers:
+            while True:
+                try:
+                    batch = self._output.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    if all(w.done() for w in workers) and self._output.empty():
+                        break
+                    continue
+                yield from batch
+        with self._cond:
+            self._check()
+
+    def ordered(self) -> Generator[Dict[str, Any], None, None]:
+        """Yield entries in key order
+
+        Shards after the first are buffered until the ones before them are
+        exhausted, so memory grows with how far they run ahead.
+        """
+        with self._running():
+            index = 0
+            while True:
+                with self._cond:
+                    while not self._errors:
+                        shard = self._shards[index]
+                        if shard.items or shard.done:
+                            break
+                        self._cond.wait()
+                    self._check()
+                    batch, shard.items = shard.items, []
+                    if not batch and shard.done:
+                        if index + 1 == len(self._shards):
+                            return
+                        index += 1
+                        continue
+                yield from batch
+
+    @contextmanager
+    def _running(self) -> Iterator[List[futures.Future]]:
+        """ Run the listing threads, stopping them however the consumer exits """
+        executor = futures.ThreadPoolExecutor(
+            max_workers=self._parallel, thread_name_prefix="pathman-list"
+        )
+        try:
+            yield [executor.submit(self._work) for _ in range(self._parallel)]
+        finally:
+            self._stop.set()
+            with self._cond:
+                self._cond.notify_all()
+            executor.shutdown(wait=True)
+
+    def _check(self) -> None:
+        if self._errors:
+            raise self._errors[0]
+
+    def _work(self) -> None:
+        try:
+            while not self._stop.is_set():
+                shard = self._take()
+                if shard is None:
+                    return
+                self._list(shard)
+        except BaseException as e:
+            with self._cond:
+                self._errors.append(e)
+                self._cond.notify_all()
+            self._stop.set()
+
+    def _take(self) -> Optional[_Shard]:
+        """Return a pending shard, or split one being listed
+
+        Returns None once every shard is listed.
+        """
+        with self._cond:
+            while not self._stop.is_set():
+                shard = self._pending.pop(0) if self._pending else self._split()
+                if shard is not None:
+                    self._active.append(shard)
+                    return shard
+                if not self._active:
+                    return None
+                self._idle += 1
+                self._cond.wait()
+                self._idle -= 1
+            return None
+
+    def _split(self) -> Optional[_Shard]:
+        max_length = len(self._prefix) + _MAX_DIGITS
+        for shard in self._active:
+            if not shard.truncated:
+                continue
+            points = split_points(
+                shard.after,
+                shard.last or self._bound,
+                self._idle + 1,
+                max_length,
+                shard.alphabet,
+            )
+            if not points:
+                continue
+            shards = [
+                _Shard(after, end, False)
+                for after, end in zip(points, points[1:] + [shard.last])
+            ]
+            shard.last = points[0]
+            shard.truncated = False
+            for new in shards:
+                self._shards.insert(
+                    bisect.bisect_right([s.start for s in self._shards], new.start),
+                    new,
+                )
+            self._pending.extend(shards[1:])
+            self._cond.notify_all()
+            return shards[0]
+        return None
+
+    def _list(self, shard: _Shard) -> None:
+        while not self._stop.is_set():
+            page = self._s3.list_objects_v2(
+                Bucket=self._bucket,
+                Prefix=self._prefix,
+                StartAfter=shard.after,
+                MaxKeys=self._page_size,
+            )
+            contents = page.get("Contents", [])
+            with self._cond:
+                self.requests += 1
+                # the shard may have been split while the page was listed
+                if shard.last is not None:
+                    keep = [o for o in contents if o["Key"] <= shard.last]
+                    finished = len(keep) < len(contents)
+                    contents = keep
+                else:
+                    finished = False
+                if contents:
+                    shard.alphabet = _alphabet(contents, self._prefix)
+                    shard.after = contents[-1]["Key"]
+                shard.done = finished or not page.get("IsTruncated")
+                shard.truncated = not shard.done
+                if shard.done:
+                    self._active.remove(shard)
+                contents = _without_markers(contents)
+                if self._output is None:
+                    shard.items.extend(contents)
+                # wake up the consumer, and threads waiting for a shard to split
+                self._cond.notify_all()
+            if self._output is not None and contents:
+                self._put(contents)
+            if shard.done:
+                return
+
+    def _put(self, batch: List[Dict[str, Any]]) -> None:
+        assert self._output is not None
+        while not self._stop.is_set():
+            try:
+                self._output.put(batch, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+
+def _alphabet(contents: List[Dict[str, Any]], prefix: str) -> str:
+    chars = set()
+    for obj in contents:
+        chars.update(obj["Key"][len(prefix) :])
+    # a single character cannot count past a prefix
+    return "".join(sorted(chars)) if len(chars) > 1 else _PRINTABLE
+
+
+def midpoint(low: str, high: str, max_length: Optional[int] = None) -> Optional[str]:
+    """ Return a string sorting between `low` and `high`, see `split_points` """
+    points = split_points(low, high, 1, max_length)
+    return points[0] if points else None
+
+
+def split_points(
+    low: str,
+    high: str,
+    count: int,
+    max_length: Optional[int] = None,
+    alphabet: str = _PRINTABLE,
+) -> List[str]:
+    """Cut the strings between `low` and `high` into `count + 1` equal ranges
+
+    Strings are read as fractions written in base `len(alphabet)`, with
+    characters outside of `alphabet` rounded to a neighbour. Returns the
+    sorted cut points that sort strictly between `low` and `high`, of at
+    most `max_length` characters (by default `_MAX_DIGITS` past the common
+    prefix of `low` and `high`), which may be fewer than `count`.
+    """
+    if low >= high:
+        return []
+    common = 0
+    while common < min(len(low), len(high)) and low[common] == high[common]:
+        common += 1
+    width = (max_length if max_length is not None else common + _MAX_DIGITS) - common
+    if width <= 0:
+        return []
+    # only the characters past the common prefix are counted
+    start = _to_number(low[common:], width, alphabet)
+    span = _to_number(high[common:], width, alphabet) - start
+    points: List[str] = []
+    for i in range(1, count + 1):
+        number = start + span * i // (count + 1)
+        point = low[:common] + _to_string(number, width, alphabet)
+        point = point.rstrip(alphabet[0])
+        if (points[-1] if points else low) < point < high:
+            points.append(point)
+    return points
+
+
+def _to_number(key: str, width: int, alphabet: str) -> int:
+    number = 0
+    for i in range(width):
+        digit = 0
+        if i < len(key):
+            digit = min(bisect.bisect_left(alphabet, key[i]), len(alphabet) - 1)
+        number = number * len(alphabet) + digit
+    return number
+
+
+def _to_string(number: int, width: int, alphabet: str) -> str:
+    chars = []
+    for _ in range(width):
+        number, digit = divmod(number, len(alphabet))
+        chars.append(alphabet[digit])
+    return "".join(reversed(chars))
@@ -1,17 +1,63 @@
+import mmap
 import os
 import shutil
+import stat
+from collections import deque
+from concurrent import futures
+from datetime import datetime, timezone
 from pathlib import Path as PathLibPath
-from typing import List, Generator
+from typing import Callable, Deque, FrozenSet, List, Generator, Optional, Tuple
 
+from pathman import ranges
 from pathman.base import AbstractPath
+from pathman._impl import globbing
+from pathman._impl.stat_cache import StatInfo
 
 
 class LocalPath(AbstractPath):
-    """ Wrapper around `pathlib.Path` """
+    """Wrapper around `pathlib.Path`
+
+    The `pathlib.Path` is only built the first time it is needed, so paths
+    that are merely held in memory cost little more than their string.
+    """
+
+    __slots__ = ("_pathstr", "_pathlib", "_hash", "_entry")
 
     def __init__(self, path: str, **kwargs) -> None:
-        self._path = PathLibPath(path)
         self._pathstr = path
+        self._pathlib: Optional[PathLibPath] = None
+        self._hash: Optional[int] = None
+        # `os.DirEntry` the path was found as by `walk`
+        self._entry: Optional[os.DirEntry] = None
+
+    @classmethod
+    def _from_pathlib(cls, path: PathLibPath) -> "LocalPath":
+        """ Wrap an existing `pathlib.Path` without re-parsing it """
+        local = cls.__new__(cls)
+        local._pathstr = str(path)
+        local._pathlib = path
+        local._hash = None
+        local._entry = None
+        return local
+
+    @classmethod
+    def _from_entry(cls, entry: os.DirEntry) -> "LocalPath":
+        """ Wrap a directory entry, reusing its cached type and stat """
+        local = cls.__new__(cls)
+        local._pathstr = entry.path
+        local._pathlib = None
+        local._hash = None
+        local._entry = entry
+        return local
+
+    @property
+    def _path(self) -> PathLibPath:
+        if self._pathlib is None:
+            self._pathlib = PathLibPath(self._pathstr)
+        return self._pathlib
+
+    def _derive(self, path: str) -> "LocalPath":
+        return LocalPath(path)
 
     def __str__(self) -> str:
         return self._pathstr
@@ -20,7 +66,18 @@ class LocalPath(AbstractPath):
         return self.__str__()
 
     def __eq__(self, other) -> bool:
-        return self._pathstr == other._pathstr
+        if not isinstance(other, AbstractPath):
+            return NotImplemented
+        return self._compare_key() == other._compare_key()
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(self._compare_key())
+        return self._hash
+
+    def _compare_key(self) -> Tuple[str, str]:
+        # trailing slashes do not change the file a local path refers to
+        return ("local", self._pathstr.rstrip("/") or self._pathstr[:1])
 
     def __truediv__(self, key) -> "LocalPath":
         return self.join(key)
@@ -33,62 +90,172 @@ class LocalPath(AbstractPath):
         return self._path.exists()
 
     def touch(self) -> None:
+        self._entry = None
         return self._path.touch()
 
     def is_dir(self) -> bool:
+        if self._entry is not None:
+            return self._entry.is_dir()
         return self._path.is_dir()
 
     def is_file(self) -> bool:
+        if self._entry is not None:
+            return self._entry.is_file()
         return self._path.is_file()
 
     def mkdir(self, **kwargs) -> None:
+        self._entry = None
         return self._path.mkdir(**kwargs)
 
     def rmdir(self, recursive=False) -> None:
+        self._entry = None
         if recursive:
             return shutil.rmtree(self._pathstr)
         return self._path.rmdir()
 
     def join(self, *pathsegments: str) -> "LocalPath":
-        return LocalPath(str(self._path.joinpath(*pathsegments)))
+        return self._from_pathlib(self._path.joinpath(*pathsegments))
 
     def open(self, mode="r", **kwargs):
+        if mode.strip("rbt"):
+            # may create or change the file: its entry would be stale
+            self._entry = None
         return self._path.open(mode=mode, **kwargs)
 
     def write_bytes(self, contents, **kwargs):
+        self._entry = None
         return self._path.write_bytes(contents, **kwargs)
 
     def write_text(self, contents, **kwargs):
+        self._entry = None
         return self._path.write_text(contents, **kwargs)
 
+    def write_stream(self, chunks, **kwargs) -> int:
+        written = 0
+        with self.open("wb", **kwargs) as f:
+            for chunk in chunks:
+                written += f.write(chunk)
+        return written
+
     def remove(self) -> None:
+        self._entry = None
         self._path.unlink()
 
     def read_text(self, **kwargs):
         return self._path.read_text(**kwargs)
 
-    def read_bytes(self, **kwargs):
-        return self._path.read_bytes(**kwargs)
+    def read_bytes(self, start=None, end=None, **kwargs):
+        if start is None and end is None:
+            return self._path.read_bytes(**kwargs)
+        with open(self._pathstr, "rb") as f:
+            first, last = ranges.resolve(start, end, os.fstat(f.fileno()).st_size)
+            return _pread(f, first, last)
+
+    def open_mmap(self, tempdir: Optional[str] = None) -> mmap.mmap:
+        # `tempdir` only applies to remote files, which are downloaded first
+        with open(self._pathstr, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_buffer(self) -> memoryview:
+        if os.path.getsize(self._pathstr) == 0:
+            # empty files cannot be mapped
+            return memoryview(b"")
+        return memoryview(self.open_mmap())
+
+    def read_ranges(self, offsets, parallelism=None, **kwargs) -> List[bytes]:
+        with open(self._pathstr, "rb") as f:
+            resolved = ranges.resolve_all(
+                offsets, lambda: os.fstat(f.fileno()).st_size
+            )
+            return ranges.read_ranges(
+                lambda first, last: _pread(f, first, last),
+                resolved,
+                parallelism if hasattr(os, "pread") else 1,
+                **kwargs
+            )
 
     def expanduser(self) -> "LocalPath":
-        return LocalPath(str(self._path.expanduser()))
+        return self._from_pathlib(self._path.expanduser())
 
     def abspath(self) -> "LocalPath":
-        return LocalPath(str(self._path.resolve()))
+        return self._from_pathlib(self._path.resolve())
+
+    def invalidate_cache(self, recursive=False) -> None:
+        # only paths yielded by `walk` hold metadata
+        self._entry = None
 
-    def walk(self, **kwargs) -> Generator["LocalPath", None, None]:
-        for root, directories, files in os.walk(self._pathstr, **kwargs):
-            for f in files:
-                yield LocalPath(os.path.join(root, f))
+    def stat(self) -> StatInfo:
+        if self._entry is not None:
+            # fetched at most once per entry, and free on Windows
+            st = self._entry.stat()
+        else:
+            st = os.stat(self._pathstr)
+        return StatInfo(
+            type="directory" if stat.S_ISDIR(st.st_mode) else "file",
+            size=st.st_size,
+            last_modified=datetime.fromtimestamp(st.st_mtime, timezone.utc),
+        )
+
+    def walk(
+        self,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+        parallel: Optional[int] = None,
+        followlinks: bool = False,
+        onerror: Optional[Callable[[OSError], None]] = None,
+        **kwargs
+    ) -> Generator["LocalPath", None, None]:
+        """Yield every file below this directory
+
+        Directories are read with `os.scandir`, and each path keeps its
+        `os.DirEntry`, so that `is_file`, `is_dir` and `stat` do not touch
+        the disk again, until the path is changed through one of its
+        methods or `invalidate_cache`. Like `os.walk`, symbolic links to directories are
+        not followed unless `followlinks` is set, and unreadable directories
+        are skipped (after calling `onerror` with the error, if given).
+
+        Parameters
+        ----------
+        include: list of str, optional
+            Only yield files matching one of these glob patterns, see
+            `globbing.name_patterns`. Directories that cannot hold a match
+            are not read
+        exclude: list of str, optional
+            Skip files and whole directories matching one of these patterns
+        max_depth: int, optional
+            Only descend this many levels, at least 1: 1 yields the files
+            directly in this directory
+        parallel: int, optional
+            Read this many directories concurrently, e.g. on network file
+            systems. Files are then yielded out of directory order
+        """
+        if kwargs:
+            raise TypeError("unexpected arguments: {}".format(", ".join(kwargs)))
+        if max_depth is not None and max_depth < 1:
+            raise ValueError("max_depth must be at least 1")
+        walker = _Walker(include, exclude, max_depth, followlinks, onerror)
+        root = walker.root(self._pathstr)
+        if parallel is not None and parallel > 1:
+            return walker.parallel(root, parallel)
+        return walker.sequential(root)
 
     def ls(self) -> List["LocalPath"]:
-        return [LocalPath(str(p)) for p in self._path.iterdir()]
+        return [self._from_pathlib(p) for p in self._path.iterdir()]
+
+    def glob(self, pattern) -> Generator["LocalPath", None, None]:
+        """Yield the files and directories below this one matching `pattern`
 
-    def glob(self, path) -> List["LocalPath"]:
-        return [LocalPath(str(p)) for p in self._path.glob(path)]
+        Patterns are matched as for `S3Path.glob`, see `globbing.glob`:
+        only directories that may hold a match are read, and symbolic links
+        to directories are not followed below a `**` segment.
+        """
+        tree = _LocalTree(self._pathstr)
+        for _, _, entry in globbing.glob(globbing.Pattern(pattern), tree):
+            yield self._from_entry(entry)
 
     def with_suffix(self, suffix) -> "LocalPath":
-        return LocalPath(str(self._path.with_suffix(suffix)))
+        return self._from_pathlib(self._path.with_suffix(suffix))
 
     @property
     def stem(self) -> str:
@@ -97,3 +264,165 @@ class LocalPath(AbstractPath):
     @property
     def parts(self) -> List[str]:
         return list(self._path.parts)
+
+
+# a directory to read: its path, depth, and the matching state of every
+# include and exclude pattern
+_Directory = Tuple[str, int, List[FrozenSet[int]], List[FrozenSet[int]]]
+
+
+class _Walker(object):
+    """ Reads directories for `LocalPath.walk`, applying its filters """
+
+    def __init__(
+        self,
+        include: Optional[List[str]],
+        exclude: Optional[List[str]],
+        max_depth: Optional[int],
+        followlinks: bool,
+        onerror: Optional[Callable[[OSError], None]],
+    ) -> None:
+        self.include = globbing.name_patterns(include or [])
+        self.exclude = globbing.name_patterns(exclude or [])
+        self.max_depth = max_depth
+        self.followlinks = followlinks
+        self.onerror = onerror
+
+    def root(self, path: str) -> _Directory:
+        return (
+            path,
+            0,
+            [p.start() for p in self.include],
+            [p.start() for p in self.exclude],
+        )
+
+    def sequential(self, root: _Directory) -> Generator[LocalPath, None, None]:
+        stack = [root]
+        while stack:
+            files, directories = self.read(stack.pop())
+            yield from files
+            # depth first, in the order the directories were read
+            stack.extend(reversed(directories))
+
+    def parallel(
+        self, root: _Directory, parallel: int
+    ) -> Generator[LocalPath, None, None]:
+        pending: Deque[_Directory] = deque([root])
+        running: set = set()
+        executor = futures.ThreadPoolExecutor(
+            max_workers=parallel, thread_name_prefix="pathman-walk"
+        )
+        try:
+            while pending or running:
+                # keep the threads busy without queueing every directory
+                while pending and len(running) < 2 * parallel:
+                    running.add(executor.submit(self.read, pending.popleft()))
+                done, running = futures.wait(
+                    running, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    files, directories = future.result()
+                    pending.extend(directories)
+                    yield from files
+        finally:
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def read(self, directory: _Directory) -> Tuple[List[LocalPath], List[_Directory]]:
+        """ List one directory: the files to yield and the directories to read """
+        path, depth, include, exclude = directory
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            if self.onerror is not None:
+                self.onerror(e)
+            return [], []
+
+        files = []
+        directories = []
+        descend = self.max_depth is None or depth + 1 < self.max_depth
+        for entry in entries:
+            if self.exclude:
+                excluded = [
+                    p.advance(s, entry.name) for p, s in zip(self.exclude, exclude)
+                ]
+                if any(p.matches(s) for p, s in zip(self.exclude, excluded)):
+                    continue
+            else:
+                excluded = exclude
+            if self.include:
+                included = [
+                    p.advance(s, entry.name) for p, s in zip(self.include, include)
+                ]
+            else:
+                included = include
+
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not descend or (not self.followlinks and entry.is_symlink()):
+                    continue
+                if self.include and not any(
+                    p.continues(s) for p, s in zip(self.include, included)
+                ):
+                    continue
+                directories.append((entry.path, depth + 1, included, excluded))
+            elif not self.include or any(
+                p.matches(s) for p, s in zip(self.include, included)
+            ):
+                files.append(LocalPath._from_entry(entry))
+        return files, directories
+
+
+class _LocalTree(globbing.Tree):
+    """ The directory `root`, as a `globbing.Tree` of `os.DirEntry` """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def children(
+        self, directory: str, prefix: str, recursive: bool
+    ) -> Generator[globbing.Entry, None, None]:
+        try:
+            with os.scandir(os.path.join(self.root, directory)) as it:
+                entries = [e for e in it if e.name.startswith(prefix)]
+        except OSError:
+            # missing or unreadable, as with `pathlib.Path.glob`
+            return
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir() and not (recursive and entry.is_symlink())
+            except OSError:
+                is_dir = False
+            yield entry.name, is_dir, entry
+
+    def descendants(self, directory: str) -> Generator[globbing.Entry, None, None]:
+        # listed level by level, as `glob` does for trees that are not flat
+        pending = [""]
+        while pending:
+            relative = pending.pop()
+            for name, is_dir, entry in self.children(directory + relative, "", True):
+                yield relative + name, is_dir, entry
+                if is_dir:
+                    pending.append(relative + name + "/")
+
+
+def _pread(f, start: int, end: int) -> bytes:
+    """ Read `[start, end)` of an open file without moving its position """
+    if not hasattr(os, "pread"):
+        # Windows: no positional reads, callers must not share `f`
+        f.seek(start)
+        return f.read(end - start)
+    chunks = []
+    fd = f.fileno()
+    while start < end:
+        chunk = os.pread(fd, end - start, start)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        start += len(chunk)
+    return b"".join(chunks)
@@ -0,0 +1,346 @@
+""" Streaming multipart uploads, with parts uploaded in the background """
+import io
+import os
+from concurrent import futures
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+#: Bytes per part: boto3's default multipart chunk size, which is also the
+#: part size `sync.CHECKSUM` assumes first for multipart ETags
+DEFAULT_PART_SIZE = 8 * 2 ** 20
+#: Parts uploaded concurrently, each holding a buffer of `part_size` bytes
+DEFAULT_MAX_CONCURRENCY = 4
+#: S3 limits on multipart uploads
+MIN_PART_SIZE = 5 * 2 ** 20
+MAX_PARTS = 10000
+
+# arguments of CreateMultipartUpload that UploadPart needs as well
+_PART_ARGS = ("SSECustomerAlgorithm", "SSECustomerKey", "SSECustomerKeyMD5")
+
+
+class MultipartWriter(io.BufferedIOBase):
+    """Binary file object writing an S3 object as a multipart upload
+
+    Written bytes are buffered until they fill a part of `part_size` bytes,
+    which is then uploaded on a background thread while writing continues.
+    At most `max_concurrency` parts are in flight: further writes wait for
+    one of them to finish, so memory stays around
+    `(max_concurrency + 1) * part_size` however large the object is.
+
+    The upload is only created once a first part is full, so that objects
+    smaller than a part are written with a single PutObject. `close`
+    completes the upload; leaving a `with` block on an exception, or
+    `abort`, cancels it instead and no object is written. A part that fails
+    to upload aborts the upload, and its error is raised by the next
+    `write` or by `close`.
+
+    Parameters
+    ----------
+    s3: boto3 S3 client
+    bucket, key: str
+        Object to write
+    part_size: int, optional
+        Bytes per part, at least 5 MiB. Objects are limited to 10000 parts
+    max_concurrency: int, optional
+        Number of parts uploaded at the same time
+    extra_args: dict, optional
+        Passed on to PutObject or CreateMultipartUpload, e.g.
+        `ServerSideEncryption`; the SSE-C arguments are passed on to
+        UploadPart as well
+    """
+
+    def __init__(
+        self,
+        s3,
+        bucket: str,
+        key: str,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        extra_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__()
+        part_size = part_size or DEFAULT_PART_SIZE
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(
+                "part_size must be at least {} bytes".format(MIN_PART_SIZE)
+            )
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.max_concurrency = max(1, max_concurrency or DEFAULT_MAX_CONCURRENCY)
+        self.extra_args = dict(extra_args or {})
+        self._part_args = {
+            k: v for k, v in self.extra_args.items() if k in _PART_ARGS
+        }
+        self.upload_id: Optional[str] = None
+        self._buffer = bytearray()
+        self._written = 0
+        self._parts: List[Dict[str, Any]] = []
+        self._running: Set[futures.Future] = set()
+        self._executor: Optional[futures.ThreadPoolExecutor] = None
+
+    @property
+    def name(self) -> str:
+        return "s3://{}/{}".format(self.bucket, self.key)
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._written
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed file")
+        view = memoryview(data).cast("B")
+        self._written += len(view)
+        offset = 0
+        if self._buffer:
+            offset = min(len(view), self.part_size - len(self._buffer))
+            self._buffer += view[:offset]
+            if len(self._buffer) < self.part_size:
+                return len(view)
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        # whole parts are cut from `data` directly, without buffering
+        while len(view) - offset >= self.part_size:
+            self._submit(bytes(view[offset : offset + self.part_size]))
+            offset += self.part_size
+        self._buffer += view[offset:]
+        return len(view)
+
+    def write_stream(self, chunks: Iterable[bytes]) -> int:
+        """ Write every chunk of an iterable, returning the bytes written """
+        written = 0
+        for chunk in chunks:
+            written += self.write(chunk)
+        return written
+
+    def _submit(self, body: bytes) -> None:
+        # called with a full part: wait for room, then upload it
+        self._wait(self.max_concurrency - 1)
+        if self.upload_id is None:
+            upload = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, **self.extra_args
+            )
+            self.upload_id = upload["UploadId"]
+            self._executor = futures.ThreadPoolExecutor(self.max_concurrency)
+        number = len(self._parts) + 1
+        if number > MAX_PARTS:
+            self.abort()
+            raise ValueError(
+                "{} exceeds {} parts of {} bytes, raise part_size".format(
+                    self.key, MAX_PARTS, self.part_size
+                )
+            )
+        part = {"PartNumber": number}
+        self._parts.append(part)
+        assert self._executor is not None
+        self._running.add(self._executor.submit(self._upload, part, body))
+
+    def _upload(self, part: Dict[str, Any], body: bytes) -> None:
+        response = self.s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part["PartNumber"],
+            Body=body,
+            **self._part_args
+        )
+        part["ETag"] = response["ETag"]
+
+    def _wait(self, max_running: int) -> None:
+        """ Wait until at most `max_running` parts are in flight """
+        while len(self._running) > max_running:
+            done, self._running = futures.wait(
+                self._running, return_when=futures.FIRST_COMPLETED
+            )
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    self.abort()
+                    raise error
+
+    def close(self) -> None:
+        """ Upload the remaining bytes and complete the upload """
+        if self.closed:
+            return
+        try:
+            if self.upload_id is None:
+                self.s3.put_object(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    Body=bytes(self._buffer),
+                    **self.extra_args
+                )
+            else:
+                if self._buffer:
+                    self._submit(bytes(self._buffer))
+                self._wait(0)
+                self.s3.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self.upload_id,
+                    MultipartUpload={"Parts": self._parts},
+                )
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._shutdown()
+            super().close()
+
+    def abort(self) -> None:
+        """ Cancel the upload: parts uploaded so far are discarded """
+        if self.closed:
+            return
+        for future in self._running:
+            future.cancel()
+        futures.wait(self._running)
+        self._running = set()
+        self._buffer = bytearray()
+        if self.upload_id is not None:
+            upload_id, self.upload_id = self.upload_id, None
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=upload_id
+            )
+        self._shutdown()
+        super().close()
+
+    def _shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class TextWriter(io.TextIOWrapper):
+    """ Text file over a `MultipartWriter`, aborting it on errors as well """
+
+    def __init__(self, writer: MultipartWriter, **kwargs) -> None:
+        super().__init__(writer, **kwargs)
+        self._writer = writer
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self._writer.abort()
+        else:
+            self.close()
+
+
+def upload_file(
+    s3,
+    filename: str,
+    bucket: str,
+    key: str,
+    part_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    upload_id: Optional[str] = None,
+    on_create: Optional[Callable[[str], None]] = None,
+    extra_args: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Upload a local file as a multipart upload that can be resumed
+
+    Unlike `MultipartWriter`, a failed upload is not aborted: pass its
+    `upload_id` to a later call to upload only the parts that ListParts does
+    not report as uploaded with the expected size, and complete it.
+
+    Parameters
+    ----------
+    s3: boto3 S3 client
+    filename: str
+        File to upload
+    bucket, key: str
+        Object to write
+    part_size: int, optional
+        Bytes per part, raised as needed to stay within 10000 parts
+    max_concurrency: int, optional
+        Number of parts uploaded at the same time
+    upload_id: str, optional
+        Upload started by an earlier call for the same file, to resume. A
+        new upload is started if it no longer exists
+    on_create: callable, optional
+        Called with the ID of a new upload, before any part is uploaded
+    extra_args: dict, optional
+        Passed on to CreateMultipartUpload, e.g. `ServerSideEncryption`
+
+    Returns
+    -------
+    int: bytes uploaded, excluding the parts of a resumed upload
+    """
+    size = os.path.getsize(filename)
+    part_size = max(part_size or DEFAULT_PART_SIZE, MIN_PART_SIZE, -(-size // MAX_PARTS))
+    extra_args = extra_args or {}
+    part_args = {k: v for k, v in extra_args.items() if k in _PART_ARGS}
+    ranges = [
+        (number, start, min(start + part_size, size))
+        for number, start in enumerate(range(0, max(size, 1), part_size), 1)
+    ]
+
+    etags: Dict[int, str] = {}
+    if upload_id is not None:
+        try:
+            etags = _uploaded_parts(s3, bucket, key, upload_id, ranges, part_args)
+        except s3.exceptions.NoSuchUpload:
+            upload_id = None
+    if upload_id is None:
+        upload = s3.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)
+        upload_id = upload["UploadId"]
+        if on_create is not None:
+            on_create(upload_id)
+
+    def _upload(number: int, start: int, end: int) -> int:
+        with open(filename, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start)
+        response = s3.upload_part(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=body,
+            **part_args
+        )
+        etags[number] = response["ETag"]
+        return len(body)
+
+    missing = [part for part in ranges if part[0] not in etags]
+    uploaded = 0
+    if missing:
+        workers = min(max_concurrency or DEFAULT_MAX_CONCURRENCY, len(missing))
+        with futures.ThreadPoolExecutor(workers) as executor:
+            running = [executor.submit(_upload, *part) for part in missing]
+            try:
+                for future in futures.as_completed(running):
+                    uploaded += future.result()
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+    s3.complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            "Parts": [{"PartNumber": n, "ETag": etags[n]} for n, _, _ in ranges]
+        },
+    )
+    return uploaded
+
+
+def _uploaded_parts(s3, bucket, key, upload_id, ranges, part_args) -> Dict[int, str]:
+    """ ETags of the parts of an upload that are complete, by part number """
+    expected = {number: end - start for number, start, end in ranges}
+    etags = {}
+    for page in s3.get_paginator("list_parts").paginate(
+        Bucket=bucket, Key=key, UploadId=upload_id, **part_args
+    ):
+        for part in page.get("Parts", []):
+            if expected.get(part["PartNumber"]) == part["Size"]:
+                etags[part["PartNumber"]] = part["ETag"]
+    return etags
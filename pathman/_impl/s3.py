@@ -1,14 +1,45 @@
+import io
 import os
 import importlib
-from typing import List, Generator
+import mmap
+import tempfile
+import threading
+from typing import Any, Dict, List, Generator, Optional, Tuple
 from pathlib import PurePath
 
+from pathman import ranges
 from pathman.base import AbstractPath, RemotePath
-from pathman.utils import is_file
+from pathman.utils import is_file, shared_kwargs
+from pathman._impl import clients, disk_cache, globbing, listing, multipart
+from pathman._impl.stat_cache import MISSING, StatInfo
+
+# keyword arguments of `open` that also apply to reading a cached copy
+_TEXT_KWARGS = ("encoding", "errors", "newline")
+# s3fs forgets listings with a check-then-delete on its shared cache, which
+# raises KeyError when two threads forget the same listing
+_dircache_lock = threading.Lock()
 
 
 class S3Path(AbstractPath, RemotePath):
-    """ Wrapper around `s3fs.S3FileSystem`  """
+    """Wrapper around `s3fs.S3FileSystem`
+
+    The bucket, key and segments of the path are parsed on first use and
+    cached; the filesystem and kwargs are shared with every derived path.
+    """
+
+    __slots__ = (
+        "_original_kwargs",
+        "_pathstr",
+        "_anon",
+        "_path",
+        "_bucket",
+        "_key",
+        "_parts",
+        "_hash",
+        "_stat_cache",
+        "_disk_cache",
+        "_info",
+    )
 
     def __init__(self, path: str, **kwargs) -> None:
         try:
@@ -16,14 +47,44 @@ class S3Path(AbstractPath, RemotePath):
         except ImportError:
             raise ImportError("s3fs is required for S3Path")
 
-        from s3fs import S3FileSystem  # type: ignore
-
-        self._original_kwargs = dict({}, **kwargs)
+        cache_dir = kwargs.pop("cache_dir", None)
+        cache_size = kwargs.pop("cache_size", None)
+        self._disk_cache = (
+            None if cache_dir is False else disk_cache.get(cache_dir, cache_size)
+        )
+        self._original_kwargs = shared_kwargs(kwargs)
         self._pathstr = path
         if "anon" not in kwargs:
             kwargs["anon"] = False
         self._anon = kwargs["anon"]
-        self._path = S3FileSystem(**kwargs)
+        self._path = clients.get_filesystem(**kwargs)
+        self._stat_cache = clients.get_stat_cache(**kwargs)
+        self._bucket: Optional[str] = None
+        self._key: Optional[str] = None
+        self._parts: Optional[Tuple[str, ...]] = None
+        self._hash: Optional[int] = None
+        self._info: Optional[StatInfo] = None
+
+    def _derive(self, path: str) -> "S3Path":
+        """ Build a new path sharing this path's filesystem and kwargs """
+        derived = S3Path.__new__(S3Path)
+        derived._original_kwargs = self._original_kwargs
+        derived._pathstr = path
+        derived._anon = self._anon
+        derived._path = self._path
+        derived._stat_cache = self._stat_cache
+        derived._disk_cache = self._disk_cache
+        derived._bucket = None
+        derived._key = None
+        derived._parts = None
+        derived._hash = None
+        derived._info = None
+        return derived
+
+    def _parse(self) -> None:
+        tokens = self._pathstr.replace("s3://", "").split("/")
+        self._bucket = tokens[0]
+        self._key = "/".join(tokens[1:])
 
     def __str__(self) -> str:
         return self._pathstr
@@ -32,7 +93,21 @@ class S3Path(AbstractPath, RemotePath):
         return self.__str__()
 
     def __eq__(self, other) -> bool:
-        return self._pathstr == other._pathstr
+        if not isinstance(other, AbstractPath):
+            return NotImplemented
+        return self._compare_key() == other._compare_key()
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(self._compare_key())
+        return self._hash
+
+    def _compare_key(self) -> Tuple[str, str]:
+        # "s3://bucket/key/" and the bare "bucket/key" form name the same object
+        path = self._pathstr
+        if path.startswith("s3://"):
+            path = path[len("s3://") :]
+        return ("s3", path.rstrip("/"))
 
     def __truediv__(self, key) -> "S3Path":
         return self.join(key)
@@ -42,18 +117,74 @@ class S3Path(AbstractPath, RemotePath):
         return os.path.splitext(self._pathstr)[1]
 
     @property
-    def bucket(self):
-        return str(self._pathstr).replace("s3://", "").split("/")[0]
+    def bucket(self) -> str:
+        if self._bucket is None:
+            self._parse()
+        return self._bucket  # type: ignore
 
     @property
-    def key(self):
-        tokens = str(self._pathstr).replace("s3://", "").split("/")
-        return "/".join(tokens[1:])
+    def key(self) -> str:
+        if self._key is None:
+            self._parse()
+        return self._key  # type: ignore
+
+    def _stat(self) -> StatInfo:
+        """Return the metadata of this path, or `MISSING`
+
+        Answers from the shared metadata cache when possible.
+        """
+        cache_key = self._compare_key()[1]
+        info = self._stat_cache.get(cache_key)
+        if info is None:
+            info = self._fetch_stat()
+            self._stat_cache.put(cache_key, info)
+        return info
+
+    def _fetch_stat(self) -> StatInfo:
+        # the s3fs listing cache would answer for paths missing from a
+        # listing made earlier, unlike `_stat_cache` which can expire
+        self._forget_listing()
+        if not self.key.strip("/"):
+            # buckets cannot be HEADed through s3fs.info when anonymous
+            if self._path.exists(self._pathstr):
+                return StatInfo("directory")
+            return MISSING
+        try:
+            return StatInfo.from_info(self._path.info(self._pathstr))
+        except FileNotFoundError:
+            return MISSING
+
+    def _remember(self, info: Dict[str, Any]) -> StatInfo:
+        """ Cache an `s3fs` listing entry for the path it describes """
+        stat = StatInfo.from_info(info)
+        self._stat_cache.put(info["name"].rstrip("/"), stat)
+        return stat
+
+    def invalidate_cache(self, recursive=False) -> None:
+        """Forget cached metadata about this path
+
+        Parameters
+        ----------
+        recursive : bool, optional
+            If True, also forget everything cached below this path
+        """
+        self._stat_cache.invalidate(self._compare_key()[1], recursive=recursive)
+        self._forget_listing()
+
+    def _forget_listing(self) -> None:
+        """ Drop this path and its parents from the s3fs listing cache """
+        with _dircache_lock:
+            self._path.invalidate_cache(self._pathstr)
 
     def exists(self) -> bool:
-        return self._path.exists(self._pathstr)
+        try:
+            return self._stat() is not MISSING
+        except Exception:
+            # mirror s3fs, which treats any failure as non-existence
+            return False
 
     def touch(self) -> None:
+        self.invalidate_cache()
         return self._path.touch(self._pathstr)
 
     def is_dir(self) -> bool:
@@ -63,31 +194,116 @@ class S3Path(AbstractPath, RemotePath):
         return self.exists() and is_file(self._pathstr)
 
     def mkdir(self, **kwargs) -> None:
+        self.invalidate_cache()
         return self._path.mkdir(self._pathstr, **kwargs)
 
-    def rmdir(self, recursive=False, **kwargs) -> None:
-        if recursive:
-            return self._path.rm(self._pathstr, recursive=True, **kwargs)
-        return self._path.rmdir(self._pathstr, **kwargs)
+    def rmdir(self, recursive=False, parallelism=None, **kwargs) -> None:
+        self.invalidate_cache(recursive=recursive)
+        if not recursive:
+            return self._path.rmdir(self._pathstr, **kwargs)
+
+        # imported here, as pathman.delete depends on this module
+        from pathman.delete import remove_many
+
+        stats = remove_many(self._list_objects(), parallelism=parallelism)
+        self.invalidate_cache(recursive=True)
+        stats.raise_for_failures()
+        if not self.key:
+            self._path.rmdir(self.bucket)
+        elif not stats.deleted:
+            raise FileNotFoundError(self._pathstr)
+
+    def _list_objects(self) -> Generator["S3Path", None, None]:
+        """ List every object below this path, directory markers included """
+        s3 = clients.get_client(**self._original_kwargs)
+        prefix = self.key.rstrip("/") + "/" if self.key else ""
+        paginator = s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield self._derive("s3://{}/{}".format(self.bucket, obj["Key"]))
 
     def join(self, *pathsegments: str) -> "S3Path":
-        joined = os.path.join(self._pathstr, *pathsegments)
-        return S3Path(joined, **self._original_kwargs)
+        return self._derive(os.path.join(self._pathstr, *pathsegments))
 
     def open(self, mode="r", **kwargs):
+        """Open the object
+
+        "wb" and "w" write through a `multipart.MultipartWriter`, taking its
+        `part_size` and `max_concurrency` options (and `encoding`, `errors`
+        and `newline` in text mode). Other modes are handled by s3fs.
+        """
+        if mode in ("wb", "w"):
+            self.invalidate_cache()
+            return self._open_writer(mode, **kwargs)
+        if "r" not in mode:
+            self.invalidate_cache()
+        elif self._disk_cache is not None and "+" not in mode:
+            cached = self._open_cached(mode, **kwargs)
+            if cached is not None:
+                return cached
         return self._path.open(self._pathstr, mode=mode, **kwargs)
 
+    def _open_cached(self, mode: str, **kwargs):
+        """ Open the disk cache's copy of the object, None if it has none """
+        if self._disk_cache is None:
+            return None
+        # a recently seen ETag spares the conditional request
+        info = self._stat_cache.get(self._compare_key()[1])
+        etag = info.etag if info is not None else None
+        s3 = clients.get_client(**self._original_kwargs)
+        filename = self._disk_cache.fetch(s3, self.bucket, self.key, etag)
+        if filename is None:
+            return None
+        text_kwargs = {k: v for k, v in kwargs.items() if k in _TEXT_KWARGS}
+        try:
+            return io.open(filename, mode, **text_kwargs)
+        except FileNotFoundError:
+            # evicted by another process since the fetch
+            return None
+
+    def _open_writer(
+        self,
+        mode: str,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs
+    ):
+        unexpected = [k for k in kwargs if mode == "wb" or k not in _TEXT_KWARGS]
+        if unexpected:
+            raise TypeError("unexpected arguments: {}".format(", ".join(unexpected)))
+        writer = multipart.MultipartWriter(
+            clients.get_client(**self._original_kwargs),
+            self.bucket,
+            self.key,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+            # as s3fs would: e.g. server-side encryption
+            extra_args=self._path.s3_additional_kwargs,
+        )
+        if mode == "wb":
+            return writer
+        return multipart.TextWriter(writer, **kwargs)
+
     def write_bytes(self, contents, **kwargs):
-        with self.open("wb") as f:
+        with self.open("wb", **kwargs) as f:
             written = f.write(contents)
+        self.invalidate_cache()
         return written
 
     def write_text(self, contents, **kwargs):
-        with self.open("w") as f:
+        with self.open("w", **kwargs) as f:
             written = f.write(contents)
+        self.invalidate_cache()
+        return written
+
+    def write_stream(self, chunks, **kwargs) -> int:
+        with self.open("wb", **kwargs) as f:
+            written = f.write_stream(chunks)
+        self.invalidate_cache()
         return written
 
     def remove(self) -> None:
+        self.invalidate_cache()
         return self._path.rm(self._pathstr)
 
     def read_text(self, **kwargs):
@@ -95,10 +311,75 @@ class S3Path(AbstractPath, RemotePath):
             contents = f.read(**kwargs)
         return contents
 
-    def read_bytes(self, **kwargs):
-        with self.open("rb") as f:
-            contents = f.read(**kwargs)
-        return contents
+    def read_bytes(self, start=None, end=None, **kwargs):
+        if start is None and end is None:
+            with self.open("rb") as f:
+                contents = f.read(**kwargs)
+            return contents
+
+        if end is None and start < 0:
+            # suffix range, no need to know the size
+            return self._get_range("bytes={}".format(start))
+        # `stat` raises FileNotFoundError for missing objects
+        size = self.stat().size if ranges.needs_size(start, end) else None
+        first, last = ranges.resolve(start, end, size)
+        return self._read_range(first, last)
+
+    def read_ranges(self, offsets, parallelism=None, **kwargs) -> List[bytes]:
+        resolved = ranges.resolve_all(offsets, lambda: self.stat().size)
+        return ranges.read_ranges(self._read_range, resolved, parallelism, **kwargs)
+
+    def open_mmap(self, tempdir: Optional[str] = None) -> mmap.mmap:
+        if self._disk_cache is not None:
+            cached = self._open_cached("rb")
+            if cached is not None:
+                with cached:
+                    return mmap.mmap(cached.fileno(), 0, access=mmap.ACCESS_READ)
+        s3 = clients.get_client(**self._original_kwargs)
+        with tempfile.TemporaryFile(dir=tempdir) as f:
+            try:
+                s3.download_fileobj(self.bucket, self.key, f)
+            except s3.exceptions.ClientError as e:
+                if _is_not_found(e):
+                    raise FileNotFoundError(self._pathstr)
+                raise
+            f.flush()
+            # the mapping stays valid once the (already unlinked) file is closed
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_buffer(self) -> memoryview:
+        s3 = clients.get_client(**self._original_kwargs)
+        try:
+            size = s3.head_object(Bucket=self.bucket, Key=self.key)["ContentLength"]
+        except s3.exceptions.ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(self._pathstr)
+            raise
+        buffer = memoryview(bytearray(size))
+        if size:
+            s3.download_fileobj(self.bucket, self.key, _BufferWriter(buffer))
+        return buffer
+
+    def _read_range(self, start: int, end: int) -> bytes:
+        """ GET `[start, end)` of the object, `end` of -1 meaning its end """
+        if start == end:
+            return b""
+        return self._get_range(
+            "bytes={}-{}".format(start, "" if end < 0 else end - 1)
+        )
+
+    def _get_range(self, header: str) -> bytes:
+        s3 = clients.get_client(**self._original_kwargs)
+        try:
+            response = s3.get_object(Bucket=self.bucket, Key=self.key, Range=header)
+        except s3.exceptions.NoSuchKey:
+            raise FileNotFoundError(self._pathstr)
+        except s3.exceptions.ClientError as e:
+            # range entirely past the end of the object
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                return b""
+            raise
+        return response["Body"].read()
 
     def expanduser(self) -> "S3Path":
         return self
@@ -106,27 +387,107 @@ class S3Path(AbstractPath, RemotePath):
     def abspath(self) -> "S3Path":
         return self
 
-    def walk(self, **kwargs) -> Generator["S3Path", None, None]:
-        for root, directories, files in self._path.walk(self._pathstr, **kwargs):
-            for f in files:
-                yield S3Path(os.path.join(root, f), **self._original_kwargs)
+    def walk(
+        self,
+        max_items: Optional[int] = None,
+        start_after: Optional[str] = None,
+        page_size: Optional[int] = None,
+        parallel: Optional[int] = None,
+        ordered: bool = False,
+        **kwargs
+    ) -> Generator["S3Path", None, None]:
+        """Yield every object below this prefix, one listing page at a time
+
+        Objects are listed flat with ListObjectsV2, in key order. Each path
+        carries the metadata returned by the listing, see `stat`.
+
+        Parameters
+        ----------
+        max_items: int, optional
+            Stop after this many objects
+        start_after: str, optional
+            Key, or s3:// path, after which to start, e.g. the last path
+            yielded by an interrupted walk
+        page_size: int, optional
+            Number of keys requested per page, at most 1000
+        parallel: int, optional
+            Beyond the first page, list key ranges of the prefix with this
+            many concurrent requests, see `listing.ShardedListing`. Paths
+            are then yielded as they are listed, out of key order
+        ordered: bool, optional
+            With `parallel`, still yield paths in key order, buffering the
+            ranges listed ahead
+        """
+        if kwargs:
+            raise TypeError("unexpected arguments: {}".format(", ".join(kwargs)))
+        bucket = self.bucket
+        prefix = self.key.rstrip("/") + "/" if self.key.strip("/") else ""
+        if start_after and start_after.startswith("s3://"):
+            start_after = start_after[len("s3://") :].partition("/")[2]
+
+        for obj in listing.list_objects(
+            clients.get_client(**self._original_kwargs),
+            bucket,
+            prefix,
+            parallel=parallel,
+            start_after=start_after,
+            max_items=max_items,
+            page_size=page_size,
+            ordered=ordered,
+        ):
+            yield self._listed(obj["Key"], obj)
+
+    def _listed(self, key: str, obj: Optional[Dict[str, Any]]) -> "S3Path":
+        """ Path to a listed object, or "directory" if `obj` is None """
+        if obj is None:
+            info = StatInfo(type="directory")
+        else:
+            info = StatInfo(
+                type="file",
+                size=obj["Size"],
+                etag=obj.get("ETag"),
+                last_modified=obj.get("LastModified"),
+            )
+        name = "{}/{}".format(self.bucket, key)
+        self._stat_cache.put(name, info)
+        path = self._derive("s3://" + name)
+        path._info = info
+        return path
+
+    def stat(self) -> StatInfo:
+        if self._info is not None:
+            return self._info
+        info = self._stat()
+        if info is MISSING:
+            raise FileNotFoundError(self._pathstr)
+        return info
 
     def ls(self, refresh=True) -> List["S3Path"]:
-        all_files = [
-            S3Path("s3://" + c, **self._original_kwargs)
-            for c in self._path.ls(self._pathstr)
-        ]
-        return all_files
-
-    def glob(self, pattern) -> List["S3Path"]:
-        globber = self.join(pattern)._pathstr
-        return [
-            S3Path("s3://" + p, **self._original_kwargs)
-            for p in self._path.glob(globber)
-        ]
+        entries = {
+            info["name"]: info
+            for info in self._path.ls(self._pathstr, detail=True)
+        }
+        for info in entries.values():
+            self._remember(info)
+        return [self._derive("s3://" + name) for name in sorted(entries)]
+
+    def glob(self, pattern) -> Generator["S3Path", None, None]:
+        """Yield the objects and "directories" below this prefix matching
+        `pattern`, as they are listed
+
+        Only the keys that may match are listed: the literal text leading
+        the pattern narrows the ListObjectsV2 prefix, and each level of
+        wildcard segments is listed with a "/" delimiter, so that
+        directories which cannot match are never entered. Below a `**`
+        segment, the remaining keys are listed flat. See `globbing.glob`.
+        """
+        prefix = self.key.rstrip("/") + "/" if self.key.strip("/") else ""
+        tree = _S3Tree(clients.get_client(**self._original_kwargs), self.bucket, prefix)
+        for name, _, obj in globbing.glob(globbing.Pattern(pattern), tree):
+            yield self._listed(prefix + name, obj)
 
     def with_suffix(self, suffix) -> "S3Path":
-        return S3Path(self._pathstr + suffix, **self._original_kwargs)
+        return self._derive(self._pathstr + suffix)
 
     @property
     def stem(self) -> str:
@@ -134,6 +495,89 @@ class S3Path(AbstractPath, RemotePath):
 
     @property
     def parts(self) -> List[str]:
-        tokens = self._pathstr.split("/")
-        tokens = [t for t in tokens if t not in [""]]
-        return tokens
+        if self._parts is None:
+            self._parts = tuple(t for t in self._pathstr.split("/") if t)
+        return list(self._parts)
+
+
+def _is_not_found(error) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey")
+
+
+class _S3Tree(globbing.Tree):
+    """ The keys below `prefix`, as a `globbing.Tree` of listing entries """
+
+    flat = True
+
+    def __init__(self, s3, bucket: str, prefix: str) -> None:
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def children(
+        self, directory: str, prefix: str, recursive: bool
+    ) -> Generator[globbing.Entry, None, None]:
+        start = len(self.prefix) + len(directory)
+        for entry in listing.list_level(
+            self.s3, self.bucket, self.prefix + directory + prefix
+        ):
+            if "Prefix" in entry:
+                name = entry["Prefix"][start:-1]
+                if name:
+                    yield name, True, None
+            else:
+                yield entry["Key"][start:], False, entry
+
+    def descendants(self, directory: str) -> Generator[globbing.Entry, None, None]:
+        # directories are implied by the keys below them, which are listed
+        # in order: yield each one before its first key
+        start = len(self.prefix) + len(directory)
+        parents: List[str] = []
+        for obj in listing.list_objects(
+            self.s3, self.bucket, self.prefix + directory
+        ):
+            name = obj["Key"][start:]
+            parts = name.split("/")
+            common = 0
+            for previous, part in zip(parents, parts[:-1]):
+                if previous != part:
+                    break
+                common += 1
+            parents = parts[:-1]
+            for depth in range(common, len(parents)):
+                yield "/".join(parents[: depth + 1]), True, None
+            yield name, False, obj
+
+
+class _BufferWriter(object):
+    """Seekable file-like object writing into a preallocated buffer
+
+    boto3 writes the parts of a multipart download to their offsets as they
+    arrive, so the object is copied into the buffer exactly once.
+    """
+
+    def __init__(self, buffer: memoryview) -> None:
+        self._buffer = buffer
+        self._position = 0
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += len(self._buffer)
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data) -> int:
+        end = self._position + len(data)
+        if end > len(self._buffer):
+            raise IOError("object is larger than when the download started")
+        self._buffer[self._position : end] = data
+        self._position = end
+        return len(data)
@@ -0,0 +1,136 @@
+""" Bounded, expiring cache of S3 object metadata """
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+DEFAULT_TTL = 30.0
+#: Seconds a path is remembered as missing; off by default, as another
+#: process may create it at any time
+DEFAULT_NEGATIVE_TTL = 0.0
+DEFAULT_MAXSIZE = 100000
+
+
+class StatInfo(NamedTuple):
+    """ Metadata about a single path """
+
+    type: str
+    size: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+
+    @classmethod
+    def from_info(cls, info: Dict[str, Any]) -> "StatInfo":
+        """ Build from an `s3fs` info/listing dict """
+        return cls(
+            type=info.get("type", "file"),
+            size=info.get("size", info.get("Size", 0)),
+            etag=info.get("ETag"),
+            last_modified=info.get("LastModified"),
+        )
+
+
+#: Cached marker for a path known not to exist
+MISSING = StatInfo("missing")
+
+
+class StatCache(object):
+    """Thread-safe LRU cache of `StatInfo` keyed on "bucket/key"
+
+    Parameters
+    ----------
+    ttl: float, optional
+        Seconds an entry stays valid. 0 disables caching
+    negative_ttl: float, optional
+        Seconds a path stays known as `MISSING`. 0 (the default) never
+        caches missing paths
+    maxsize: int, optional
+        Maximum number of entries; the least recently used are evicted first
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        maxsize: int = DEFAULT_MAXSIZE,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, StatInfo]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[StatInfo]:
+        """Look up a path
+
+        Returns
+        -------
+        StatInfo, `MISSING` if the path is known not to exist, or None if
+        nothing valid is cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, info: StatInfo) -> None:
+        """ Store the metadata of a path """
+        ttl = self.negative_ttl if info is MISSING else self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, info)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[str] = None, recursive: bool = False) -> None:
+        """Forget cached metadata
+
+        Parameters
+        ----------
+        key: str, optional
+            Path to forget, along with its parents (which may have started or
+            stopped existing). If not given, the whole cache is cleared
+        recursive: bool, optional
+            Also forget every path below `key`
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                return
+            key = key.rstrip("/")
+            parent = key
+            while parent:
+                self._entries.pop(parent, None)
+                parent = parent.rpartition("/")[0]
+            if recursive:
+                prefix = key + "/"
+                for k in [k for k in self._entries if k.startswith(prefix)]:
+                    del self._entries[k]
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters
+
+        `hits` is the number of S3 requests the cache saved.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
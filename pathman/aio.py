@@ -0,0 +1,223 @@
+""" asyncio interface to `Path` """
+import asyncio
+import functools
+import os
+import threading
+from concurrent import futures
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from pathman._impl import clients
+from pathman._impl.stat_cache import StatInfo
+from pathman.path import Path
+
+T = TypeVar("T")
+
+#: Blocking calls run concurrently at most; matches the connection pools
+MAX_WORKERS = clients.MAX_POOL_CONNECTIONS
+#: Concurrency of the `gather_*` helpers when no limit is given
+DEFAULT_LIMIT = 32
+#: Paths fetched from a blocking listing per executor call in `walk`
+_WALK_BATCH = 1000
+
+_lock = threading.Lock()
+_executor: Optional[futures.ThreadPoolExecutor] = None
+
+
+def _get_executor() -> futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = futures.ThreadPoolExecutor(
+                    max_workers=MAX_WORKERS, thread_name_prefix="pathman-aio"
+                )
+    return _executor
+
+
+async def _run(fn: Callable[..., T], *args, **kwargs) -> T:
+    """ Run a blocking call on the shared executor """
+    # the running loop: `get_running_loop` needs Python 3.7
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(fn, *args, **kwargs)
+    )
+
+
+class AsyncPath(object):
+    """Awaitable counterpart of `Path`
+
+    Every I/O method of `Path` is run on a shared thread pool of
+    `MAX_WORKERS` threads, so thousands of concurrent calls share the same
+    connection pools. Path arithmetic is synchronous, as it does no I/O.
+
+    Notes
+    -----
+    The installed s3fs (< 0.5) is built on synchronous botocore, so S3 calls
+    are offloaded to threads just like local ones.
+
+    Parameters
+    ----------
+    path: str or Path
+        Path to wrap
+    kwargs:
+        Passed to `Path` when `path` is a string
+    """
+
+    __slots__ = ("_path",)
+
+    def __init__(self, path: Union[str, Path], **kwargs) -> None:
+        self._path = path if isinstance(path, Path) else Path(path, **kwargs)
+
+    @property
+    def path(self) -> Path:
+        """ The blocking `Path` """
+        return self._path
+
+    def __fspath__(self) -> str:
+        return str(self._path)
+
+    def __str__(self) -> str:
+        return str(self._path)
+
+    def __repr__(self) -> str:
+        return "AsyncPath({!r})".format(str(self._path))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, AsyncPath):
+            return NotImplemented
+        return self._path == other._path
+
+    def __hash__(self) -> int:
+        return hash(self._path)
+
+    def __truediv__(self, key) -> "AsyncPath":
+        return AsyncPath(self._path / key)
+
+    def join(self, *pathsegments) -> "AsyncPath":
+        return AsyncPath(self._path.join(*pathsegments))
+
+    async def exists(self) -> bool:
+        return await _run(self._path.exists)
+
+    async def is_file(self) -> bool:
+        return await _run(self._path.is_file)
+
+    async def is_dir(self) -> bool:
+        return await _run(self._path.is_dir)
+
+    async def stat(self) -> StatInfo:
+        return await _run(self._path.stat)
+
+    async def read_bytes(
+        self, start: Optional[int] = None, end: Optional[int] = None, **kwargs
+    ) -> bytes:
+        return await _run(self._path.read_bytes, start=start, end=end, **kwargs)
+
+    async def read_text(self, **kwargs) -> str:
+        return await _run(self._path.read_text, **kwargs)
+
+    async def write_bytes(self, contents, **kwargs) -> int:
+        return await _run(self._path.write_bytes, contents, **kwargs)
+
+    async def write_text(self, contents, **kwargs) -> int:
+        return await _run(self._path.write_text, contents, **kwargs)
+
+    async def write_stream(self, chunks, **kwargs) -> int:
+        return await _run(self._path.write_stream, chunks, **kwargs)
+
+    async def remove(self) -> None:
+        await _run(self._path.remove)
+
+    async def ls(self) -> List["AsyncPath"]:
+        return [AsyncPath(p) for p in await _run(self._path.ls)]
+
+    async def glob(self, pattern) -> List["AsyncPath"]:
+        matches: List[Path] = await _run(list, self._path.glob(pattern))
+        return [AsyncPath(p) for p in matches]
+
+    async def walk(self, **kwargs) -> AsyncIterator["AsyncPath"]:
+        """ Yield the files below this path as the listing progresses """
+        files = self._path.walk(**kwargs)
+        while True:
+            batch = await _run(_take, files, _WALK_BATCH)
+            for path in batch:
+                yield AsyncPath(path)
+            if len(batch) < _WALK_BATCH:
+                return
+
+    async def copy(self, dest: Union["AsyncPath", Path, str], **kwargs) -> Any:
+        """ Copy to `dest`, see `pathman.copy.copy` """
+        from pathman.copy import copy
+
+        if isinstance(dest, AsyncPath):
+            dest = dest._path
+        elif isinstance(dest, str):
+            dest = Path(dest)
+        return await _run(copy, self._path, dest, **kwargs)
+
+
+def _take(iterator: Iterator[T], count: int) -> List[T]:
+    batch = []
+    for item in iterator:
+        batch.append(item)
+        if len(batch) == count:
+            break
+    return batch
+
+
+async def gather_bounded(
+    awaitables: Iterable[Awaitable[T]], limit: int = DEFAULT_LIMIT
+) -> List[T]:
+    """Await many awaitables with at most `limit` of them running at once
+
+    Returns
+    -------
+    list: The results, in the order of `awaitables`
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _bounded(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(_bounded(a) for a in awaitables))
+
+
+def _as_async(path: Union[AsyncPath, Path, str]) -> AsyncPath:
+    return path if isinstance(path, AsyncPath) else AsyncPath(path)
+
+
+async def gather_read(
+    paths: Iterable[Union[AsyncPath, Path, str]], limit: int = DEFAULT_LIMIT
+) -> List[bytes]:
+    """ Read many files, at most `limit` at a time """
+    return await gather_bounded((_as_async(p).read_bytes() for p in paths), limit)
+
+
+async def gather_exists(
+    paths: Iterable[Union[AsyncPath, Path, str]], limit: int = DEFAULT_LIMIT
+) -> List[bool]:
+    """ Check whether many paths exist, at most `limit` at a time """
+    return await gather_bounded((_as_async(p).exists() for p in paths), limit)
+
+
+def _reset_after_fork() -> None:
+    # the executor's threads do not survive a fork
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
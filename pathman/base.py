@@ -1,9 +1,20 @@
 from abc import ABC, abstractmethod, abstractproperty
+from typing import Tuple
 
 
 class AbstractPath(ABC):
     """ Defines the interface for all Path-like objects """
 
+    __slots__ = ()
+
+    @abstractmethod
+    def _derive(self, path: str):
+        """ Build a new path of the same type, reusing this path's state """
+
+    @abstractmethod
+    def _compare_key(self) -> Tuple[str, str]:
+        """ Return the normalized (location, path) used for equality and hashing """
+
     @abstractproperty
     def extension(self):
         pass
@@ -49,7 +60,23 @@ class AbstractPath(ABC):
         pass
 
     @abstractmethod
-    def read_bytes(self, **kwargs):
+    def write_stream(self, chunks, **kwargs):
+        pass
+
+    @abstractmethod
+    def read_bytes(self, start=None, end=None, **kwargs):
+        pass
+
+    @abstractmethod
+    def read_ranges(self, offsets, parallelism=None, **kwargs):
+        pass
+
+    @abstractmethod
+    def open_mmap(self, tempdir=None):
+        pass
+
+    @abstractmethod
+    def read_buffer(self):
         pass
 
     @abstractmethod
@@ -68,6 +95,14 @@ class AbstractPath(ABC):
     def abspath(self):
         pass
 
+    @abstractmethod
+    def invalidate_cache(self, recursive=False):
+        pass
+
+    @abstractmethod
+    def stat(self):
+        pass
+
     @abstractmethod
     def walk(self, **kwargs):
         pass
@@ -81,7 +116,7 @@ class AbstractPath(ABC):
         pass
 
     @abstractmethod
-    def glob(self, _glob):
+    def glob(self, pattern):
         pass
 
     @abstractmethod
@@ -107,3 +142,5 @@ class RemotePath(object):
         also allow us to unify the API for managing remote resources
         across cloud providers should that be necessary in the future.
     """
+
+    __slots__ = ()
@@ -1,28 +1,81 @@
 import importlib
-from concurrent import futures
-from typing import no_type_check, Optional
+import os
+from typing import (
+    no_type_check,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
-from pathman._impl import S3Path, LocalPath
-from pathman.exc import UnsupportedCopyOperation
+from pathman._impl import (
+    S3Path,
+    LocalPath,
+    clients,
+    download,
+    filecopy,
+    listing,
+    multipart,
+)
+from pathman.base import AbstractPath
+from pathman._impl.stat_cache import MISSING, StatInfo
+from pathman.delete import Removable, remove_many
+from pathman.exc import TransferError, UnsupportedCopyOperation
+from pathman.journal import TransferJournal
 from pathman.path import Path
+from pathman.sync import COMPARE_MODES, is_unchanged, local_stat, SIZE_MTIME
+from pathman.transfer import (
+    FAILED,
+    FAIL_FAST,
+    ON_ERROR_MODES,
+    pipeline,
+    run_transfer,
+    RetryPolicy,
+    TransferReport,
+)
 
 try:
     s3fs = importlib.import_module("s3fs")
 except ImportError:
     raise ImportError("s3fs is required to use copy")
 
-from s3fs import S3FileSystem  # type: ignore
-
 try:
     importlib.import_module("boto3")  # type: ignore
 except ImportError:
     raise ImportError("boto3 is required to use copy")
 
-import boto3  # type: ignore
+# a path relative to the root of a copy, with "/" separators, and its metadata
+Entry = Tuple[str, StatInfo]
 
 
 @no_type_check
 def copy(src: Path, dest: Path, **kwargs):
+    """Copy a file or a directory between local disk and S3, or within either
+
+    Parameters
+    ----------
+    src: Path
+        File or directory to copy
+    dest: Path
+        Destination file or directory
+    kwargs:
+        Passed on to `copy_local_s3`, `copy_s3_s3`, `copy_s3_local` or
+        `copy_local_local`. All of them accept `parallelism`, `queue_size`,
+        `sync`, `compare`, `delete`, `retry` and `on_error`
+
+    Returns
+    -------
+    TransferReport: files, bytes and throughput of the copy, and the
+    outcome of every file
+
+    Raises
+    ------
+    TransferError
+        If any file failed, with the report
+    """
 
     if src._location == "local" and dest._location == "s3":
         return copy_local_s3(src._impl, dest._impl, **kwargs)
@@ -30,82 +83,825 @@ def copy(src: Path, dest: Path, **kwargs):
         return copy_s3_s3(src._impl, dest._impl, **kwargs)
     elif src._location == "s3" and dest._location == "local":
         return copy_s3_local(src._impl, dest._impl, **kwargs)
+    elif src._location == "local" and dest._location == "local":
+        return copy_local_local(src._impl, dest._impl, **kwargs)
     else:
         raise UnsupportedCopyOperation(
-            "Only local -> s3, s3 -> s3, and s3 -> local are currently supported"
+            "Only local -> s3, s3 -> s3, s3 -> local and local -> local are "
+            "currently supported"
         )
     pass
 
 
-def copy_local_s3(src: LocalPath, dest: S3Path, **kwargs):
-    s3 = boto3.client("s3")
+def copy_local_s3(
+    src: LocalPath,
+    dest: S3Path,
+    parallelism: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    multipart_threshold: Optional[int] = None,
+    multipart_chunksize: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    sync: bool = False,
+    compare: str = SIZE_MTIME,
+    delete: bool = False,
+    journal: Optional[str] = None,
+    retry: Optional[RetryPolicy] = None,
+    on_error: str = FAIL_FAST,
+    **kwargs
+) -> TransferReport:
+    """Upload a local file, or every file below a local directory, to S3
+
+    Directory uploads walk `src` on a background thread into a bounded queue
+    feeding `parallelism` upload workers. Each file keeps its path relative
+    to `src` below the `dest` prefix.
+
+    With a `journal`, every uploaded file is recorded in that file, see
+    `TransferJournal`, and files of at least `multipart_threshold` bytes are
+    uploaded as multipart uploads that are left in place on failure. Running
+    the same copy again with the same journal skips the files uploaded since
+    they last changed, and resumes the interrupted uploads from the parts
+    that ListParts reports.
+
+    Parameters
+    ----------
+    src: LocalPath
+        File or directory to upload
+    dest: S3Path
+        Destination key or prefix. A file copied to a bucket or to a key
+        ending in "/" keeps its name
+    parallelism: int, optional
+        Number of files uploaded concurrently
+    queue_size: int, optional
+        Number of files buffered ahead of the uploads
+    multipart_threshold: int, optional
+        Size in bytes above which files are uploaded in parts
+    multipart_chunksize: int, optional
+        Size in bytes of each part
+    max_concurrency: int, optional
+        Number of parts of a single file uploaded concurrently
+    sync: bool, optional
+        Only upload files that differ from the objects already in `dest`
+    compare: str, optional
+        How `sync` detects differences: "size_mtime" or "checksum"
+    delete: bool, optional
+        With `sync`, remove objects below `dest` that are not in `src`
+    journal: str, optional
+        File recording the progress of the copy, to resume it from
+    retry: RetryPolicy, optional
+        Retries of files that fail with a transient error, see `RetryPolicy`
+    on_error: str, optional
+        "fail_fast" to stop at the first file that fails for good, or
+        "best_effort" to copy every other file first
+    kwargs:
+        Passed to boto3 as `ExtraArgs`
+
+    Returns
+    -------
+    TransferReport: files, bytes and throughput of the copy, and the outcome
+    of every file
+
+    Raises
+    ------
+    TransferError
+        If any file failed, with the report
+    """
+    _check_options(sync, compare, delete, on_error)
+    s3 = clients.get_client(**dest._original_kwargs)
+    config = _transfer_config(multipart_threshold, multipart_chunksize, max_concurrency)
     bucket = dest.bucket
     key = dest.key
-    s3.upload_file(str(src), bucket, key, ExtraArgs=kwargs)
+    # opened once the listings are made: until then nothing closes it
+    checkpoints: Optional[TransferJournal] = None
+
+    def _upload_file(filename: str, name: str, dest_key: str, info: StatInfo) -> None:
+        threshold = multipart_threshold or multipart.DEFAULT_PART_SIZE
+        journaled = checkpoints
+        if journaled is None or info.size < threshold:
+            s3.upload_file(filename, bucket, dest_key, ExtraArgs=kwargs, Config=config)
+            return
+        stale = journaled.stale_upload(name, info)
+        if stale is not None:
+            # the file changed since: its parts are of no use
+            _abort_upload(s3, bucket, dest_key, stale)
+            journaled.forget_upload(name)
+        multipart.upload_file(
+            s3,
+            filename,
+            bucket,
+            dest_key,
+            part_size=multipart_chunksize,
+            max_concurrency=max_concurrency,
+            upload_id=journaled.upload(name, info),
+            on_create=lambda upload_id: journaled.upload_started(
+                name, info, upload_id
+            ),
+            extra_args=kwargs,
+        )
+
+    def _unchanged(filename: str, info: StatInfo, existing: Optional[StatInfo]):
+        return is_unchanged(
+            info, existing, compare, src_file=filename, chunksize=multipart_chunksize
+        )
 
+    if src.is_dir():
+        root = str(src)
+        key = _as_prefix(key)
 
-def copy_s3_s3(src: S3Path, dest: S3Path, **kwargs):
-    s3fs = S3FileSystem(anon=False)
-    s3fs.copy(str(src), str(dest), **kwargs)
+        def _upload(relative: str, info: StatInfo) -> None:
+            _upload_file(os.path.join(root, relative), relative, key + relative, info)
 
+        def _remove(extras: List[str]) -> None:
+            _remove_all(
+                (dest._derive("s3://{}/{}{}".format(bucket, key, r)) for r in extras),
+                parallelism,
+            )
 
-def copy_s3_local(
-    src: S3Path, dest: LocalPath, parallelism: Optional[int] = None, **kwargs
+        existing = dict(_list_objects(s3, bucket, key)) if sync else None
+        checkpoints = _open_journal(journal, src, dest)
+        try:
+            return _transfer_tree(
+                _list_local(root),
+                _upload,
+                parallelism,
+                queue_size,
+                existing=existing,
+                unchanged=lambda relative, info, existing: _unchanged(
+                    os.path.join(root, relative), info, existing
+                ),
+                remove=_remove if delete else None,
+                journal=checkpoints,
+                retry=retry,
+                on_error=on_error,
+            )
+        finally:
+            dest.invalidate_cache(recursive=True)
+
+    name = os.path.basename(str(src))
+    if not key or key.endswith("/"):
+        key += name
+    info = local_stat(str(src))
+    target = dest._derive("s3://{}/{}".format(bucket, key))
+    checkpoints = _open_journal(journal, src, dest)
+
+    def _upload_single() -> Optional[int]:
+        if checkpoints is not None and checkpoints.is_done(key, info):
+            return None
+        if sync and _unchanged(str(src), info, _s3_stat(target)):
+            return None
+        _upload_file(str(src), key, key, info)
+        if checkpoints is not None:
+            checkpoints.done(key, info)
+        return info.size
+
+    try:
+        return _transfer_file(name, _upload_single, retry)
+    finally:
+        if checkpoints is not None:
+            checkpoints.close()
+        target.invalidate_cache()
+
+
+def _transfer_config(
+    multipart_threshold: Optional[int] = None,
+    multipart_chunksize: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
 ):
-    s3 = boto3.client("s3")
+    """ Build a boto3 `TransferConfig`, keeping boto3's defaults for unset values """
+    from boto3.s3.transfer import TransferConfig  # type: ignore
 
-    bucket = src.bucket
-    prefix = src.key
-    prefix_parts = prefix.split("/")
+    options = {
+        "multipart_threshold": multipart_threshold,
+        "multipart_chunksize": multipart_chunksize,
+        "max_concurrency": max_concurrency,
+    }
+    return TransferConfig(**{k: v for k, v in options.items() if v is not None})
+
+
+def copy_s3_s3(
+    src: S3Path,
+    dest: S3Path,
+    parallelism: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    multipart_threshold: Optional[int] = None,
+    multipart_chunksize: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    sync: bool = False,
+    compare: str = SIZE_MTIME,
+    delete: bool = False,
+    retry: Optional[RetryPolicy] = None,
+    on_error: str = FAIL_FAST,
+    **kwargs
+) -> TransferReport:
+    """Copy an S3 object, or every object below an S3 prefix, within S3
+
+    Objects are copied server-side: with CopyObject, or UploadPartCopy for
+    objects larger than `multipart_threshold`, so no data passes through this
+    host. Prefix copies list the source on a background thread into a bounded
+    queue feeding `parallelism` copy workers.
+
+    Parameters
+    ----------
+    src: S3Path
+        Object or prefix to copy
+    dest: S3Path
+        Destination key or prefix. An object copied to a bucket or to a key
+        ending in "/" keeps its name
+    parallelism: int, optional
+        Number of objects copied concurrently
+    queue_size: int, optional
+        Number of listed keys buffered ahead of the copies
+    multipart_threshold: int, optional
+        Size in bytes above which objects are copied in parts
+    multipart_chunksize: int, optional
+        Size in bytes of each part
+    max_concurrency: int, optional
+        Number of parts of a single object copied concurrently
+    sync: bool, optional
+        Only copy objects that differ from the objects already in `dest`
+    compare: str, optional
+        How `sync` detects differences: "size_mtime" or "checksum" (ETags)
+    delete: bool, optional
+        With `sync`, remove objects below `dest` that are not in `src`
+    retry: RetryPolicy, optional
+        Retries of files that fail with a transient error, see `RetryPolicy`
+    on_error: str, optional
+        "fail_fast" to stop at the first file that fails for good, or
+        "best_effort" to copy every other file first
+    kwargs:
+        Passed to boto3 as `ExtraArgs`
+
+    Returns
+    -------
+    TransferReport: objects, bytes and throughput of the copy, and the outcome
+    of every file
+
+    Raises
+    ------
+    TransferError
+        If any file failed, with the report
+    """
+    _check_options(sync, compare, delete, on_error)
+    source_client = clients.get_client(**src._original_kwargs)
+    s3 = clients.get_client(**dest._original_kwargs)
+    config = _transfer_config(multipart_threshold, multipart_chunksize, max_concurrency)
+    bucket = dest.bucket
+    key = dest.key
 
-    def _download_key(key: str):
-        key_parts = key.split("/")[len(prefix_parts) :]
+    def _copy_object(source_key: str, dest_key: str) -> None:
+        s3.copy(
+            {"Bucket": src.bucket, "Key": source_key},
+            bucket,
+            dest_key,
+            ExtraArgs=kwargs,
+            Config=config,
+            SourceClient=source_client,
+        )
+
+    def _unchanged(relative: str, info: StatInfo, existing: Optional[StatInfo]):
+        return is_unchanged(info, existing, compare, chunksize=multipart_chunksize)
+
+    if _is_prefix(source_client, src):
+        prefix = _as_prefix(src.key)
+        key = _as_prefix(key)
+
+        def _copy_key(relative: str, info: StatInfo) -> None:
+            _copy_object(prefix + relative, key + relative)
+
+        def _remove(extras: List[str]) -> None:
+            _remove_all(
+                (dest._derive("s3://{}/{}{}".format(bucket, key, r)) for r in extras),
+                parallelism,
+            )
+
+        try:
+            return _transfer_tree(
+                _list_objects(source_client, src.bucket, prefix),
+                _copy_key,
+                parallelism,
+                queue_size,
+                existing=dict(_list_objects(s3, bucket, key)) if sync else None,
+                unchanged=_unchanged,
+                remove=_remove if delete else None,
+                retry=retry,
+                on_error=on_error,
+            )
+        finally:
+            dest.invalidate_cache(recursive=True)
 
-        # create local directories
-        destination = Path(str(dest.join(*key_parts)))
-        destination.dirname().mkdir(parents=True, exist_ok=True)
-        s3.download_file(
-            Bucket=bucket, Key=key, Filename=str(destination), ExtraArgs=kwargs
+    elif _s3_stat(src) is not None:
+        if not key or key.endswith("/"):
+            key += src.parts[-1]
+        info = src._stat()
+        target = dest._derive("s3://{}/{}".format(bucket, key))
+
+        def _copy_single() -> Optional[int]:
+            if sync and _unchanged(key, info, _s3_stat(target)):
+                return None
+            _copy_object(src.key, key)
+            return info.size
+
+        try:
+            return _transfer_file(src.parts[-1], _copy_single, retry)
+        finally:
+            target.invalidate_cache()
+    else:
+        raise UnsupportedCopyOperation(
+            "src was not a directory or a file: {}".format(src)
         )
 
+
+def copy_s3_local(
+    src: S3Path,
+    dest: LocalPath,
+    parallelism: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    sync: bool = False,
+    compare: str = SIZE_MTIME,
+    delete: bool = False,
+    list_parallelism: Optional[int] = None,
+    multipart_chunksize: Optional[int] = None,
+    verify: bool = False,
+    resume: bool = False,
+    journal: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    retry: Optional[RetryPolicy] = None,
+    on_error: str = FAIL_FAST,
+    **kwargs
+) -> TransferReport:
+    """Copy an S3 object, or every object below an S3 prefix, to local disk
+
+    Directory copies list the prefix on a background thread into a bounded
+    queue (at most `queue_size` keys ahead) that feeds `parallelism`
+    long-lived download workers. With `list_parallelism`, large prefixes are
+    listed as concurrent key ranges, so that the listing keeps ahead of many
+    workers downloading small objects.
+
+    A single object is downloaded as `parallelism` concurrent range
+    requests of `multipart_chunksize` bytes, written in place into a
+    preallocated file, see `download.download`.
+
+    With a `journal`, every downloaded object is recorded in that file, see
+    `TransferJournal`, and objects larger than `multipart_chunksize` are
+    downloaded with `resume`. Running the same copy again with the same
+    journal skips the objects downloaded since they last changed, and
+    resumes the interrupted downloads from the ranges already on disk.
+
+    Parameters
+    ----------
+    src: S3Path
+        Object or prefix to copy
+    dest: LocalPath
+        Destination file or directory
+    parallelism: int, optional
+        Number of concurrent downloads
+    queue_size: int, optional
+        Number of listed keys buffered ahead of the downloads
+    sync: bool, optional
+        Only download objects that differ from the files already in `dest`
+    compare: str, optional
+        How `sync` detects differences: "size_mtime" or "checksum"
+    delete: bool, optional
+        With `sync`, remove files below `dest` that are not in `src`
+    list_parallelism: int, optional
+        Number of concurrent listing requests, see `S3Path.walk`
+    multipart_chunksize: int, optional
+        Bytes per range request when downloading a single object
+    verify: bool, optional
+        Check a single object against its ETag once downloaded
+    resume: bool, optional
+        Keep a partially downloaded single object after a failure, and
+        resume from it when copying the same object again
+    journal: str, optional
+        File recording the progress of the copy, to resume it from
+    max_concurrency: int, optional
+        With a `journal`, number of ranges of an object in a directory
+        downloaded concurrently
+    retry: RetryPolicy, optional
+        Retries of files that fail with a transient error, see `RetryPolicy`
+    on_error: str, optional
+        "fail_fast" to stop at the first file that fails for good, or
+        "best_effort" to copy every other file first
+    kwargs:
+        Passed to boto3 as `ExtraArgs`
+
+    Returns
+    -------
+    TransferReport: files, bytes and throughput of the copy, and the outcome
+    of every file
+
+    Raises
+    ------
+    TransferError
+        If any file failed, with the report
+    """
+    _check_options(sync, compare, delete, on_error)
+    s3 = clients.get_client(**src._original_kwargs)
+
+    bucket = src.bucket
+    prefix = src.key
+    # opened once the listings are made: until then nothing closes it
+    checkpoints: Optional[TransferJournal] = None
+
+    def _unchanged(filename: str, info: StatInfo) -> bool:
+        existing = local_stat(filename) if os.path.isfile(filename) else None
+        return is_unchanged(info, existing, compare, dest_file=filename)
+
     # copy will be recursive automatically if the src is a directory
-    if src.is_dir():
-        continuation_token = None
-        while True:
-            if continuation_token is not None:
-                batch = s3.list_objects_v2(
-                    Bucket=bucket, Prefix=prefix, ContinuationToken=continuation_token
-                )
-            else:
-                batch = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
-
-            with futures.ThreadPoolExecutor(max_workers=parallelism) as executor:
-                futures.wait(
-                    [
-                        executor.submit(_download_key, key["Key"])
-                        for key in batch["Contents"]
-                    ],
-                    return_when=futures.FIRST_EXCEPTION,
-                )
+    if _is_prefix(s3, src):
+        root = str(dest)
+        prefix = _as_prefix(prefix)
+        created = set()
 
-            if "NextContinuationToken" in batch:
-                continuation_token = batch["NextContinuationToken"]
-            else:
-                break
+        def _download(relative: str, info: StatInfo) -> None:
+            destination = os.path.join(root, *relative.split("/"))
 
-    elif src.is_file():
-        if dest.is_dir():
+            # create local directories
+            directory = os.path.dirname(destination)
+            if directory not in created:
+                os.makedirs(directory, exist_ok=True)
+                created.add(directory)
+            chunk_size = multipart_chunksize or download.DEFAULT_CHUNK_SIZE
+            if checkpoints is not None and info.size > chunk_size:
+                download.download(
+                    s3,
+                    bucket,
+                    prefix + relative,
+                    destination,
+                    info,
+                    chunk_size=chunk_size,
+                    parallelism=max_concurrency or multipart.DEFAULT_MAX_CONCURRENCY,
+                    resume=True,
+                    extra_args=kwargs,
+                )
+                return
             s3.download_file(
                 Bucket=bucket,
-                Key=prefix,
-                Filename=str(dest / src.parts[-1]),
+                Key=prefix + relative,
+                Filename=destination,
                 ExtraArgs=kwargs,
             )
+
+        def _remove(extras: List[str]) -> None:
+            _remove_all(
+                (os.path.join(root, *relative.split("/")) for relative in extras),
+                parallelism,
+            )
+
+        existing = dict(_list_local(root)) if sync else None
+        checkpoints = _open_journal(journal, src, dest)
+        return _transfer_tree(
+            _list_objects(s3, bucket, prefix, list_parallelism),
+            _download,
+            parallelism,
+            queue_size,
+            existing=existing,
+            unchanged=lambda relative, info, existing: is_unchanged(
+                info,
+                existing,
+                compare,
+                dest_file=os.path.join(root, *relative.split("/")),
+            ),
+            remove=_remove if delete else None,
+            journal=checkpoints,
+            retry=retry,
+            on_error=on_error,
+        )
+
+    elif _s3_stat(src) is not None:
+        if dest.is_dir():
+            destination = str(dest / src.parts[-1])
         else:
-            s3.download_file(
-                Bucket=bucket, Key=prefix, Filename=str(dest), ExtraArgs=kwargs
+            destination = str(dest)
+        # fresh metadata: every range is requested with its ETag
+        src.invalidate_cache()
+        info = src._stat()
+        checkpoints = _open_journal(journal, src, dest)
+
+        def _download_single() -> Optional[int]:
+            if checkpoints is not None and checkpoints.is_done(destination, info):
+                return None
+            if sync and _unchanged(destination, info):
+                return None
+            transferred = download.download(
+                s3,
+                bucket,
+                prefix,
+                destination,
+                info,
+                chunk_size=multipart_chunksize,
+                parallelism=parallelism,
+                verify=verify,
+                resume=resume or checkpoints is not None,
+                extra_args=kwargs,
+            )
+            if checkpoints is not None:
+                checkpoints.done(destination, info)
+            return transferred
+
+        try:
+            return _transfer_file(src.parts[-1], _download_single, retry)
+        finally:
+            if checkpoints is not None:
+                checkpoints.close()
+    else:
+        raise UnsupportedCopyOperation(
+            "src was not a directory or a file: {}".format(src)
+        )
+
+
+def copy_local_local(
+    src: LocalPath,
+    dest: LocalPath,
+    parallelism: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    sync: bool = False,
+    compare: str = SIZE_MTIME,
+    delete: bool = False,
+    retry: Optional[RetryPolicy] = None,
+    on_error: str = FAIL_FAST,
+) -> TransferReport:
+    """Copy a local file, or every file below a local directory, on local disk
+
+    Files are copied by the kernel where possible (a reflink, then
+    `copy_file_range` or `sendfile`) and read and written in userspace
+    otherwise, see `filecopy.copy_file`. Directory copies walk `src` on a
+    background thread into a bounded queue feeding `parallelism` copy
+    workers. Each file keeps its path relative to `src` below `dest`, and
+    its permission bits; empty directories are not copied.
+
+    Parameters
+    ----------
+    src: LocalPath
+        File or directory to copy
+    dest: LocalPath
+        Destination file or directory. A file copied to an existing
+        directory keeps its name
+    parallelism: int, optional
+        Number of files copied concurrently
+    queue_size: int, optional
+        Number of files buffered ahead of the copies
+    sync: bool, optional
+        Only copy files that differ from the files already in `dest`
+    compare: str, optional
+        How `sync` detects differences: "size_mtime" or "checksum"
+    delete: bool, optional
+        With `sync`, remove files below `dest` that are not in `src`
+    retry: RetryPolicy, optional
+        Retries of files that fail with a transient error, see `RetryPolicy`
+    on_error: str, optional
+        "fail_fast" to stop at the first file that fails for good, or
+        "best_effort" to copy every other file first
+
+    Returns
+    -------
+    TransferReport: files, bytes and throughput of the copy, and the outcome
+    of every file
+
+    Raises
+    ------
+    TransferError
+        If any file failed, with the report
+    """
+    _check_options(sync, compare, delete, on_error)
+
+    if src.is_dir():
+        root = str(src)
+        dest_root = str(dest)
+        source = os.path.realpath(root)
+        if os.path.commonpath([source, os.path.realpath(dest_root)]) == source:
+            raise UnsupportedCopyOperation(
+                "cannot copy {} into itself: {}".format(src, dest)
+            )
+        created = set()
+
+        def _copy(relative: str, info: StatInfo) -> None:
+            destination = os.path.join(dest_root, *relative.split("/"))
+            directory = os.path.dirname(destination)
+            if directory not in created:
+                os.makedirs(directory, exist_ok=True)
+                created.add(directory)
+            filecopy.copy_file(os.path.join(root, *relative.split("/")), destination)
+
+        def _remove(extras: List[str]) -> None:
+            _remove_all(
+                (os.path.join(dest_root, *relative.split("/")) for relative in extras),
+                parallelism,
+            )
+
+        return _transfer_tree(
+            _list_local(root),
+            _copy,
+            parallelism,
+            queue_size,
+            existing=dict(_list_local(dest_root)) if sync else None,
+            unchanged=lambda relative, info, existing: is_unchanged(
+                info,
+                existing,
+                compare,
+                src_file=os.path.join(root, *relative.split("/")),
+                dest_file=os.path.join(dest_root, *relative.split("/")),
+            ),
+            remove=_remove if delete else None,
+            retry=retry,
+            on_error=on_error,
+        )
+
+    elif src.is_file():
+        if dest.is_dir():
+            destination = str(dest / src.parts[-1])
+        else:
+            destination = str(dest)
+        if os.path.exists(destination) and os.path.samefile(str(src), destination):
+            raise UnsupportedCopyOperation(
+                "{} and {} are the same file".format(src, destination)
             )
+        info = src.stat()
+
+        def _copy_single() -> Optional[int]:
+            existing = local_stat(destination) if os.path.isfile(destination) else None
+            if sync and is_unchanged(
+                info, existing, compare, src_file=str(src), dest_file=destination
+            ):
+                return None
+            return filecopy.copy_file(str(src), destination)
+
+        return _transfer_file(src.parts[-1], _copy_single, retry)
     else:
         raise UnsupportedCopyOperation(
             "src was not a directory or a file: {}".format(src)
         )
+
+
+def _transfer_tree(
+    entries: Iterable[Entry],
+    transfer: Callable[[str, StatInfo], None],
+    parallelism: Optional[int],
+    queue_size: Optional[int],
+    existing: Optional[Dict[str, StatInfo]] = None,
+    unchanged: Optional[Callable[[str, StatInfo, Optional[StatInfo]], bool]] = None,
+    remove: Optional[Callable[[List[str]], None]] = None,
+    journal: Optional[TransferJournal] = None,
+    retry: Optional[RetryPolicy] = None,
+    on_error: str = FAIL_FAST,
+) -> TransferReport:
+    """Transfer a directory tree through `pipeline`
+
+    Parameters
+    ----------
+    entries: iterable of (relative path, StatInfo)
+        Source listing
+    transfer: callable
+        Copies one entry to the destination
+    existing: dict, optional
+        Destination listing, keyed on relative path. Given in sync mode only;
+        entries for which `unchanged` returns True are then skipped
+    remove: callable, optional
+        Called with the relative paths of destination entries missing from
+        the source, once every transfer has succeeded
+    journal: TransferJournal, optional
+        Entries it records as done are skipped, and transferred entries are
+        recorded in it. It is closed once the transfer ends
+    retry, on_error:
+        Passed to `pipeline`
+    """
+    seen = set()
+
+    def _entries() -> Iterator[Entry]:
+        for relative, info in entries:
+            seen.add(relative)
+            yield relative, info
+
+    def _work(item: Entry) -> Optional[int]:
+        relative, info = item
+        if journal is not None and journal.is_done(relative, info):
+            return None
+        if existing is not None and unchanged(  # type: ignore
+            relative, info, existing.get(relative)
+        ):
+            return None
+        transfer(relative, info)
+        if journal is not None:
+            journal.done(relative, info)
+        return info.size
+
+    try:
+        report = pipeline(
+            _entries(),
+            _work,
+            parallelism,
+            queue_size,
+            key=lambda item: item[0],
+            retry=retry,
+            on_error=on_error,
+        )
+    finally:
+        if journal is not None:
+            journal.close()
+    if existing is not None and remove is not None:
+        extras = [relative for relative in existing if relative not in seen]
+        if extras:
+            remove(extras)
+        report.deleted += len(extras)
+        report.finish()
+    return report
+
+
+def _transfer_file(
+    key: str, transfer: Callable[[], Optional[int]], retry: Optional[RetryPolicy]
+) -> TransferReport:
+    """Transfer a single file with `run_transfer`
+
+    Raises
+    ------
+    TransferError
+        If the file failed, with the report
+    """
+    report = TransferReport()
+    result = run_transfer(key, transfer, report, retry)
+    report.finish()
+    if result.status == FAILED:
+        raise TransferError(report) from result.error
+    return report
+
+
+def _open_journal(
+    filename: Optional[str], src: AbstractPath, dest: AbstractPath
+) -> Optional[TransferJournal]:
+    if filename is None:
+        return None
+    return TransferJournal(filename, str(src), str(dest))
+
+
+def _abort_upload(s3, bucket: str, key: str, upload_id: str) -> None:
+    try:
+        s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+    except s3.exceptions.NoSuchUpload:
+        pass
+
+
+def _check_options(sync: bool, compare: str, delete: bool, on_error: str) -> None:
+    if on_error not in ON_ERROR_MODES:
+        raise ValueError("on_error must be one of {}".format(ON_ERROR_MODES))
+    if compare not in COMPARE_MODES:
+        raise ValueError("compare must be one of {}".format(COMPARE_MODES))
+    if delete and not sync:
+        raise ValueError("delete requires sync")
+
+
+def _as_prefix(key: str) -> str:
+    """ Turn a key naming a "directory" into a listing prefix """
+    if key and not key.endswith("/"):
+        return key + "/"
+    return key
+
+
+def _is_prefix(s3, path: S3Path) -> bool:
+    """Whether to copy `path` as a prefix rather than as a single object
+
+    Objects below `key + "/"` make it a prefix and an object at `key` makes
+    it an object, whatever its name; otherwise its name decides, as for
+    `is_dir`.
+    """
+    prefix = _as_prefix(path.key)
+    if not prefix:
+        return True
+    listed = s3.list_objects_v2(Bucket=path.bucket, Prefix=prefix, MaxKeys=1)
+    if listed.get("KeyCount", 0):
+        return True
+    if _s3_stat(path) is not None:
+        return False
+    return path.is_dir()
+
+
+def _list_objects(
+    s3, bucket: str, prefix: str, parallel: Optional[int] = None
+) -> Iterator[Entry]:
+    """ Lazily list every object below `prefix`, relative to `prefix` """
+    for obj in listing.list_objects(s3, bucket, prefix, parallel=parallel):
+        yield obj["Key"][len(prefix) :], StatInfo(
+            type="file",
+            size=obj["Size"],
+            etag=obj.get("ETag"),
+            last_modified=obj.get("LastModified"),
+        )
+
+
+def _list_local(root: str) -> Iterator[Entry]:
+    """ Lazily list every file below the local directory `root` """
+    for f in LocalPath(root).walk():
+        filename = str(f)
+        relative = os.path.relpath(filename, root).replace(os.sep, "/")
+        yield relative, f.stat()
+
+
+def _s3_stat(path: S3Path) -> Optional[StatInfo]:
+    """ Metadata of an S3 object, None if it does not exist """
+    info = path._stat()
+    if info is MISSING or info.type != "file":
+        return None
+    return info
+
+
+def _remove_all(paths: Iterable[Removable], parallelism: Optional[int]) -> None:
+    """ Remove destination files that are no longer in the source """
+    remove_many(paths, parallelism=parallelism).raise_for_failures()
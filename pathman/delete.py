@@ -0,0 +1,139 @@
+""" Bulk removal of local files and S3 objects """
+import os
+from concurrent import futures
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Union
+
+from pathman.base import AbstractPath
+from pathman.exc import UnsupportedPathTypeException
+from pathman._impl import LocalPath, S3Path, clients
+from pathman.transfer import TransferStats, default_parallelism
+
+#: Maximum number of keys S3 accepts in a single DeleteObjects request
+BATCH_SIZE = 1000
+
+Removable = Union[AbstractPath, str]
+
+
+def remove_many(
+    paths: Iterable[Removable],
+    parallelism: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Callable[[TransferStats], None]] = None,
+) -> TransferStats:
+    """Remove many files and S3 objects
+
+    `paths` is consumed lazily and grouped into batches of up to
+    `batch_size` paths sharing a bucket and connection. Each S3 batch is a
+    single DeleteObjects request; up to `parallelism` batches run
+    concurrently while `paths` is still being consumed.
+
+    Parameters
+    ----------
+    paths: iterable of Path, LocalPath, S3Path or str
+        Files to remove, e.g. straight from `Path.walk`
+    parallelism: int, optional
+        Number of batches removed concurrently
+    batch_size: int, optional
+        Maximum number of paths per batch; S3 accepts at most 1000
+    progress: callable, optional
+        Called with the running `TransferStats` after every batch
+
+    Returns
+    -------
+    TransferStats: `deleted` counts removed files and `failed` lists the
+    paths that could not be removed, along with the reason. S3 reports keys
+    that did not exist as deleted.
+    """
+    if not 0 < batch_size <= BATCH_SIZE:
+        raise ValueError("batch_size must be between 1 and {}".format(BATCH_SIZE))
+
+    stats = TransferStats()
+    n_workers = parallelism or default_parallelism()
+
+    def _report(done: Iterable[futures.Future]) -> None:
+        for future in done:
+            future.result()
+            if progress is not None:
+                progress(stats)
+
+    with futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+        pending: set = set()
+        for batch in _batches(paths, batch_size):
+            # keep the number of batches held in memory bounded
+            if len(pending) >= 2 * n_workers:
+                done, pending = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED
+                )
+                _report(done)
+            pending.add(executor.submit(_remove_batch, batch, stats))
+        _report(futures.wait(pending).done)
+
+    return stats.finish()
+
+
+def _as_impl(path: Removable) -> Union[LocalPath, S3Path]:
+    if isinstance(path, str):
+        return S3Path(path) if path.startswith("s3://") else LocalPath(path)
+    # unwrap `pathman.Path`
+    impl = getattr(path, "_impl", path)
+    if not isinstance(impl, (LocalPath, S3Path)):
+        raise UnsupportedPathTypeException("cannot remove {!r}".format(path))
+    return impl
+
+
+def _batches(
+    paths: Iterable[Removable], batch_size: int
+) -> Iterator[List[Union[LocalPath, S3Path]]]:
+    """ Group paths that can be removed together """
+    open_batches: Dict[Hashable, List] = {}
+    for path in paths:
+        impl = _as_impl(path)
+        if isinstance(impl, S3Path):
+            group: Hashable = (
+                clients.normalize_kwargs(impl._original_kwargs),
+                impl.bucket,
+            )
+        else:
+            group = "local"
+        batch = open_batches.setdefault(group, [])
+        batch.append(impl)
+        if len(batch) == batch_size:
+            yield open_batches.pop(group)
+    yield from open_batches.values()
+
+
+def _remove_batch(batch: List, stats: TransferStats) -> None:
+    first = batch[0]
+    if isinstance(first, LocalPath):
+        removed = 0
+        for path in batch:
+            try:
+                os.remove(str(path))
+                removed += 1
+            except OSError as e:
+                stats.fail(str(path), str(e))
+        stats.delete(removed)
+        return
+
+    s3 = clients.get_client(**first._original_kwargs)
+    try:
+        response = s3.delete_objects(
+            Bucket=first.bucket,
+            Delete={"Objects": [{"Key": p.key} for p in batch], "Quiet": True},
+        )
+    except Exception as e:
+        for path in batch:
+            stats.fail(str(path), str(e))
+        return
+    finally:
+        for path in batch:
+            path.invalidate_cache()
+
+    errors = {
+        e["Key"]: "{}: {}".format(e.get("Code"), e.get("Message"))
+        for e in response.get("Errors", [])
+    }
+    for path in batch:
+        if path.key in errors:
+            stats.fail(str(path), errors[path.key])
+    stats.delete(len(batch) - len(errors))
@@ -11,3 +11,23 @@ class UnsupportedPathTypeException(PathmanException):
 
 class UnsupportedCopyOperation(PathmanException):
     """ Raised for an unsupported copy operation """
+
+
+class ChecksumMismatch(PathmanException):
+    """ Raised when transferred data does not match its expected checksum """
+
+
+class TransferError(PathmanException):
+    """Raised when files of a transfer failed
+
+    `report` is the `TransferReport` of the transfer, with the outcome of
+    every file; the first failure is chained as the cause.
+    """
+
+    def __init__(self, report) -> None:
+        self.report = report
+        super().__init__(
+            "failed to transfer {} files, first error: {}: {}".format(
+                len(report.failed), *report.failed[0]
+            )
+        )
@@ -0,0 +1,179 @@
+""" Checkpoints of long-running copies, so that a rerun resumes where they stopped """
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pathman._impl.stat_cache import StatInfo
+from pathman.exc import PathmanException
+
+#: Seconds between syncs of the journal to disk: at most this much recorded
+#: progress is lost on a crash, and redone by the next run
+DEFAULT_SYNC_INTERVAL = 1.0
+
+_VERSION = 1
+
+
+def fingerprint(info: StatInfo) -> str:
+    """ Identify a version of a source file or object: its size and ETag or mtime """
+    if info.etag:
+        return "{}:{}".format(info.size, info.etag.strip('"'))
+    if info.last_modified is not None:
+        return "{}:{:.6f}".format(info.size, info.last_modified.timestamp())
+    return str(info.size)
+
+
+class TransferJournal(object):
+    """Append-only record of the finished work of a copy
+
+    Each line of the journal is a small JSON array: a transferred file with
+    the `fingerprint` of the source it was copied from, or a multipart upload
+    that was started. A rerun skips the files whose source is unchanged and
+    resumes the uploads, see `copy_local_s3` and `copy_s3_local`.
+
+    Records are buffered and written out by whichever thread records one
+    once `sync_interval` seconds have passed since the last sync, with a
+    single `fsync` for all of them, so that journaling costs next to
+    nothing per file. A crash loses at most the last `sync_interval`
+    seconds of records; a line cut short by a crash is ignored.
+
+    Parameters
+    ----------
+    filename: str
+        Journal file, created if it does not exist
+    src, dest: str
+        The copy being journaled. A journal of another copy is refused
+    sync_interval: float, optional
+        Seconds between syncs of the journal to disk
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        src: str,
+        dest: str,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+    ) -> None:
+        self.filename = filename
+        self.sync_interval = sync_interval
+        self._done: Dict[str, str] = {}
+        self._uploads: Dict[str, Tuple[str, str]] = {}
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._synced = time.monotonic()
+        header = {"pathman_journal": _VERSION, "src": src, "dest": dest}
+        if os.path.exists(filename) and os.path.getsize(filename):
+            complete = self._load(header)
+            self._file = open(filename, "a")
+            if not complete:
+                # end the line cut short, rather than extend it
+                self._write(["\n"])
+        else:
+            self._file = open(filename, "w")
+            self._write([json.dumps(header) + "\n"])
+
+    def _load(self, header: dict) -> bool:
+        """ Replay the journal, returning whether its last line is complete """
+        with open(self.filename) as f:
+            lines = iter(f)
+            line = next(lines, "")
+            try:
+                found = json.loads(line)
+            except ValueError:
+                found = None
+            if found != header:
+                raise PathmanException(
+                    "{} is not a journal of a copy from {} to {}".format(
+                        self.filename, header["src"], header["dest"]
+                    )
+                )
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # cut short by a crash
+                    continue
+                self._replay(record)
+        return line.endswith("\n")
+
+    def _replay(self, record: list) -> None:
+        kind, name = record[0], record[1]
+        if kind == "done":
+            self._done[name] = record[2]
+            self._uploads.pop(name, None)
+        elif kind == "upload":
+            self._uploads[name] = (record[2], record[3])
+        elif kind == "forget":
+            self._uploads.pop(name, None)
+
+    def is_done(self, name: str, info: StatInfo) -> bool:
+        """ Whether `name` was transferred from this version of its source """
+        return self._done.get(name) == fingerprint(info)
+
+    def done(self, name: str, info: StatInfo) -> None:
+        """ Record that `name` was transferred from `info` """
+        self._record(["done", name, fingerprint(info)])
+
+    def upload(self, name: str, info: StatInfo) -> Optional[str]:
+        """ The ID of the multipart upload of this version of `name`, if any """
+        upload_id, version = self._uploads.get(name, (None, None))
+        return upload_id if version == fingerprint(info) else None
+
+    def stale_upload(self, name: str, info: StatInfo) -> Optional[str]:
+        """ The ID of an upload of `name` started from another version of it """
+        upload_id, version = self._uploads.get(name, (None, None))
+        return upload_id if version != fingerprint(info) else None
+
+    def upload_started(self, name: str, info: StatInfo, upload_id: str) -> None:
+        """Record a new multipart upload, synced at once
+
+        Without it, a crash would leave the upload unfinished and unknown.
+        """
+        self._record(["upload", name, upload_id, fingerprint(info)], sync=True)
+
+    def forget_upload(self, name: str) -> None:
+        """ Record that the upload of `name` no longer exists """
+        self._record(["forget", name])
+
+    def _record(self, record: list, sync: bool = False) -> None:
+        with self._lock:
+            self._replay(record)
+            self._pending.append(json.dumps(record) + "\n")
+        if sync or time.monotonic() - self._synced >= self.sync_interval:
+            self.sync(wait=sync)
+
+    def sync(self, wait: bool = True) -> None:
+        """Write the buffered records and sync them to disk
+
+        Without `wait`, return at once if another thread is already syncing,
+        leaving the records to a later sync.
+        """
+        if not self._write_lock.acquire(blocking=wait):
+            return
+        try:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if lines:
+                self._write(lines)
+            self._synced = time.monotonic()
+        finally:
+            self._write_lock.release()
+
+    def _write(self, lines: List[str]) -> None:
+        self._file.write("".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """ Sync the remaining records and close the journal """
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self) -> "TransferJournal":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,291 @@
+""" Process-wide limits on S3 bandwidth, request rates and concurrency
+
+Every S3 client pathman creates, see `pathman._impl.clients`, goes through
+the limiter set with `configure`, so that the limits hold across copies,
+listings, lookups and bulk deletes running at the same time.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+#: Requests in flight at first when `adaptive`, and at most
+DEFAULT_MAX_CONCURRENCY = 64
+#: Prefixes whose request rate is tracked, least recently used dropped first
+MAX_PREFIXES = 10000
+
+# errors S3 (and other AWS services) answer when asked to slow down
+THROTTLING_ERRORS = frozenset(
+    ("SlowDown", "Throttling", "ThrottlingException", "RequestLimitExceeded")
+)
+
+_limiter: Optional["RateLimiter"] = None
+
+
+class TokenBucket(object):
+    """Allow `rate` units per second on average, in bursts of up to `burst`
+
+    `acquire` takes its units at once, going into debt if there are not
+    enough, and sleeps until the debt is paid back. Requests larger than
+    `burst` are allowed, at the cost of a longer wait.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> float:
+        """ Take `amount` units, returning the seconds slept waiting for them """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrency(object):
+    """Cap the requests in flight, adapting the cap to throttling
+
+    With `adaptive`, the cap is halved (down to `min_limit`) when S3
+    throttles a request, and raised by one after every `limit` requests
+    that succeed, up to `max_limit`. It is halved at most once per
+    `cooldown` seconds: the requests in flight when it is lowered are
+    throttled as well, and must not lower it again.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        adaptive: bool = True,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.adaptive = adaptive
+        self.cooldown = cooldown
+        self.limit = max_limit
+        #: requests S3 throttled so far
+        self.throttled = 0
+        self._in_flight = 0
+        self._successes = 0
+        self._decreased = float("-inf")
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def succeeded(self) -> None:
+        if not self.adaptive:
+            return
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self._successes = 0
+                self.limit += 1
+                self._condition.notify()
+
+    def throttle(self) -> None:
+        with self._condition:
+            self.throttled += 1
+            now = time.monotonic()
+            if self.adaptive and now - self._decreased >= self.cooldown:
+                self._decreased = now
+                self._successes = 0
+                self.limit = max(self.min_limit, self.limit // 2)
+
+
+class RateLimiter(object):
+    """Limits shared by every request of the S3 clients of pathman
+
+    Parameters
+    ----------
+    bytes_per_second: float, optional
+        Bytes sent and received per second, over all requests
+    requests_per_second: float, optional
+        Requests per second, over all requests
+    prefix_requests_per_second: float, optional
+        Requests per second to each prefix, that is the bucket and key up
+        to its last "/", S3 scaling its request rates by prefix
+    max_concurrency: int, optional
+        Requests in flight at most
+    adaptive: bool, optional
+        Halve the requests in flight when S3 answers SlowDown, and raise
+        them again while requests succeed, see `AdaptiveConcurrency`
+    """
+
+    def __init__(
+        self,
+        bytes_per_second: Optional[float] = None,
+        requests_per_second: Optional[float] = None,
+        prefix_requests_per_second: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> None:
+        self.bytes = TokenBucket(bytes_per_second) if bytes_per_second else None
+        self.requests = (
+            TokenBucket(requests_per_second) if requests_per_second else None
+        )
+        self.prefix_requests_per_second = prefix_requests_per_second
+        self.concurrency: Optional[AdaptiveConcurrency] = None
+        if max_concurrency or adaptive:
+            self.concurrency = AdaptiveConcurrency(
+                max_concurrency or DEFAULT_MAX_CONCURRENCY, adaptive=adaptive
+            )
+        self._prefixes: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, prefix: Optional[str]) -> None:
+        """ Wait until a request to `prefix` may be sent """
+        if self.concurrency is not None:
+            self.concurrency.acquire()
+        if self.requests is not None:
+            self.requests.acquire()
+        if self.prefix_requests_per_second and prefix is not None:
+            self._prefix_bucket(prefix).acquire()
+
+    def end(self, succeeded: bool = True) -> None:
+        """ Record the outcome of a request started with `begin` """
+        if self.concurrency is not None:
+            self.concurrency.release()
+            if succeeded:
+                self.concurrency.succeeded()
+
+    def transfer(self, nbytes: int) -> None:
+        """ Wait until `nbytes` more bytes may be sent or received """
+        if self.bytes is not None and nbytes:
+            self.bytes.acquire(nbytes)
+
+    def throttle(self) -> None:
+        """ Record a request S3 throttled, which botocore will retry """
+        if self.concurrency is not None:
+            self.concurrency.throttle()
+
+    def _prefix_bucket(self, prefix: str) -> TokenBucket:
+        with self._lock:
+            try:
+                self._prefixes.move_to_end(prefix)
+                return self._prefixes[prefix]
+            except KeyError:
+                bucket = TokenBucket(self.prefix_requests_per_second)  # type: ignore
+                self._prefixes[prefix] = bucket
+                if len(self._prefixes) > MAX_PREFIXES:
+                    self._prefixes.popitem(last=False)
+                return bucket
+
+
+def configure(
+    bytes_per_second: Optional[float] = None,
+    requests_per_second: Optional[float] = None,
+    prefix_requests_per_second: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    adaptive: bool = False,
+) -> Optional[RateLimiter]:
+    """Set the limits of every S3 request made by pathman in this process
+
+    Takes the arguments of `RateLimiter`. Limits apply to requests started
+    after the call, including those of existing clients; calling it without
+    any limit removes them.
+
+    Returns
+    -------
+    RateLimiter or None: the new limiter
+    """
+    global _limiter
+    limits = (
+        bytes_per_second,
+        requests_per_second,
+        prefix_requests_per_second,
+        max_concurrency,
+        adaptive,
+    )
+    _limiter = RateLimiter(*limits) if any(limits) else None
+    return _limiter
+
+
+def get_limiter() -> Optional[RateLimiter]:
+    """ The limiter set with `configure`, None without limits """
+    return _limiter
+
+
+def install(client: Any) -> Any:
+    """ Apply the process-wide limits to every request of a botocore S3 client """
+    events = client.meta.events
+    events.register("before-parameter-build.s3", _find_prefix)
+    events.register("before-call.s3", _begin)
+    events.register("before-send.s3", _send)
+    events.register("needs-retry.s3", _check_throttling)
+    events.register("after-call.s3", _end)
+    events.register("after-call-error.s3", _end)
+    return client
+
+
+def _find_prefix(params: Dict[str, Any], context: Dict[str, Any], **kwargs) -> None:
+    if _limiter is None or not _limiter.prefix_requests_per_second:
+        return
+    key = params.get("Key", params.get("Prefix"))
+    if key is None and "Delete" in params:
+        objects = params["Delete"].get("Objects") or [{}]
+        key = objects[0].get("Key")
+    key = key or ""
+    context["pathman_prefix"] = "{}/{}".format(
+        params.get("Bucket", ""), key[: key.rfind("/") + 1]
+    )
+
+
+def _begin(context: Dict[str, Any], **kwargs) -> None:
+    limiter = _limiter
+    if limiter is None:
+        return
+    limiter.begin(context.get("pathman_prefix"))
+    # ended by the same limiter, even if another one is configured meanwhile
+    context["pathman_limiter"] = limiter
+
+
+def _send(request: Any, **kwargs) -> None:
+    limiter = _limiter
+    if limiter is not None and request.method in ("PUT", "POST"):
+        limiter.transfer(int(request.headers.get("Content-Length") or 0))
+
+
+def _check_throttling(response: Any, **kwargs) -> None:
+    limiter = _limiter
+    if limiter is None or response is None:
+        return
+    http_response, parsed = response
+    code = parsed.get("Error", {}).get("Code")
+    if code in THROTTLING_ERRORS or http_response.status_code == 503:
+        limiter.throttle()
+
+
+def _end(context: Dict[str, Any], **kwargs) -> None:
+    limiter = context.pop("pathman_limiter", None)
+    if limiter is None:
+        return
+    # after-call-error has no response: the request failed altogether
+    http_response = kwargs.get("http_response")
+    parsed = kwargs.get("parsed") or {}
+    code = parsed.get("Error", {}).get("Code")
+    limiter.end(succeeded=http_response is not None and code not in THROTTLING_ERRORS)
+    if kwargs.get("model") is not None and kwargs["model"].name == "GetObject":
+        # the body is read by the caller: paid for before it gets it
+        limiter.transfer(parsed.get("ContentLength") or 0)
@@ -0,0 +1,164 @@
+""" Metadata of many local files and S3 objects at once """
+from concurrent import futures
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from pathman.base import AbstractPath
+from pathman.exc import UnsupportedPathTypeException
+from pathman._impl import LocalPath, S3Path, clients, listing
+from pathman._impl.stat_cache import MISSING, StatInfo
+from pathman.transfer import default_parallelism
+
+#: Requested keys of one S3 "directory" from which it is listed, rather
+#: than looked up one HEAD request at a time
+MIN_LISTED = 2
+
+Stattable = Union[AbstractPath, str]
+
+
+def stat_many(
+    paths: Iterable[Stattable], parallelism: Optional[int] = None
+) -> List[StatInfo]:
+    """Look up the metadata of many local and S3 paths
+
+    S3 paths are grouped by bucket and parent prefix. A group of at least
+    `MIN_LISTED` keys is answered from a ListObjectsV2 listing of its
+    prefix, started right before its first key and stopped after its last
+    one; the listing is also given up, and its remaining keys looked up
+    with HEAD requests, as soon as it has taken more pages than it answered
+    keys. Listings and lookups run on a pool of `parallelism` threads, as
+    do the `os.stat` calls of local paths. Answers fill the S3 metadata
+    cache, and cached answers are used without any request.
+
+    Parameters
+    ----------
+    paths: iterable of Path, LocalPath, S3Path or str
+        Paths to look up
+    parallelism: int, optional
+        Number of concurrent requests
+
+    Returns
+    -------
+    list of StatInfo: the metadata of each path, in order, with
+    `type="missing"` for paths that do not exist
+    """
+    impls = [_as_impl(path) for path in paths]
+    results: List[Optional[StatInfo]] = [None] * len(impls)
+    groups: Dict[Hashable, List[Tuple[int, S3Path]]] = {}
+    lookups = []
+    for i, impl in enumerate(impls):
+        if isinstance(impl, LocalPath):
+            lookups.append(i)
+            continue
+        cached = impl._stat_cache.get(impl._compare_key()[1])
+        if cached is not None:
+            results[i] = cached
+        elif not impl.key.strip("/"):
+            lookups.append(i)
+        else:
+            group = (
+                clients.normalize_kwargs(impl._original_kwargs),
+                impl.bucket,
+                _parent(impl),
+            )
+            groups.setdefault(group, []).append((i, impl))
+
+    n_workers = parallelism or default_parallelism()
+    with futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+        listed = []
+        for members in groups.values():
+            if len(members) < MIN_LISTED:
+                lookups.extend(i for i, _ in members)
+            else:
+                listed.append(executor.submit(_list_group, members, results))
+        for future in futures.as_completed(listed):
+            lookups.extend(future.result())
+        infos = executor.map(_stat, [impls[i] for i in lookups])
+        for i, info in zip(lookups, infos):
+            results[i] = info
+    return results  # type: ignore
+
+
+def _as_impl(path: Stattable) -> Union[LocalPath, S3Path]:
+    if isinstance(path, str):
+        return S3Path(path) if path.startswith("s3://") else LocalPath(path)
+    # unwrap `pathman.Path`
+    impl = getattr(path, "_impl", path)
+    if not isinstance(impl, (LocalPath, S3Path)):
+        raise UnsupportedPathTypeException("cannot stat {!r}".format(path))
+    return impl
+
+
+def _parent(path: S3Path) -> str:
+    """ The prefix of the "directory" holding `path`, with a trailing "/" """
+    key = path.key.rstrip("/")
+    return key[: key.rfind("/") + 1]
+
+
+def _stat(path: Union[LocalPath, S3Path]) -> StatInfo:
+    if isinstance(path, S3Path):
+        return path._stat()
+    try:
+        return path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return MISSING
+
+
+def _list_group(
+    members: List[Tuple[int, S3Path]], results: List[Optional[StatInfo]]
+) -> List[int]:
+    """Answer the keys of one "directory" from a listing of its prefix
+
+    Returns the indices of the paths still to look up.
+    """
+    first = members[0][1]
+    bucket = first.bucket
+    prefix = _parent(first)
+    cache = first._stat_cache
+    # the same path may be asked for more than once
+    wanted: Dict[str, List[int]] = {}
+    for i, path in members:
+        wanted.setdefault(path.key.rstrip("/"), []).append(i)
+    keys = sorted(wanted)
+    found: Dict[str, StatInfo] = {}
+    resolved = 0
+
+    def _resolve(key: str, info: StatInfo) -> None:
+        for i in wanted.pop(key):
+            results[i] = info
+        cache.put("{}/{}".format(bucket, key), info)
+
+    pages = 0
+    for page, covered in listing.list_range(
+        clients.get_client(**first._original_kwargs),
+        bucket,
+        prefix,
+        start_after=keys[0][:-1],
+        last=keys[-1] + "/",
+    ):
+        pages += 1
+        for entry in page:
+            if "Prefix" in entry:
+                # an object answers for its key, as with a HEAD request
+                name = entry["Prefix"][:-1]
+                if name in wanted and name not in found:
+                    found[name] = StatInfo("directory")
+            elif entry["Key"] in wanted:
+                found[entry["Key"]] = StatInfo(
+                    type="file",
+                    size=entry["Size"],
+                    etag=entry.get("ETag"),
+                    last_modified=entry.get("LastModified"),
+                )
+        # a key is known to be missing once the listing is past the place
+        # of both the object and the "directory" it could be
+        done = [
+            key
+            for key in wanted
+            if key in found or covered is None or key + "/" <= covered
+        ]
+        for key in done:
+            _resolve(key, found.get(key, MISSING))
+        resolved += len(done)
+        if not wanted or pages > resolved:
+            break
+    return [i for indices in wanted.values() for i in indices]
@@ -1,15 +1,42 @@
 """ Module for abstracting over local/remote file paths """
+import mmap
 import os
-from typing import List, Union, Generator
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    Generator,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from pathman.exc import UnsupportedPathTypeException
 from pathman.base import AbstractPath
-from pathman.utils import is_file
+from pathman.delete import BATCH_SIZE, remove_many
+from pathman.metadata import stat_many
+from pathman.transfer import TransferStats
+from pathman.utils import is_file, shared_kwargs
 from pathman._impl import S3Path, LocalPath
+from pathman._impl.stat_cache import StatInfo
 
+if TYPE_CHECKING:
+    from pathman.aio import AsyncPath
 
-class Path(AbstractPath, os.PathLike):
-    """ Represents a generic path object """
+
+class Path(AbstractPath):
+    """Represents a generic path object
+
+    Notes
+    -----
+    `Path` uses `__slots__` to keep large collections of paths compact. It is
+    still recognised as an `os.PathLike` through `__fspath__`.
+    """
+
+    __slots__ = ("_original_kwargs", "_pathstr", "_isfile", "_location", "_impl")
 
     location_class_map = {"local": LocalPath, "s3": S3Path}
 
@@ -22,7 +49,7 @@ class Path(AbstractPath, os.PathLike):
            A path string
         """
         path = str(path)
-        self._original_kwargs = dict({}, **kwargs)
+        self._original_kwargs = shared_kwargs(kwargs)
         self._pathstr: str = path
         self._isfile: bool = is_file(path)
         self._location: str = determine_output_location(path)
@@ -34,6 +61,37 @@ class Path(AbstractPath, os.PathLike):
             path, **kwargs
         )
 
+    @classmethod
+    def _from_impl(
+        cls, impl: Union[LocalPath, S3Path], location: str, kwargs: dict
+    ) -> "Path":
+        """Wrap an already constructed backend path without re-parsing it
+
+        Parameters
+        ----------
+        impl: LocalPath or S3Path
+            Backend object to wrap
+        location: str
+            Location of `impl`, as returned by `determine_output_location`
+        kwargs: dict
+            Original kwargs of the parent path. The dict is shared, not copied
+        """
+        path = cls.__new__(cls)
+        path._original_kwargs = kwargs
+        path._pathstr = impl._pathstr
+        path._isfile = is_file(impl._pathstr)
+        path._location = location
+        path._impl = impl
+        return path
+
+    def _wrap(self, impl: Union[LocalPath, S3Path]) -> "Path":
+        """ Wrap a backend path derived from this one (same location and kwargs) """
+        return self._from_impl(impl, self._location, self._original_kwargs)
+
+    def _derive(self, path: str) -> "Path":
+        """ Build a new path at the same location, reusing the backend state """
+        return self._wrap(self._impl._derive(path))
+
     def __fspath__(self) -> str:
         return self._pathstr
 
@@ -44,10 +102,41 @@ class Path(AbstractPath, os.PathLike):
         return self.__str__()
 
     def __eq__(self, other) -> bool:
-        return self._pathstr == other._pathstr
+        """Paths compare equal when they refer to the same location
+
+        Trailing slashes are ignored, as is the `s3://` prefix of S3 paths.
+        Comparing against anything other than a path is never equal.
+        """
+        if not isinstance(other, AbstractPath):
+            return NotImplemented
+        return self._compare_key() == other._compare_key()
+
+    def __hash__(self) -> int:
+        return hash(self._impl)
+
+    def _compare_key(self) -> Tuple[str, str]:
+        return self._impl._compare_key()
+
+    def intern(self, table: Optional[Dict["Path", "Path"]] = None) -> "Path":
+        """Return the canonical instance of this path
+
+        Parameters
+        ----------
+        table: dict, optional
+            Intern table to look the path up in. Defaults to a process-wide
+            table, which can be emptied with `clear_interned`
+
+        Returns
+        -------
+        Path: A path equal to this one. Equal paths interned in the same
+        table are the same object
+        """
+        if table is None:
+            table = _interned
+        return table.setdefault(self, self)
 
     def __truediv__(self, key) -> "Path":
-        return Path(self._impl.__truediv__(key)._pathstr, **self._original_kwargs)
+        return self._wrap(self._impl.__truediv__(key))
 
     @property
     def extension(self) -> str:
@@ -83,7 +172,8 @@ class Path(AbstractPath, os.PathLike):
         ----------
         recursive : bool, optional
             If True, remove directory and all contents recursively.
-            If False, the directory must be empty
+            If False, the directory must be empty. S3 prefixes are removed
+            with batched deletes, see `remove_many`
 
         """
         self._impl.rmdir(recursive=recursive)
@@ -91,7 +181,7 @@ class Path(AbstractPath, os.PathLike):
 
     def join(self, *pathsegments) -> "Path":
         """ Combine the current path with the given segments """
-        return Path(self._impl.join(*pathsegments)._pathstr, **self._original_kwargs)
+        return self._wrap(self._impl.join(*pathsegments))
 
     def basename(self) -> str:
         """Return the base name of the current path
@@ -150,9 +240,112 @@ class Path(AbstractPath, os.PathLike):
         """
         return self._impl.write_text(contents, **kwargs)
 
-    def read_bytes(self, **kwargs) -> bytes:
-        """ Open file, read bytes, and close file """
-        return self._impl.read_bytes(**kwargs)
+    def write_stream(self, chunks: Iterable[bytes], **kwargs) -> int:
+        """Write every chunk of an iterable, e.g. a generator, to the file
+
+        Chunks are written as they are produced, so the contents never need
+        to be held in memory at once.
+
+        Parameters
+        ----------
+        chunks: iterable of bytes
+            Contents of the file
+
+        Returns
+        -------
+        int: number of bytes written
+
+        Notes
+        -----
+        On S3, `write_bytes`, `write_text`, `write_stream` and `open` in
+        "wb" or "w" mode upload parts of `part_size` bytes (8 MiB by
+        default) in the background, `max_concurrency` (4) at a time, while
+        writing continues; see `multipart.MultipartWriter`. If writing
+        fails, the upload is aborted and no object is written.
+        """
+        return self._impl.write_stream(chunks, **kwargs)
+
+    def read_bytes(
+        self, start: Optional[int] = None, end: Optional[int] = None, **kwargs
+    ) -> bytes:
+        """Open file, read bytes, and close file
+
+        Parameters
+        ----------
+        start: int, optional
+            Offset of the first byte to read. Negative values count from the
+            end of the file, e.g. -8 reads the last 8 bytes
+        end: int, optional
+            Offset after the last byte to read, the end of the file if not
+            given
+
+        Notes
+        -----
+        `start` and `end` behave like slicing the contents, without reading
+        the rest of the file: S3 objects are read with a Range request and
+        local files with `os.pread`
+        """
+        return self._impl.read_bytes(start=start, end=end, **kwargs)
+
+    def read_ranges(
+        self,
+        offsets: Sequence[Tuple[Optional[int], Optional[int]]],
+        parallelism: Optional[int] = None,
+        **kwargs
+    ) -> List[bytes]:
+        """Read several byte ranges of a file
+
+        Nearby ranges are coalesced into a single read, and the coalesced
+        reads run concurrently.
+
+        Parameters
+        ----------
+        offsets: sequence of (start, end)
+            Ranges to read, with the same meaning as in `read_bytes`
+        parallelism: int, optional
+            Number of reads run concurrently
+        max_gap: int, optional
+            Ranges separated by at most this many bytes are read together
+        max_span: int, optional
+            Maximum size of a coalesced read
+
+        Returns
+        -------
+        list of bytes: The contents of each range, in the order given
+        """
+        return self._impl.read_ranges(offsets, parallelism=parallelism, **kwargs)
+
+    def open_mmap(self, tempdir: Optional[str] = None) -> mmap.mmap:
+        """Map the file read-only into memory
+
+        Local files are mapped directly. S3 objects are downloaded into an
+        anonymous temporary file (created in `tempdir`, if given) which is
+        then mapped, so the object never has to fit in memory.
+
+        Returns
+        -------
+        mmap.mmap: Close it, or use it as a context manager, to unmap it
+
+        Raises
+        ------
+        ValueError: If the file is empty, as empty files cannot be mapped
+        """
+        return self._impl.open_mmap(tempdir=tempdir)
+
+    def read_buffer(self) -> memoryview:
+        """Read the whole file without copying it into a `bytes` object
+
+        Local files are memory-mapped, so pages are only read from disk when
+        accessed. S3 objects are downloaded straight into a preallocated
+        buffer, parts of large objects concurrently.
+
+        Returns
+        -------
+        memoryview: A read-only view of a local file, or a writable view of
+        the downloaded S3 object. Wrap it without copying, e.g. with
+        `numpy.frombuffer`
+        """
+        return self._impl.read_buffer()
 
     def read_text(self, **kwargs) -> str:
         """ Open file, read text, and close file """
@@ -166,42 +359,141 @@ class Path(AbstractPath, os.PathLike):
         self._impl.remove()
         return
 
+    @staticmethod
+    def remove_many(
+        paths: Iterable[Union["Path", str]],
+        parallelism: Optional[int] = None,
+        batch_size: int = BATCH_SIZE,
+        progress: Optional[Callable[[TransferStats], None]] = None,
+    ) -> TransferStats:
+        """Remove many files at once
+
+        S3 objects are removed with DeleteObjects requests of up to
+        `batch_size` keys, several batches at a time.
+
+        Parameters
+        ----------
+        paths: iterable of Path or str
+            Files to remove, e.g. `Path("s3://bucket/tmp").walk()`
+        parallelism: int, optional
+            Number of batches removed concurrently
+        batch_size: int, optional
+            Maximum number of files per batch, at most 1000
+        progress: callable, optional
+            Called with the running `TransferStats` after every batch
+
+        Returns
+        -------
+        TransferStats: `deleted` counts removed files and `failed` lists the
+        files that could not be removed. Call `raise_for_failures()` on it
+        to turn failures into an exception
+        """
+        return remove_many(paths, parallelism, batch_size, progress)
+
+    @staticmethod
+    def stat_many(
+        paths: Iterable[Union["Path", str]], parallelism: Optional[int] = None
+    ) -> List[StatInfo]:
+        """Get the metadata of many files at once
+
+        S3 paths sharing a parent prefix are answered from one listing of
+        it when that takes fewer requests than a HEAD per path; other paths
+        are looked up concurrently. See `pathman.metadata.stat_many`.
+
+        Parameters
+        ----------
+        paths: iterable of Path or str
+            Paths to look up
+        parallelism: int, optional
+            Number of concurrent requests
+
+        Returns
+        -------
+        list of StatInfo: the metadata of each path, in order, with
+        `type="missing"` for paths that do not exist
+        """
+        return stat_many(paths, parallelism)
+
     def expanduser(self) -> "Path":
         """ Return a new path with ~ expanded """
-        return Path(self._impl.expanduser()._pathstr, **self._original_kwargs)
+        return self._wrap(self._impl.expanduser())
 
     def dirname(self) -> "Path":
         """Return the directory name of the current path. Mimics the behavior
         of `os.path.dirname`
         """
-        return Path(os.path.dirname(self._pathstr), **self._original_kwargs)
+        return self._derive(os.path.dirname(self._pathstr))
 
     def abspath(self) -> "Path":
         """ Make the current path absolute """
-        return Path(self._impl.abspath()._pathstr, **self._original_kwargs)
+        return self._wrap(self._impl.abspath())
+
+    def invalidate_cache(self, recursive=False) -> None:
+        """Forget any cached metadata about this path
+
+        Only needed when the path was changed by something other than
+        pathman, since pathman's own writes invalidate the cache.
+
+        Parameters
+        ----------
+        recursive : bool, optional
+            If True, also forget everything cached below this path
+        """
+        self._impl.invalidate_cache(recursive=recursive)
+        return
+
+    def stat(self) -> StatInfo:
+        """Return the type, size, ETag and modification time of the path
+
+        Paths yielded by `walk` on S3 carry the metadata of the listing, so
+        this makes no request for them.
+
+        Raises
+        ------
+        FileNotFoundError: If the path does not exist
+        """
+        return self._impl.stat()
 
     def walk(self, **kwargs) -> Generator["Path", None, None]:
         """Get a list of files below the current path
 
+        On S3 the listing is streamed page by page, see `S3Path.walk` for
+        the `max_items`, `start_after`, `page_size`, `parallel` and
+        `ordered` options. Local directories are read with `os.scandir`,
+        see `LocalPath.walk` for the `include`, `exclude`, `max_depth` and
+        `parallel` options.
+
         Note
         ----
         This does not mirror the behavior of `os.walk`. A list of absolute
         paths are returned
         """
-        return (
-            Path(p._pathstr, **self._original_kwargs) for p in self._impl.walk(**kwargs)
-        )
+        return (self._wrap(p) for p in self._impl.walk(**kwargs))
 
     def ls(self) -> List["Path"]:
-        return [Path(p._pathstr, **self._original_kwargs) for p in self._impl.ls()]
+        return [self._wrap(p) for p in self._impl.ls()]
 
-    def glob(self, path) -> List["Path"]:
-        return [
-            Path(p._pathstr, **self._original_kwargs) for p in self._impl.glob(path)
-        ]
+    def glob(self, pattern) -> Generator["Path", None, None]:
+        """Yield the paths below this one matching a glob pattern
+
+        `*`, `?` and `[...]` match within a path segment and `**` matches
+        any number of segments, for local and S3 paths alike. Matches are
+        yielded as directories are listed, and only directories that may
+        hold a match are listed.
+        """
+        for path in self._impl.glob(pattern):
+            yield self._wrap(path)
 
     def with_suffix(self, suffix) -> "Path":
-        return Path(self._impl.with_suffix(suffix)._pathstr, **self._original_kwargs)
+        return self._wrap(self._impl.with_suffix(suffix))
+
+    @property
+    def aio(self) -> "AsyncPath":
+        """ The asyncio interface of this path, see `pathman.aio.AsyncPath` """
+        # imported here, as pathman.aio depends on this module
+        from pathman.aio import AsyncPath
+
+        return AsyncPath(self)
 
     @property
     def stem(self) -> str:
@@ -213,6 +505,14 @@ class Path(AbstractPath, os.PathLike):
         return self._impl.parts
 
 
+_interned: Dict[Path, Path] = {}
+
+
+def clear_interned() -> None:
+    """ Empty the process-wide table used by `Path.intern` """
+    _interned.clear()
+
+
 def determine_output_location(abspath: str) -> str:
     """Determine output location given a path
 
@@ -0,0 +1,128 @@
+""" Byte range arithmetic shared by the ranged reads of local and S3 paths """
+import bisect
+from concurrent import futures
+from typing import Callable, List, Optional, Sequence, Tuple
+
+#: Ranges closer than this are fetched with one request, since a round trip
+#: to S3 costs about as much as transferring this many bytes
+DEFAULT_MAX_GAP = 512 * 2 ** 10
+#: Coalesced ranges are not grown beyond this size
+DEFAULT_MAX_SPAN = 64 * 2 ** 20
+
+Range = Tuple[int, int]
+#: A range as given by callers, with slice-like offsets
+Offsets = Tuple[Optional[int], Optional[int]]
+
+
+def needs_size(start: Optional[int], end: Optional[int]) -> bool:
+    """ Whether resolving a range requires the size of the file """
+    return (start is not None and start < 0) or (end is not None and end < 0)
+
+
+def resolve(start: Optional[int], end: Optional[int], size: Optional[int]) -> Range:
+    """Turn slice-like `start`/`end` offsets into an absolute `[start, end)` range
+
+    Offsets follow the semantics of slicing a `bytes` object: negative values
+    count from the end of the file and out of bounds values are clipped. An
+    `end` of None means the end of the file, returned as -1 if `size` is not
+    known.
+    """
+    if size is None and needs_size(start, end):
+        raise ValueError("the file size is needed to resolve negative offsets")
+
+    def _clip(offset: int) -> int:
+        if size is None:
+            return max(offset, 0)
+        if offset < 0:
+            offset += size
+        return min(max(offset, 0), size)
+
+    first = _clip(start or 0)
+    if end is None:
+        return first, size if size is not None else -1
+    return first, max(first, _clip(end))
+
+
+def resolve_all(ranges: Sequence[Offsets], size: Callable[[], int]) -> List[Range]:
+    """ Resolve several ranges, calling `size` only if one of them needs it """
+    known = None
+    if any(end is None or needs_size(start, end) for start, end in ranges):
+        known = size()
+    return [resolve(start, end, known) for start, end in ranges]
+
+
+def coalesce(
+    ranges: Sequence[Range],
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_span: int = DEFAULT_MAX_SPAN,
+) -> List[Range]:
+    """Merge overlapping and nearby ranges
+
+    Parameters
+    ----------
+    ranges: sequence of (start, end)
+        Absolute, half-open ranges
+    max_gap: int, optional
+        Ranges separated by at most this many bytes are merged
+    max_span: int, optional
+        Ranges are not merged into spans larger than this
+
+    Returns
+    -------
+    list: Sorted, non-overlapping ranges covering every input range
+    """
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged:
+            last_start, last_end = merged[-1]
+            span = max(end, last_end) - last_start
+            # overlapping ranges are always merged, so every range lies
+            # within a single span
+            if start < last_end or (start - last_end <= max_gap and span <= max_span):
+                merged[-1] = (last_start, max(end, last_end))
+                continue
+        merged.append((start, end))
+    return merged
+
+
+def read_ranges(
+    read: Callable[[int, int], bytes],
+    ranges: Sequence[Range],
+    parallelism: Optional[int] = None,
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_span: int = DEFAULT_MAX_SPAN,
+) -> List[bytes]:
+    """Read several absolute ranges, coalescing nearby ones
+
+    Parameters
+    ----------
+    read: callable
+        Reads the bytes in `[start, end)` of the file
+    ranges: sequence of (start, end)
+        Absolute, half-open ranges, in any order
+    parallelism: int, optional
+        Number of coalesced ranges fetched concurrently
+
+    Returns
+    -------
+    list of bytes: The contents of each range, in the order requested
+    """
+    spans = coalesce([r for r in ranges if r[1] > r[0]], max_gap, max_span)
+    if len(spans) <= 1 or parallelism == 1:
+        data = [read(start, end) for start, end in spans]
+    else:
+        with futures.ThreadPoolExecutor(max_workers=parallelism) as executor:
+            data = list(executor.map(lambda span: read(*span), spans))
+
+    starts = [start for start, _ in spans]
+    results = []
+    for start, end in ranges:
+        if end <= start:
+            results.append(b"")
+            continue
+        # spans are sorted and disjoint: the last one starting at or before
+        # `start` contains the whole range
+        i = bisect.bisect_right(starts, start) - 1
+        offset = start - starts[i]
+        results.append(bytes(data[i][offset : offset + end - start]))
+    return results
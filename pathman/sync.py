@@ -0,0 +1,149 @@
+""" Change detection used by the `sync` mode of `pathman.copy` """
+
+import hashlib
+import math
+import os
+from typing import Optional
+
+from pathman._impl import LocalPath
+from pathman._impl.stat_cache import StatInfo
+
+#: Compare sizes, and only copy when the source is newer than the destination
+SIZE_MTIME = "size_mtime"
+#: Compare sizes and content hashes (S3 ETags / local MD5s)
+CHECKSUM = "checksum"
+
+COMPARE_MODES = (SIZE_MTIME, CHECKSUM)
+
+#: boto3's default multipart chunk size, the most likely part size of an upload
+DEFAULT_CHUNKSIZE = 8 * 2 ** 20
+
+_MB = 2 ** 20
+_READ_SIZE = 2 ** 20
+# part sizes tried when a multipart ETag was not made with `chunksize`
+_MAX_GUESSES = 4
+
+
+def local_stat(filename: str) -> StatInfo:
+    """ Build a `StatInfo` for a local file """
+    return LocalPath(filename).stat()
+
+
+def local_etag(filename: str, chunksize: Optional[int] = None) -> str:
+    """Compute the ETag S3 assigns to `filename`
+
+    Parameters
+    ----------
+    filename: str
+        Local file to hash
+    chunksize: int, optional
+        Part size of a multipart upload. If not given, the file is hashed as
+        a single-part upload (plain MD5)
+
+    Returns
+    -------
+    str: The unquoted ETag, "<md5>" or "<md5 of part md5s>-<number of parts>"
+    """
+    with open(filename, "rb") as f:
+        if chunksize is None:
+            digest = hashlib.md5()
+            for block in iter(lambda: f.read(_READ_SIZE), b""):
+                digest.update(block)
+            return digest.hexdigest()
+
+        part_digests = []
+        while True:
+            part = hashlib.md5()
+            remaining = chunksize
+            while remaining:
+                block = f.read(min(_READ_SIZE, remaining))
+                if not block:
+                    break
+                part.update(block)
+                remaining -= len(block)
+            if remaining == chunksize:
+                break
+            part_digests.append(part.digest())
+
+    combined = hashlib.md5(b"".join(part_digests)).hexdigest()
+    return "{}-{}".format(combined, len(part_digests))
+
+
+def etag_matches(filename: str, etag: str, chunksize: int = DEFAULT_CHUNKSIZE) -> bool:
+    """Check whether a local file has the given S3 ETag
+
+    Multipart ETags depend on the part size used for the upload, which S3
+    does not record. `chunksize` is tried first, then the few smallest
+    whole numbers of MiB that yield the observed number of parts.
+
+    Notes
+    -----
+    ETags of objects encrypted with SSE-KMS or SSE-C are not MD5 based and
+    never match.
+    """
+    etag = etag.strip('"')
+    if "-" not in etag:
+        return local_etag(filename) == etag
+
+    parts = int(etag.rsplit("-", 1)[1])
+    size = os.path.getsize(filename)
+    smallest = int(math.ceil(size / parts / _MB))
+    candidates = [chunksize] + [
+        mb * _MB for mb in range(smallest, smallest + _MAX_GUESSES)
+    ]
+    for candidate in candidates:
+        if candidate and int(math.ceil(size / candidate)) == parts:
+            if local_etag(filename, candidate) == etag:
+                return True
+    return False
+
+
+def is_unchanged(
+    src: StatInfo,
+    dest: Optional[StatInfo],
+    compare: str = SIZE_MTIME,
+    src_file: Optional[str] = None,
+    dest_file: Optional[str] = None,
+    chunksize: Optional[int] = None,
+) -> bool:
+    """Decide whether `dest` already holds the content of `src`
+
+    Parameters
+    ----------
+    src: StatInfo
+        Metadata of the source object
+    dest: StatInfo, optional
+        Metadata of the destination object, None if it does not exist
+    compare: str, optional
+        `SIZE_MTIME` or `CHECKSUM`
+    src_file, dest_file: str, optional
+        Local filename of the source / destination, needed to hash local
+        files in `CHECKSUM` mode
+    chunksize: int, optional
+        Multipart chunk size used for uploads, see `etag_matches`
+
+    Returns
+    -------
+    bool: True if the transfer can be skipped
+    """
+    if compare not in COMPARE_MODES:
+        raise ValueError("compare must be one of {}".format(COMPARE_MODES))
+    if dest is None or src.size != dest.size:
+        return False
+
+    if compare == SIZE_MTIME:
+        if src.last_modified is None or dest.last_modified is None:
+            return False
+        # S3 timestamps have one second resolution
+        return src.last_modified.replace(microsecond=0) <= dest.last_modified
+
+    chunksize = chunksize or DEFAULT_CHUNKSIZE
+    if src.etag and dest.etag:
+        return src.etag.strip('"') == dest.etag.strip('"')
+    if src.etag and dest_file is not None:
+        return etag_matches(dest_file, src.etag, chunksize)
+    if dest.etag and src_file is not None:
+        return etag_matches(src_file, dest.etag, chunksize)
+    if src_file is not None and dest_file is not None:
+        return local_etag(src_file) == local_etag(dest_file)
+    return False
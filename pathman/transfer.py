@@ -0,0 +1,467 @@
+""" Concurrent transfer machinery shared by the copy functions """
+import functools
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from concurrent import futures
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+
+from pathman.exc import ChecksumMismatch, PathmanException, TransferError
+from pathman.limits import THROTTLING_ERRORS
+
+T = TypeVar("T")
+
+#: Items listed ahead of the workers by default: two S3 listing pages
+DEFAULT_QUEUE_SIZE = 2000
+
+#: `on_error` modes: stop at the first file that fails for good, or go on
+#: with the other files and report every failure at the end
+FAIL_FAST = "fail_fast"
+BEST_EFFORT = "best_effort"
+ON_ERROR_MODES = (FAIL_FAST, BEST_EFFORT)
+
+#: Outcomes of a file in a `TransferReport`
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+# S3 error codes worth retrying, besides throttling
+_TRANSIENT_ERRORS = THROTTLING_ERRORS | {
+    "InternalError",
+    "RequestTimeout",
+    "ServiceUnavailable",
+}
+_TRANSIENT_STATUSES = (500, 502, 503, 504)
+
+_DONE = object()
+_POLL_INTERVAL = 0.1
+
+
+def default_parallelism() -> int:
+    """ Worker count used when none is given (the `ThreadPoolExecutor` default) """
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class TransferStats(object):
+    """ Aggregate counters for a transfer """
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.deleted = 0
+        #: (path, reason) of every file that could not be transferred or removed
+        self.failed: List[Tuple[str, str]] = []
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            "{}(files={}, bytes={}, skipped={}, deleted={}, "
+            "failed={}, seconds={:.3f}, files_per_second={:.1f}, "
+            "bytes_per_second={:.0f})".format(
+                type(self).__name__,
+                self.files,
+                self.bytes,
+                self.skipped,
+                self.deleted,
+                len(self.failed),
+                self.seconds,
+                self.files_per_second,
+                self.bytes_per_second,
+            )
+        )
+
+    def add(self, nbytes: int) -> None:
+        """ Record one transferred file of `nbytes` bytes """
+        with self._lock:
+            self.files += 1
+            self.bytes += nbytes
+
+    def skip(self) -> None:
+        """ Record one file left alone because the destination was up to date """
+        with self._lock:
+            self.skipped += 1
+
+    def delete(self, count: int = 1) -> None:
+        """ Record `count` removed files """
+        with self._lock:
+            self.deleted += count
+
+    def fail(self, path: str, reason: str) -> None:
+        """ Record a file that could not be removed """
+        with self._lock:
+            self.failed.append((path, reason))
+
+    def raise_for_failures(self) -> None:
+        """ Raise a `PathmanException` if any removal failed """
+        if self.failed:
+            raise PathmanException(
+                "failed to remove {} files, first error: {}: {}".format(
+                    len(self.failed), *self.failed[0]
+                )
+            )
+
+    def finish(self) -> "TransferStats":
+        self.finished = time.monotonic()
+        return self
+
+    @property
+    def seconds(self) -> float:
+        """ Wall-clock duration of the transfer so far """
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+
+class TransferResult(object):
+    """ The outcome of one file of a transfer """
+
+    __slots__ = ("key", "status", "bytes", "seconds", "retries", "error")
+
+    def __init__(
+        self,
+        key: str,
+        status: str,
+        nbytes: int = 0,
+        seconds: float = 0.0,
+        retries: int = 0,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        #: the file, relative to the copied directory
+        self.key = key
+        #: `DONE`, `SKIPPED` or `FAILED`
+        self.status = status
+        self.bytes = nbytes
+        #: time spent on the file, retries and their waits included
+        self.seconds = seconds
+        self.retries = retries
+        #: the last error, for a failed file
+        self.error = error
+
+    def __repr__(self) -> str:
+        return "TransferResult(key={!r}, status={!r}, bytes={}, retries={})".format(
+            self.key, self.status, self.bytes, self.retries
+        )
+
+
+class TransferReport(TransferStats):
+    """Counters of a transfer, and the outcome of each of its files
+
+    Failed files are listed in `failed` as well, with the last error.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        #: a `TransferResult` per file, in the order they finished
+        self.results: List[TransferResult] = []
+        #: retries over all files
+        self.retries = 0
+
+    def record(self, result: TransferResult) -> None:
+        """ Record the outcome of a file """
+        with self._lock:
+            self.results.append(result)
+            self.retries += result.retries
+            if result.status == DONE:
+                self.files += 1
+                self.bytes += result.bytes
+            elif result.status == SKIPPED:
+                self.skipped += 1
+            else:
+                self.failed.append((result.key, str(result.error)))
+
+    @property
+    def failures(self) -> List[TransferResult]:
+        """ The results of the files that failed """
+        return [result for result in self.results if result.status == FAILED]
+
+    def raise_for_failures(self) -> None:
+        """ Raise a `TransferError` if any file failed """
+        if self.failed:
+            failures = self.failures
+            raise TransferError(self) from (failures[0].error if failures else None)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether `exc` may go away when the transfer is tried again
+
+    Connection errors and timeouts, S3 server errors and throttling, and
+    downloads that do not match their checksum are. The exceptions `exc`
+    was raised from are looked at too, as boto3 wraps some errors.
+    """
+    seen = set()
+    error: Optional[BaseException] = exc
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(
+            error, (ConnectionError, TimeoutError, socket.timeout, ChecksumMismatch)
+        ):
+            return True
+        if _is_transient_botocore_error(error):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _is_transient_botocore_error(exc: BaseException) -> bool:
+    try:
+        from botocore import exceptions  # type: ignore
+    except ImportError:
+        return False
+    if isinstance(
+        exc,
+        (
+            exceptions.ConnectionError,
+            exceptions.HTTPClientError,
+            exceptions.IncompleteReadError,
+        ),
+    ):
+        return True
+    if isinstance(exc, exceptions.ClientError):
+        code = exc.response.get("Error", {}).get("Code")
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return code in _TRANSIENT_ERRORS or status in _TRANSIENT_STATUSES
+    return False
+
+
+class RetryPolicy(object):
+    """How often, and after how long, a failed file is transferred again
+
+    botocore retries single requests already; this retries a whole file,
+    e.g. after a connection reset in the middle of a download, or once
+    botocore gave up on a throttled request. Retry `n` waits a random time
+    up to `backoff * 2 ** (n - 1)` seconds, capped by `max_backoff`, so that
+    workers failing together do not retry together.
+
+    Parameters
+    ----------
+    attempts: int, optional
+        Transfers of a file at most, the first one included
+    backoff: float, optional
+        Longest wait before the first retry, in seconds
+    max_backoff: float, optional
+        Longest wait before any retry, in seconds
+    retryable: callable, optional
+        Whether an exception is worth a retry, `is_transient` by default
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 20.0,
+        retryable: Optional[Callable[[BaseException], bool]] = None,
+    ) -> None:
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retryable = retryable or is_transient
+
+    def delay(self, retry: int) -> float:
+        """ Seconds to wait before retry number `retry`, counted from 1 """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (retry - 1)))
+
+
+#: Used when a transfer is given no `RetryPolicy`
+DEFAULT_RETRY = RetryPolicy()
+#: Transfer every file once
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def run_transfer(
+    key: str,
+    transfer: Callable[[], Optional[int]],
+    report: TransferReport,
+    retry: Optional[RetryPolicy] = None,
+    stop: Optional[threading.Event] = None,
+) -> TransferResult:
+    """Transfer one file, retrying as `retry` allows, and record its outcome
+
+    Parameters
+    ----------
+    key: str
+        Name of the file in the report
+    transfer: callable
+        Transfers the file; returns the number of bytes transferred, or None
+        if the file was skipped
+    report: TransferReport
+        Where the outcome is recorded
+    retry: RetryPolicy, optional
+        `DEFAULT_RETRY` if not given
+    stop: threading.Event, optional
+        Once set, failures are not retried, and waits for a retry end
+
+    Returns
+    -------
+    TransferResult: the recorded outcome
+
+    Raises
+    ------
+    Exceptions other than `Exception`, e.g. `KeyboardInterrupt`, which are
+    neither retried nor recorded
+    """
+    retry = retry if retry is not None else DEFAULT_RETRY
+    started = time.monotonic()
+    retries = 0
+    while True:
+        try:
+            transferred = transfer()
+        except Exception as e:
+            if retries + 1 < retry.attempts and retry.retryable(e):
+                delay = retry.delay(retries + 1)
+                if stop is None:
+                    time.sleep(delay)
+                    retries += 1
+                    continue
+                if not stop.wait(delay):
+                    retries += 1
+                    continue
+            result = TransferResult(
+                key, FAILED, seconds=time.monotonic() - started, retries=retries, error=e
+            )
+            break
+        result = TransferResult(
+            key,
+            SKIPPED if transferred is None else DONE,
+            transferred or 0,
+            time.monotonic() - started,
+            retries,
+        )
+        break
+    report.record(result)
+    return result
+
+
+def pipeline(
+    items: Iterable[T],
+    worker: Callable[[T], Optional[int]],
+    parallelism: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    report: Optional[TransferReport] = None,
+    key: Callable[[T], str] = str,
+    retry: Optional[RetryPolicy] = None,
+    on_error: str = FAIL_FAST,
+) -> TransferReport:
+    """Run `worker` over `items` with a producer thread and a pool of workers
+
+    `items` is consumed on its own thread into a bounded queue, so a lazy
+    listing keeps running ahead of the transfers until the queue is full.
+    A fixed set of worker threads drains the queue for the whole transfer.
+
+    Each item is transferred with `run_transfer`, retried as `retry` allows.
+    An item that still fails stops the transfer with `FAIL_FAST`: the items
+    not started yet are dropped, and are not in the report. With
+    `BEST_EFFORT` every other item is transferred first.
+
+    Parameters
+    ----------
+    items: iterable
+        Work items, typically a generator over a paginated listing
+    worker: callable
+        Called once per item; returns the number of bytes transferred, or
+        None if the item was skipped
+    parallelism: int, optional
+        Number of worker threads. Defaults to the `ThreadPoolExecutor` default
+    queue_size: int, optional
+        Maximum number of items listed ahead of the workers
+    report: TransferReport, optional
+        Report to update; a new instance is created if not given
+    key: callable, optional
+        Name of an item in the report
+    retry: RetryPolicy, optional
+        Retries of failed items, `DEFAULT_RETRY` if not given
+    on_error: str, optional
+        `FAIL_FAST` or `BEST_EFFORT`
+
+    Returns
+    -------
+    TransferReport: counters and per-item outcomes of the completed transfer
+
+    Raises
+    ------
+    TransferError
+        If any item failed, with the report. The first failure is its cause
+    The exception raised while iterating `items`, or an exception other
+    than `Exception` raised by `worker`, e.g. `KeyboardInterrupt`: either
+    stops the transfer
+    """
+    if on_error not in ON_ERROR_MODES:
+        raise ValueError("on_error must be one of {}".format(ON_ERROR_MODES))
+    report = report if report is not None else TransferReport()
+    work: "queue.Queue" = queue.Queue(maxsize=queue_size or DEFAULT_QUEUE_SIZE)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                work.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(n_workers: int) -> None:
+        try:
+            for item in items:
+                if not _put(item):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+            return
+        for _ in range(n_workers):
+            _put(_DONE)
+
+    def _consume() -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    item = work.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    return
+                result = run_transfer(
+                    key(item), functools.partial(worker, item), report, retry, stop
+                )
+                if result.status == FAILED and on_error == FAIL_FAST:
+                    stop.set()
+                    return
+        except BaseException:
+            # e.g. KeyboardInterrupt: stop every worker, and raise it
+            stop.set()
+            raise
+
+    n_workers = parallelism or default_parallelism()
+    with futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+        consumers = [executor.submit(_consume) for _ in range(n_workers)]
+        producer = threading.Thread(target=_produce, args=(n_workers,), daemon=True)
+        producer.start()
+        futures.wait(consumers)
+        stop.set()
+        producer.join()
+
+    report.finish()
+    for consumer in consumers:
+        error = consumer.exception()
+        if error is not None:
+            raise error
+    if errors:
+        raise errors[0]
+    report.raise_for_failures()
+    return report
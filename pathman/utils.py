@@ -1,4 +1,7 @@
 import os
+from typing import Any, Dict
+
+_shared_kwargs: Dict[Any, Dict[str, Any]] = {}
 
 
 def is_file(abspath: str) -> bool:
@@ -18,3 +21,43 @@ def is_file(abspath: str) -> bool:
     if path_segments[-1] == "":
         return False
     return True
+
+
+def freeze(value: Any) -> Any:
+    """Convert nested dicts/lists into hashable, order-independent tuples
+
+    Parameters
+    ----------
+    value: Any
+        Value to convert
+
+    Returns
+    -------
+    A hashable equivalent of `value`
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def shared_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a canonical copy of `kwargs`, shared by all equal kwargs
+
+    Parameters
+    ----------
+    kwargs: dict
+        Keyword arguments given to a path constructor
+
+    Returns
+    -------
+    dict: A dict equal to `kwargs`. It is shared between paths and must not
+    be mutated
+    """
+    try:
+        key = freeze(kwargs)
+        return _shared_kwargs.setdefault(key, dict(kwargs))
+    except TypeError:
+        # unhashable values, fall back to a private copy
+        return dict(kwargs)
@@ -1,6 +1,10 @@
 import os
 import pytest
 
+# botocore >= 1.36 sends streaming checksums by default, which moto < 5
+# stores as part of the body of larger uploads
+os.environ.setdefault("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+
 
 @pytest.fixture(scope="function")
 def local_file():
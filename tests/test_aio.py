@@ -0,0 +1,82 @@
+import asyncio
+
+import boto3  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman.aio import AsyncPath, gather_bounded, gather_exists, gather_read
+
+
+def _run(coroutine):
+    """ `asyncio.run`, which needs Python 3.7 """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_local_roundtrip(tmp_path):
+    async def _main():
+        path = AsyncPath(str(tmp_path / "a.txt"))
+        assert not await path.exists()
+        await path.write_bytes(b"hello")
+        assert await path.is_file()
+        assert await path.read_bytes() == b"hello"
+        assert await path.read_bytes(start=1, end=3) == b"el"
+        assert [str(p) for p in await AsyncPath(str(tmp_path)).ls()] == [str(path)]
+        await path.remove()
+        assert not await path.exists()
+
+    _run(_main())
+
+
+def test_path_aio(tmp_path):
+    path = Path(str(tmp_path))
+    assert path.aio == AsyncPath(str(tmp_path))
+    assert (path.aio / "x").path == path / "x"
+
+
+@mock_s3
+def test_s3_operations():
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="aio")
+    for i in range(30):
+        s3.put_object(Bucket="aio", Key="data/{}.txt".format(i), Body=str(i).encode())
+
+    async def _main():
+        root = AsyncPath("s3://aio/data")
+        files = [p async for p in root.walk()]
+        assert len(files) == 30
+        assert sorted(await gather_read(files, limit=4)) == sorted(
+            str(i).encode() for i in range(30)
+        )
+        assert len(await root.glob("1*.txt")) == 11
+
+        await (root / "new.txt").write_bytes(b"new")
+        copied = await (root / "new.txt").copy("s3://aio/copy/new.txt")
+        assert copied.files == 1
+        assert await AsyncPath("s3://aio/copy/new.txt").read_bytes() == b"new"
+
+        await (root / "new.txt").remove()
+        assert await gather_exists(
+            ["s3://aio/data/0.txt", "s3://aio/data/new.txt"]
+        ) == [True, False]
+
+    _run(_main())
+
+
+def test_gather_bounded_limits_concurrency():
+    running = []
+    peak = []
+
+    async def _task(i):
+        running.append(i)
+        peak.append(len(running))
+        await asyncio.sleep(0.001)
+        running.remove(i)
+        return i
+
+    results = _run(gather_bounded((_task(i) for i in range(50)), limit=5))
+    assert results == list(range(50))
+    assert max(peak) == 5
@@ -0,0 +1,78 @@
+import os
+
+import boto3  # type: ignore
+import pytest
+from boto3.s3.transfer import TransferConfig  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    f = tmp_path / "data.bin"
+    f.write_bytes(b"0123456789" * 1000)
+    return str(f)
+
+
+def test_local_read_buffer(data_file):
+    buffer = Path(data_file).read_buffer()
+    assert isinstance(buffer, memoryview)
+    assert buffer.readonly
+    assert buffer[:10] == b"0123456789"
+    assert bytes(buffer) == Path(data_file).read_bytes()
+    buffer.release()
+
+
+def test_local_read_buffer_empty(tmp_path):
+    f = tmp_path / "empty.bin"
+    f.write_bytes(b"")
+    assert bytes(Path(str(f)).read_buffer()) == b""
+
+
+def test_local_open_mmap(data_file):
+    with Path(data_file).open_mmap(tempdir="/nonexistent") as mapped:
+        assert len(mapped) == 10000
+        assert mapped[-10:] == b"0123456789"
+
+
+@mock_s3
+def test_s3_read_buffer(monkeypatch):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    body = os.urandom(12 * 2 ** 20)
+    s3.put_object(Bucket="bucket", Key="buffer.bin", Body=body)
+    s3.put_object(Bucket="bucket", Key="empty.bin", Body=b"")
+
+    # force a multipart download, whose parts are written out of order
+    client = clients.get_client()
+    original = client.download_fileobj
+    config = TransferConfig(multipart_threshold=2 ** 20, multipart_chunksize=2 ** 20)
+    monkeypatch.setattr(
+        client,
+        "download_fileobj",
+        lambda *args, **kwargs: original(*args, Config=config, **kwargs),
+    )
+
+    buffer = Path("s3://bucket/buffer.bin").read_buffer()
+    assert len(buffer) == len(body)
+    assert buffer == body
+    assert Path("s3://bucket/empty.bin").read_buffer() == b""
+    with pytest.raises(FileNotFoundError):
+        Path("s3://bucket/missing.bin").read_buffer()
+
+
+@mock_s3
+def test_s3_open_mmap(tmp_path):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    s3.put_object(Bucket="bucket", Key="mapped.bin", Body=b"abc" * 1000)
+
+    with Path("s3://bucket/mapped.bin").open_mmap(tempdir=str(tmp_path)) as mapped:
+        assert mapped[:6] == b"abcabc"
+        assert len(mapped) == 3000
+    # the temporary file is gone as soon as it is mapped
+    assert os.listdir(str(tmp_path)) == []
+    with pytest.raises(FileNotFoundError):
+        Path("s3://bucket/missing.bin").open_mmap()
@@ -0,0 +1,67 @@
+from concurrent import futures
+
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman._impl import S3Path, clients
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    clients.clear()
+    yield
+    clients.clear()
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ({}, {"anon": False}),
+        ({"profile_name": "dev"}, {"profile": "dev"}),
+        (
+            {"endpoint_url": "http://localhost:5000"},
+            {"client_kwargs": {"endpoint_url": "http://localhost:5000"}},
+        ),
+        (
+            {"client_kwargs": {"region_name": "us-east-1", "endpoint_url": "x"}},
+            {"client_kwargs": {"endpoint_url": "x", "region_name": "us-east-1"}},
+        ),
+    ],
+)
+def test_normalize_kwargs_equivalent(first, second):
+    assert clients.normalize_kwargs(first) == clients.normalize_kwargs(second)
+
+
+def test_normalize_kwargs_distinguishes_anon():
+    assert clients.normalize_kwargs({"anon": True}) != clients.normalize_kwargs({})
+
+
+@mock_s3
+def test_paths_share_filesystem():
+    parent = S3Path("s3://test-bucket/dir")
+    child = parent.join("file.txt")
+    other = S3Path("s3://other-bucket/file.txt", anon=False)
+    assert parent._path is child._path is other._path
+    assert S3Path("s3://test-bucket", anon=True)._path is not parent._path
+
+
+@mock_s3
+def test_get_client_is_shared_across_threads():
+    with futures.ThreadPoolExecutor(max_workers=8) as executor:
+        found = list(executor.map(lambda _: clients.get_client(), range(32)))
+    assert all(c is found[0] for c in found)
+    assert hasattr(found[0], "upload_file")
+
+
+@mock_s3
+def test_registry_reset_after_fork():
+    fs = clients.get_filesystem()
+    clients._reset_after_fork()
+    assert clients.get_filesystem() is not fs
+
+
+def test_nested_kwargs_keep_their_type():
+    extra = {"ServerSideEncryption": "AES256"}
+    fs = clients.get_filesystem(s3_additional_kwargs=extra)
+    assert fs.s3_additional_kwargs == extra
+    assert clients.get_filesystem(s3_additional_kwargs=dict(extra)) is fs
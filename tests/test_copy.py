@@ -1,15 +1,26 @@
 import os
+import functools
 import random
 import string
 import shutil
+import threading
+from pkg_resources import resource_filename
 
 import boto3  # type: ignore
+import pytest
+from botocore.awsrequest import AWSResponse  # type: ignore
+from botocore.config import Config  # type: ignore
+from botocore.exceptions import ClientError  # type: ignore
 from moto import mock_s3  # type: ignore
 
 from pathman.path import Path
-from pathman._impl import S3Path, LocalPath
+from pathman._impl import S3Path, LocalPath, clients, filecopy
 
-from pathman.copy import copy_local_s3, copy_s3_local, copy
+from pathman.copy import copy_local_s3, copy_s3_local, copy_s3_s3, copy
+from pathman.exc import TransferError, UnsupportedCopyOperation
+from pathman.transfer import RetryPolicy
+
+data = functools.partial(resource_filename, "tests.resources")
 
 
 def random_bucket() -> str:
@@ -22,6 +33,7 @@ def test_copy_local_s3(local_file):
     bucket = random_bucket()
     s3.create_bucket(Bucket=bucket)
     remote_file = S3Path("{}/test.py".format(bucket))
+    assert not remote_file.exists()
     copy_local_s3(LocalPath(local_file), remote_file)
     assert remote_file.exists()
 
@@ -95,3 +107,412 @@ def test_copy_s3_local_recursive(local_file, local_dir):
 
     finally:
         shutil.rmtree(root_path, ignore_errors=True)
+
+
+@mock_s3
+def test_copy_s3_local_recursive_stats(local_file, local_dir):
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+
+    s3.create_bucket(Bucket=bucket)
+    for i in range(25):
+        s3.put_object(Bucket=bucket, Key="basedir/{}/file.txt".format(i), Body=b"abc")
+    s3.put_object(Bucket=bucket, Key="basedir/", Body=b"")
+    s3.put_object(Bucket=bucket, Key="basedir-sibling/file.txt", Body=b"abc")
+
+    root_path = Path(os.path.join(local_dir, "basedir"))
+    try:
+        stats = copy_s3_local(
+            S3Path("s3://{}/basedir".format(bucket)),
+            root_path,
+            parallelism=4,
+            queue_size=3,
+        )
+        assert stats.files == 25
+        assert stats.bytes == 75
+        assert (root_path / "24" / "file.txt").read_text() == "abc"
+        assert not Path(os.path.join(local_dir, "basedir-sibling")).exists()
+    finally:
+        shutil.rmtree(root_path, ignore_errors=True)
+
+
+@mock_s3
+def test_copy_local_s3_recursive():
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+
+    src = Path(data("folder"))
+    dest = Path("s3://{}/uploaded".format(bucket))
+    stats = copy(src, dest, parallelism=2, multipart_threshold=5 * 2 ** 20)
+
+    assert stats.files == 2
+    assert stats.bytes == sum(os.path.getsize(str(f)) for f in src.walk())
+    assert (dest / "file1.txt").read_text() == (src / "file1.txt").read_text()
+    assert (dest / "file2.txt").exists()
+
+
+@mock_s3
+def test_copy_local_s3_file_to_prefix(local_file):
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+
+    copy(Path(local_file), Path("s3://{}/".format(bucket)))
+    name = os.path.basename(local_file)
+    assert Path("s3://{}/{}".format(bucket, name)).exists()
+
+
+@mock_s3
+def test_copy_s3_s3_file():
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+    s3.put_object(Bucket=bucket, Key="src/file.txt", Body=b"hello")
+
+    src = Path("s3://{}/src/file.txt".format(bucket))
+    stats = copy(src, Path("s3://{}/dest/".format(bucket)))
+    assert stats.bytes == 5
+    assert Path("s3://{}/dest/file.txt".format(bucket)).read_bytes() == b"hello"
+
+
+@mock_s3
+def test_copy_s3_s3_extensionless_object():
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+    s3.put_object(Bucket=bucket, Key="data/README", Body=b"hello")
+
+    stats = copy(
+        Path("s3://{}/data/README".format(bucket)),
+        Path("s3://{}/dest/".format(bucket)),
+    )
+    assert (stats.files, stats.bytes) == (1, 5)
+    assert Path("s3://{}/dest/README".format(bucket)).read_bytes() == b"hello"
+
+
+@mock_s3
+def test_copy_s3_local_extensionless_object(tmp_path):
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+    s3.put_object(Bucket=bucket, Key="data/README", Body=b"hello")
+
+    stats = copy(
+        Path("s3://{}/data/README".format(bucket)), Path(str(tmp_path / "README"))
+    )
+    assert (stats.files, stats.bytes) == (1, 5)
+    assert (tmp_path / "README").read_bytes() == b"hello"
+
+
+@mock_s3
+def test_copy_s3_s3_prefix():
+    s3 = boto3.client("s3")
+    src_bucket, dest_bucket = random_bucket(), random_bucket()
+    s3.create_bucket(Bucket=src_bucket)
+    s3.create_bucket(Bucket=dest_bucket)
+    for i in range(20):
+        s3.put_object(Bucket=src_bucket, Key="src/{}/f.txt".format(i), Body=b"abc")
+    s3.put_object(Bucket=src_bucket, Key="src-other/f.txt", Body=b"abc")
+
+    dest = S3Path("s3://{}/dest".format(dest_bucket))
+    assert not dest.exists()
+    stats = copy_s3_s3(
+        S3Path("s3://{}/src".format(src_bucket)), dest, parallelism=4, queue_size=2
+    )
+    assert stats.files == 20
+    assert dest.exists()
+    keys = [
+        o["Key"] for o in s3.list_objects_v2(Bucket=dest_bucket)["Contents"]
+    ]
+    assert sorted(keys) == sorted("dest/{}/f.txt".format(i) for i in range(20))
+
+
+@mock_s3
+def test_copy_s3_s3_multipart():
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+    body = os.urandom(12 * 2 ** 20)
+    s3.put_object(Bucket=bucket, Key="big.bin", Body=body)
+
+    copy_s3_s3(
+        S3Path("s3://{}/big.bin".format(bucket)),
+        S3Path("s3://{}/copy.bin".format(bucket)),
+        multipart_threshold=5 * 2 ** 20,
+        multipart_chunksize=5 * 2 ** 20,
+    )
+    copied = s3.get_object(Bucket=bucket, Key="copy.bin")
+    assert copied["Body"].read() == body
+    # multipart copies have an ETag suffixed with the number of parts
+    assert copied["ETag"].strip('"').endswith("-3")
+
+
+def _write_tree(root, count):
+    for i in range(count):
+        os.makedirs(os.path.join(str(root), str(i)), exist_ok=True)
+        with open(os.path.join(str(root), str(i), "f.txt"), "w") as f:
+            f.write("abc")
+
+
+@mock_s3
+def test_copy_local_s3_sync(tmp_path):
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+    _write_tree(tmp_path, 10)
+    src, dest = Path(str(tmp_path)), Path("s3://{}/dest".format(bucket))
+
+    assert copy(src, dest, sync=True).files == 10
+    stats = copy(src, dest, sync=True)
+    assert (stats.files, stats.skipped) == (0, 10)
+
+    (tmp_path / "3" / "f.txt").write_text("abcd")
+    s3.put_object(Bucket=bucket, Key="dest/extra.txt", Body=b"x")
+    stats = copy(src, dest, sync=True, delete=True)
+    assert (stats.files, stats.skipped, stats.deleted) == (1, 9, 1)
+    assert (dest / "3" / "f.txt").read_text() == "abcd"
+    assert not (dest / "extra.txt").exists()
+
+
+@mock_s3
+def test_copy_s3_s3_sync_checksum():
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+    for i in range(10):
+        s3.put_object(Bucket=bucket, Key="src/{}.txt".format(i), Body=b"abc")
+    src, dest = Path("s3://{}/src".format(bucket)), Path("s3://{}/dest".format(bucket))
+
+    assert copy(src, dest, sync=True, compare="checksum").files == 10
+    # same size, different content
+    s3.put_object(Bucket=bucket, Key="src/0.txt", Body=b"xyz")
+    stats = copy(src, dest, sync=True, compare="checksum")
+    assert (stats.files, stats.skipped) == (1, 9)
+    assert (dest / "0.txt").read_bytes() == b"xyz"
+
+
+@mock_s3
+def test_copy_s3_local_sync(tmp_path):
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+    for i in range(10):
+        s3.put_object(Bucket=bucket, Key="src/{}/f.txt".format(i), Body=b"abc")
+    src = Path("s3://{}/src".format(bucket))
+    dest = tmp_path / "dest"
+
+    assert copy(src, Path(str(dest)), sync=True).files == 10
+    (dest / "extra.txt").write_text("x")
+    (dest / "5" / "f.txt").write_text("abcd")
+    stats = copy(src, Path(str(dest)), sync=True, delete=True)
+    assert (stats.files, stats.skipped, stats.deleted) == (1, 9, 1)
+    assert (dest / "5" / "f.txt").read_text() == "abc"
+    assert not (dest / "extra.txt").exists()
+
+    stats = copy(src, Path(str(dest)), sync=True, compare="checksum")
+    assert (stats.files, stats.skipped) == (0, 10)
+
+
+@mock_s3
+def test_copy_sync_single_file(local_file):
+    s3 = boto3.client("s3")
+    bucket = random_bucket()
+    s3.create_bucket(Bucket=bucket)
+    dest = Path("s3://{}/".format(bucket))
+
+    assert copy(Path(local_file), dest, sync=True).files == 1
+    stats = copy(Path(local_file), dest, sync=True, compare="checksum")
+    assert (stats.files, stats.skipped) == (0, 1)
+
+
+def test_copy_sync_options():
+    with pytest.raises(ValueError):
+        copy_s3_local(S3Path("s3://bucket/key"), LocalPath("/tmp"), compare="md5")
+    with pytest.raises(ValueError):
+        copy_s3_local(S3Path("s3://bucket/key"), LocalPath("/tmp"), delete=True)
+
+
+def _tree(root, count=10):
+    for i in range(count):
+        (root / str(i % 3)).mkdir(parents=True, exist_ok=True)
+        (root / str(i % 3) / "{}.txt".format(i)).write_bytes(str(i).encode() * 1000)
+
+
+def test_copy_local_local_tree(tmp_path):
+    _tree(tmp_path / "src")
+    (tmp_path / "src" / "0" / "0.txt").chmod(0o600)
+    stats = copy(Path(str(tmp_path / "src")), Path(str(tmp_path / "dest")))
+    assert (stats.files, stats.bytes) == (10, 10 * 1000)
+    for i in range(10):
+        relative = os.path.join(str(i % 3), "{}.txt".format(i))
+        source = tmp_path / "src" / relative
+        assert (tmp_path / "dest" / relative).read_bytes() == source.read_bytes()
+    assert (tmp_path / "dest" / "0" / "0.txt").stat().st_mode & 0o777 == 0o600
+
+
+def test_copy_local_local_file(tmp_path):
+    _tree(tmp_path / "src", 1)
+    source = Path(str(tmp_path / "src" / "0" / "0.txt"))
+    (tmp_path / "dest").mkdir()
+
+    stats = copy(source, Path(str(tmp_path / "dest")))
+    assert (stats.files, stats.bytes) == (1, 1000)
+    stats = copy(source, Path(str(tmp_path / "dest" / "renamed.txt")))
+    assert (tmp_path / "dest" / "renamed.txt").read_bytes() == b"0" * 1000
+
+    stats = copy(source, Path(str(tmp_path / "dest")), sync=True)
+    assert (stats.files, stats.skipped) == (0, 1)
+    with pytest.raises(UnsupportedCopyOperation):
+        copy(source, source)
+    assert source.read_bytes() == b"0" * 1000
+
+
+def test_copy_local_local_sync(tmp_path):
+    _tree(tmp_path / "src")
+    src = Path(str(tmp_path / "src"))
+    dest = tmp_path / "dest"
+
+    assert copy(src, Path(str(dest)), sync=True).files == 10
+    (dest / "extra.txt").write_text("x")
+    (dest / "1" / "1.txt").write_text("changed")
+    stats = copy(src, Path(str(dest)), sync=True, delete=True)
+    assert (stats.files, stats.skipped, stats.deleted) == (1, 9, 1)
+    assert (dest / "1" / "1.txt").read_bytes() == b"1" * 1000
+    assert not (dest / "extra.txt").exists()
+
+    stats = copy(src, Path(str(dest)), sync=True, compare="checksum")
+    assert (stats.files, stats.skipped) == (0, 10)
+
+
+def test_copy_local_local_into_itself(tmp_path):
+    _tree(tmp_path / "src")
+    with pytest.raises(UnsupportedCopyOperation):
+        copy(Path(str(tmp_path / "src")), Path(str(tmp_path / "src" / "copy")))
+    assert not (tmp_path / "src" / "copy").exists()
+
+
+class _Raw(object):
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+class FailingRequests(object):
+    """Answer the `method` requests for some keys of a client with S3 errors
+
+    `failures` maps each key to the number of requests answered with `code`
+    before the requests are let through.
+    """
+
+    def __init__(self, client, failures, code="SlowDown", status=503, method="GET"):
+        self.failures = dict(failures)
+        self.code = code
+        self.status = status
+        self.method = method
+        self._lock = threading.Lock()
+        client.meta.events.register_first("before-send.s3", self._send)
+
+    def _send(self, request, **kwargs):
+        if request.method != self.method:
+            return None
+        path = request.url.split("?")[0]
+        with self._lock:
+            for key, remaining in self.failures.items():
+                if remaining and path.endswith("/" + key):
+                    self.failures[key] -= 1
+                    body = "<Error><Code>{}</Code><Message>injected</Message></Error>"
+                    return AWSResponse(
+                        request.url,
+                        self.status,
+                        {},
+                        _Raw(body.format(self.code).encode()),
+                    )
+        return None
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    with mock_s3():
+        clients.clear()
+        # no retries by botocore: every injected error reaches the copy
+        client = boto3.client("s3", config=Config(retries={"max_attempts": 0}))
+        client.create_bucket(Bucket="bucket")
+        for i in range(10):
+            client.put_object(Bucket="bucket", Key="src/{}.bin".format(i), Body=b"abc")
+        monkeypatch.setattr(clients, "get_client", lambda **kwargs: client)
+        yield client
+    clients.clear()
+
+
+def test_copy_retries_transient_errors(s3, tmp_path):
+    FailingRequests(s3, {"src/3.bin": 2, "src/7.bin": 1})
+    report = copy(
+        Path("s3://bucket/src"),
+        Path(str(tmp_path / "dest")),
+        retry=RetryPolicy(backoff=0),
+    )
+    assert (report.files, report.bytes, report.retries) == (10, 30, 3)
+    retried = {result.key: result.retries for result in report.results}
+    assert retried["3.bin"] == 2 and retried["7.bin"] == 1
+    assert all(result.seconds >= 0 for result in report.results)
+    assert (tmp_path / "dest" / "3.bin").read_bytes() == b"abc"
+
+
+def test_copy_best_effort(s3, tmp_path):
+    FailingRequests(s3, {"src/3.bin": 10, "src/7.bin": 10}, "AccessDenied", 403)
+    with pytest.raises(TransferError, match="AccessDenied") as e:
+        copy(
+            Path("s3://bucket/src"),
+            Path(str(tmp_path / "dest")),
+            on_error="best_effort",
+        )
+    assert isinstance(e.value.__cause__, ClientError)
+    report = e.value.report
+    assert report.files == 8
+    assert sorted(result.key for result in report.failures) == ["3.bin", "7.bin"]
+    # not transient: not retried
+    assert report.retries == 0
+    assert sorted(os.listdir(str(tmp_path / "dest"))) == sorted(
+        "{}.bin".format(i) for i in range(10) if i not in (3, 7)
+    )
+
+
+def test_copy_fail_fast(s3, tmp_path):
+    FailingRequests(s3, {"src/0.bin": 10}, "AccessDenied", 403)
+    with pytest.raises(TransferError) as e:
+        copy(Path("s3://bucket/src"), Path(str(tmp_path / "dest")), parallelism=1)
+    # keys are listed in order: the first one failed, the others were cancelled
+    assert [result.key for result in e.value.report.results] == ["0.bin"]
+    assert os.listdir(str(tmp_path / "dest")) == []
+
+
+def test_copy_file_retries(s3, tmp_path):
+    filename = tmp_path / "file.bin"
+    filename.write_bytes(b"data")
+    FailingRequests(s3, {"dest/file.bin": 1}, method="PUT")
+    report = copy(
+        Path(str(filename)), Path("s3://bucket/dest/"), retry=RetryPolicy(backoff=0)
+    )
+    assert (report.files, report.retries) == (1, 1)
+    assert report.results[0].key == "file.bin"
+    assert Path("s3://bucket/dest/file.bin").read_bytes() == b"data"
+
+    FailingRequests(s3, {"dest/file.bin": 2}, method="PUT")
+    with pytest.raises(TransferError, match="SlowDown"):
+        copy(Path(str(filename)), Path("s3://bucket/dest/"), retry=RetryPolicy(1))
+
+
+def test_copy_interrupted(tmp_path, monkeypatch):
+    def _interrupt(src, dest):
+        raise KeyboardInterrupt()
+
+    (tmp_path / "a.txt").write_bytes(b"a")
+    monkeypatch.setattr(filecopy, "copy_file", _interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        copy(Path(str(tmp_path / "a.txt")), Path(str(tmp_path / "b.txt")))
+    _tree(tmp_path / "src")
+    with pytest.raises(KeyboardInterrupt):
+        copy(Path(str(tmp_path / "src")), Path(str(tmp_path / "dest")))
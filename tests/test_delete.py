@@ -0,0 +1,114 @@
+import os
+
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+from pathman.exc import PathmanException
+
+
+def _populate(s3, bucket, count, prefix="tmp"):
+    s3.create_bucket(Bucket=bucket)
+    for i in range(count):
+        s3.put_object(Bucket=bucket, Key="{}/{}/f.txt".format(prefix, i), Body=b"x")
+
+
+def _keys(s3, bucket):
+    return [o["Key"] for o in s3.list_objects_v2(Bucket=bucket).get("Contents", [])]
+
+
+@mock_s3
+def test_remove_many_s3():
+    s3 = boto3.client("s3")
+    _populate(s3, "bucket", 25)
+    s3.put_object(Bucket="bucket", Key="keep.txt", Body=b"x")
+
+    seen = []
+    stats = Path.remove_many(
+        Path("s3://bucket/tmp").walk(),
+        parallelism=2,
+        batch_size=10,
+        progress=lambda s: seen.append(s.deleted),
+    )
+    assert stats.deleted == 25
+    assert not stats.failed
+    assert len(seen) == 3
+    assert seen[-1] == 25
+    assert _keys(s3, "bucket") == ["keep.txt"]
+    assert not Path("s3://bucket/tmp/0/f.txt").exists()
+
+
+@mock_s3
+def test_remove_many_mixed(tmp_path):
+    s3 = boto3.client("s3")
+    _populate(s3, "bucket", 3)
+    (tmp_path / "a.txt").write_text("a")
+
+    stats = Path.remove_many(
+        [
+            "s3://bucket/tmp/0/f.txt",
+            Path("s3://bucket/tmp/1/f.txt"),
+            str(tmp_path / "a.txt"),
+            str(tmp_path / "missing.txt"),
+        ]
+    )
+    assert stats.deleted == 3
+    assert [path for path, _ in stats.failed] == [str(tmp_path / "missing.txt")]
+    assert _keys(s3, "bucket") == ["tmp/2/f.txt"]
+    assert not os.path.exists(str(tmp_path / "a.txt"))
+    with pytest.raises(PathmanException):
+        stats.raise_for_failures()
+
+
+@mock_s3
+def test_remove_many_reports_per_key_errors(monkeypatch):
+    s3 = boto3.client("s3")
+    _populate(s3, "bucket", 4)
+    client = clients.get_client()
+    original = client.delete_objects
+
+    def _partial_failure(**kwargs):
+        response = original(**kwargs)
+        response["Errors"] = [
+            {"Key": "tmp/1/f.txt", "Code": "AccessDenied", "Message": "Access Denied"}
+        ]
+        return response
+
+    monkeypatch.setattr(client, "delete_objects", _partial_failure)
+    stats = Path.remove_many(Path("s3://bucket/tmp").walk())
+    assert stats.deleted == 3
+    assert stats.failed == [
+        ("s3://bucket/tmp/1/f.txt", "AccessDenied: Access Denied")
+    ]
+
+
+def test_remove_many_batch_size():
+    with pytest.raises(ValueError):
+        Path.remove_many([], batch_size=1001)
+
+
+@mock_s3
+def test_rmdir_recursive_removes_markers():
+    s3 = boto3.client("s3")
+    _populate(s3, "bucket", 5)
+    s3.put_object(Bucket="bucket", Key="tmp/", Body=b"")
+    s3.put_object(Bucket="bucket", Key="tmp-other/f.txt", Body=b"x")
+
+    path = Path("s3://bucket/tmp")
+    assert path.exists()
+    path.rmdir(recursive=True)
+    assert not path.exists()
+    assert _keys(s3, "bucket") == ["tmp-other/f.txt"]
+
+    with pytest.raises(FileNotFoundError):
+        path.rmdir(recursive=True)
+
+
+@mock_s3
+def test_rmdir_recursive_bucket():
+    s3 = boto3.client("s3")
+    _populate(s3, "bucket", 5)
+    Path("s3://bucket").rmdir(recursive=True)
+    assert "bucket" not in [b["Name"] for b in s3.list_buckets()["Buckets"]]
@@ -0,0 +1,113 @@
+import os
+
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import disk_cache
+
+
+@pytest.fixture
+def bucket():
+    with mock_s3():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="cached")
+        yield s3
+
+
+def _cache_files(directory):
+    return [
+        os.path.join(root, f)
+        for root, _, files in os.walk(str(directory))
+        for f in files
+        if not f.startswith(".")
+    ]
+
+
+def test_read_through(bucket, tmp_path):
+    bucket.put_object(Bucket="cached", Key="a.txt", Body=b"hello")
+    path = Path("s3://cached/a.txt", cache_dir=str(tmp_path))
+    cache = disk_cache.get(str(tmp_path))
+
+    assert path.read_bytes() == b"hello"
+    assert path.read_text() == "hello"
+    with path.open("rb") as f:
+        f.seek(1)
+        assert f.read(2) == b"el"
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 1,
+        "bytes_saved": 10,
+        "evictions": 0,
+    }
+    assert len(_cache_files(tmp_path)) == 1
+
+
+def test_changed_object_is_refetched(bucket, tmp_path):
+    bucket.put_object(Bucket="cached", Key="b.txt", Body=b"old")
+    path = Path("s3://cached/b.txt", cache_dir=str(tmp_path))
+    assert path.read_bytes() == b"old"
+
+    # changed behind pathman's back: the conditional request notices
+    bucket.put_object(Bucket="cached", Key="b.txt", Body=b"new!")
+    assert path.read_bytes() == b"new!"
+    assert disk_cache.get(str(tmp_path)).stats()["misses"] == 2
+    assert len(_cache_files(tmp_path)) == 1
+
+
+def test_eviction(bucket, tmp_path):
+    for i in range(5):
+        bucket.put_object(Bucket="cached", Key="{}.bin".format(i), Body=b"x" * 100)
+    cache = disk_cache.get(str(tmp_path / "small"), max_size=250)
+    for i in range(5):
+        Path("s3://cached/{}.bin".format(i), cache_dir=cache.directory).read_bytes()
+    assert cache.stats()["evictions"] == 3
+    assert sum(os.path.getsize(f) for f in _cache_files(cache.directory)) <= 250
+
+
+def test_object_larger_than_cache(bucket, tmp_path):
+    bucket.put_object(Bucket="cached", Key="big.bin", Body=b"x" * 100)
+    path = Path("s3://cached/big.bin", cache_dir=str(tmp_path), cache_size=10)
+    assert path.read_bytes() == b"x" * 100
+    assert _cache_files(tmp_path) == []
+
+
+def test_missing_object(bucket, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Path("s3://cached/missing.txt", cache_dir=str(tmp_path)).read_bytes()
+
+
+def test_default_cache(bucket, tmp_path, monkeypatch):
+    bucket.put_object(Bucket="cached", Key="c.txt", Body=b"abc")
+    monkeypatch.setenv(disk_cache.CACHE_DIR_ENV, str(tmp_path / "env"))
+    monkeypatch.setattr(disk_cache, "_default", None)
+    assert Path("s3://cached/c.txt").read_bytes() == b"abc"
+    assert len(_cache_files(tmp_path / "env")) == 1
+
+    disk_cache.configure(str(tmp_path / "configured"))
+    assert Path("s3://cached/c.txt").read_bytes() == b"abc"
+    assert len(_cache_files(tmp_path / "configured")) == 1
+    # opting out per path
+    assert Path("s3://cached/c.txt", cache_dir=False)._impl._disk_cache is None
+
+    disk_cache.configure(None)
+    assert Path("s3://cached/c.txt")._impl._disk_cache is None
+
+
+def test_cache_sizes(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "_default", None)
+    disk_cache.configure(str(tmp_path / "default"), max_size=1000)
+    # an explicit size is not replaced by the default's
+    assert disk_cache.get(max_size=500).max_size == 500
+    assert disk_cache.get().max_size == 500
+    with pytest.raises(ValueError):
+        disk_cache.get(max_size=2000)
+    with pytest.raises(ValueError):
+        disk_cache.get(str(tmp_path / "default"), max_size=2000)
+
+    disk_cache.configure(str(tmp_path / "other"), max_size=1000)
+    assert disk_cache.get().max_size == 1000
+    assert disk_cache.get(str(tmp_path / "third")).max_size == (
+        disk_cache.DEFAULT_MAX_SIZE
+    )
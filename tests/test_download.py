@@ -0,0 +1,190 @@
+import json
+import os
+
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import download
+from pathman._impl.multipart import MIN_PART_SIZE, MultipartWriter
+from pathman.copy import copy_s3_local
+from pathman.exc import ChecksumMismatch
+
+DATA = os.urandom(100000)
+CHUNK = 8192
+
+
+class FlakyClient(object):
+    """ An S3 client recording ranged GETs, failing or corrupting some """
+
+    def __init__(self, s3, fail_at=None, corrupt=False):
+        self.s3 = s3
+        self.fail_at = fail_at
+        self.corrupt = corrupt
+        self.ranges = []
+
+    def get_object(self, **kwargs):
+        start = int(kwargs["Range"][len("bytes=") :].split("-")[0])
+        self.ranges.append(start)
+        if start == self.fail_at:
+            raise IOError("connection reset")
+        response = self.s3.get_object(**kwargs)
+        if self.corrupt and start == 0:
+            body = b"!" + response["Body"].read()[1:]
+            response["Body"] = _Body(body)
+        return response
+
+
+class _Body(object):
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, size):
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+def _object(name, data=DATA):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=name)
+    s3.put_object(Bucket=name, Key="key", Body=data)
+    return s3, Path("s3://{}/key".format(name))._impl.stat()
+
+
+def _download(s3, bucket, filename, info, **kwargs):
+    return download.download(
+        s3, bucket, "key", filename, info, chunk_size=CHUNK, parallelism=4, **kwargs
+    )
+
+
+def _leftovers(tmpdir):
+    return [f for f in os.listdir(str(tmpdir)) if download.PARTIAL_SUFFIX in f]
+
+
+@mock_s3
+def test_download_in_ranges(tmpdir):
+    s3, info = _object("ranges-bucket")
+    filename = str(tmpdir.join("file"))
+    client = FlakyClient(s3)
+    assert _download(client, "ranges-bucket", filename, info, verify=True) == len(DATA)
+    assert open(filename, "rb").read() == DATA
+    assert sorted(client.ranges) == list(range(0, len(DATA), CHUNK))
+    assert _leftovers(tmpdir) == []
+
+
+@mock_s3
+def test_download_empty_object(tmpdir):
+    s3, info = _object("empty-download-bucket", b"")
+    filename = str(tmpdir.join("file"))
+    assert _download(s3, "empty-download-bucket", filename, info, verify=True) == 0
+    assert open(filename, "rb").read() == b""
+
+
+@mock_s3
+def test_verify_multipart_etag(tmpdir):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="multipart-etag-bucket")
+    data = os.urandom(MIN_PART_SIZE * 2 + 1000)
+    with MultipartWriter(s3, "multipart-etag-bucket", "key", MIN_PART_SIZE) as f:
+        f.write(data)
+    info = Path("s3://multipart-etag-bucket/key")._impl.stat()
+    assert info.etag.endswith('-3"')
+
+    for chunk_size in (MIN_PART_SIZE, 2 ** 20):
+        filename = str(tmpdir.join(str(chunk_size)))
+        download.download(
+            s3, "multipart-etag-bucket", "key", filename, info, chunk_size, verify=True
+        )
+        assert open(filename, "rb").read() == data
+
+
+@mock_s3
+def test_checksum_mismatch(tmpdir):
+    s3, info = _object("mismatch-bucket")
+    filename = str(tmpdir.join("file"))
+    client = FlakyClient(s3, corrupt=True)
+    with pytest.raises(ChecksumMismatch):
+        _download(client, "mismatch-bucket", filename, info, verify=True)
+    assert not os.path.exists(filename)
+    assert _leftovers(tmpdir) == []
+
+
+@mock_s3
+def test_failure_without_resume_cleans_up(tmpdir):
+    s3, info = _object("cleanup-bucket")
+    filename = str(tmpdir.join("file"))
+    with pytest.raises(IOError):
+        _download(FlakyClient(s3, fail_at=CHUNK * 3), "cleanup-bucket", filename, info)
+    assert not os.path.exists(filename)
+    assert _leftovers(tmpdir) == []
+
+
+@mock_s3
+def test_resume(tmpdir):
+    s3, info = _object("resume-bucket")
+    filename = str(tmpdir.join("file"))
+    failing = FlakyClient(s3, fail_at=CHUNK * 3)
+    with pytest.raises(IOError):
+        _download(failing, "resume-bucket", filename, info, resume=True)
+    assert not os.path.exists(filename)
+    assert len(_leftovers(tmpdir)) == 2
+    with open(filename + download.PARTIAL_SUFFIX + ".json") as f:
+        done = {int(i) * CHUNK for i in json.load(f)["chunks"]}
+    assert done and CHUNK * 3 not in done
+
+    client = FlakyClient(s3)
+    downloaded = _download(client, "resume-bucket", filename, info, resume=True)
+    assert open(filename, "rb").read() == DATA
+    # chunks written by the first attempt are not downloaded again
+    assert sorted(client.ranges) == sorted(set(range(0, len(DATA), CHUNK)) - done)
+    assert downloaded == len(DATA) - sum(min(CHUNK, len(DATA) - s) for s in done)
+    assert _leftovers(tmpdir) == []
+
+
+@mock_s3
+def test_resume_ignores_other_objects(tmpdir):
+    s3, info = _object("resume-other-bucket")
+    filename = str(tmpdir.join("file"))
+    with pytest.raises(IOError):
+        _download(
+            FlakyClient(s3, fail_at=CHUNK * 3),
+            "resume-other-bucket",
+            filename,
+            info,
+            resume=True,
+        )
+    s3.put_object(Bucket="resume-other-bucket", Key="key", Body=DATA[::-1])
+    path = Path("s3://resume-other-bucket/key")
+    path.invalidate_cache()
+    info = path._impl.stat()
+    client = FlakyClient(s3)
+    _download(client, "resume-other-bucket", filename, info, resume=True, verify=True)
+    assert open(filename, "rb").read() == DATA[::-1]
+    assert len(client.ranges) == len(range(0, len(DATA), CHUNK))
+
+
+@mock_s3
+def test_overwritten_object_fails(tmpdir):
+    s3, info = _object("overwritten-bucket")
+    s3.put_object(Bucket="overwritten-bucket", Key="key", Body=DATA[::-1])
+    with pytest.raises(s3.exceptions.ClientError, match="PreconditionFailed"):
+        _download(s3, "overwritten-bucket", str(tmpdir.join("file")), info)
+    assert _leftovers(tmpdir) == []
+
+
+@mock_s3
+def test_copy_s3_local_single_object_in_ranges(tmpdir):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="copy-ranges-bucket")
+    s3.put_object(Bucket="copy-ranges-bucket", Key="file.bin", Body=DATA)
+    destination = Path(str(tmpdir.join("file.bin")))
+    stats = copy_s3_local(
+        Path("s3://copy-ranges-bucket/file.bin")._impl,
+        destination._impl,
+        parallelism=4,
+        multipart_chunksize=CHUNK,
+        verify=True,
+    )
+    assert destination.read_bytes() == DATA
+    assert (stats.files, stats.bytes) == (1, len(DATA))
@@ -0,0 +1,62 @@
+import errno
+import os
+
+import pytest
+
+from pathman._impl import filecopy
+
+
+@pytest.fixture
+def source(tmp_path):
+    filename = tmp_path / "source.bin"
+    filename.write_bytes(os.urandom(3 * 2 ** 20 + 17))
+    return str(filename)
+
+
+def _unsupported(*args):
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+
+def _failing(*args):
+    raise OSError(errno.EIO, "Input/output error")
+
+
+def test_copy_file(source, tmp_path):
+    dest = str(tmp_path / "dest.bin")
+    assert filecopy.copy_file(source, dest) == os.path.getsize(source)
+    assert open(dest, "rb").read() == open(source, "rb").read()
+
+
+def test_copy_empty_file(tmp_path):
+    (tmp_path / "empty").write_bytes(b"")
+    dest = str(tmp_path / "dest")
+    assert filecopy.copy_file(str(tmp_path / "empty"), dest) == 0
+    assert open(dest, "rb").read() == b""
+
+
+def test_falls_back_to_userspace(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(filecopy, "_reflink", lambda *args: False)
+    monkeypatch.setattr(os, "copy_file_range", _unsupported, raising=False)
+    monkeypatch.setattr(os, "sendfile", _unsupported, raising=False)
+    dest = str(tmp_path / "dest.bin")
+    filecopy.copy_file(source, dest)
+    assert open(dest, "rb").read() == open(source, "rb").read()
+
+
+def test_falls_back_when_nothing_is_copied(source, tmp_path, monkeypatch):
+    # as `copy_file_range` does on some file systems
+    monkeypatch.setattr(os, "copy_file_range", lambda *args: 0, raising=False)
+    dest = str(tmp_path / "dest.bin")
+    filecopy.copy_file(source, dest)
+    assert open(dest, "rb").read() == open(source, "rb").read()
+
+
+def test_failure_removes_dest(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(filecopy, "_reflink", lambda *args: False)
+    monkeypatch.setattr(os, "copy_file_range", _failing, raising=False)
+    monkeypatch.setattr(os, "sendfile", _failing, raising=False)
+    monkeypatch.setattr(filecopy, "_missing", set())
+    dest = str(tmp_path / "dest.bin")
+    with pytest.raises(OSError):
+        filecopy.copy_file(source, dest)
+    assert not os.path.exists(dest)
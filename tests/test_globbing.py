@@ -0,0 +1,191 @@
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+
+from pathman._impl.globbing import Pattern, Tree, glob, name_patterns
+from pathman._impl.local import _LocalTree
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("*.txt", "a.txt", True),
+        ("*.txt", "dir/a.txt", False),
+        ("dir/*.txt", "dir/a.txt", True),
+        ("dir/?.txt", "dir/ab.txt", False),
+        ("dir/[ab].txt", "dir/b.txt", True),
+        ("**/*.txt", "a.txt", True),
+        ("**/*.txt", "x/y/z/a.txt", True),
+        ("**/*.txt", "x/y/z/a.csv", False),
+        ("dir/**", "dir/x/y", True),
+        ("dir/**", "dir", True),
+        ("dir/**/a.txt", "dir/a.txt", True),
+        ("dir/**/**/a.txt", "dir/x/a.txt", True),
+        ("a/**/b/*.txt", "a/x/b/y/c.txt", False),
+        ("a/**/b/*.txt", "a/x/b/b/c.txt", True),
+    ],
+)
+def test_match(pattern, path, expected):
+    assert Pattern(pattern).match(path.split("/")) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern, directory, expected",
+    [
+        ("dir/*.txt", "dir", True),
+        ("dir/*.txt", "other", False),
+        ("dir/*.txt", "dir/sub", False),
+        ("**/*.txt", "any/where", True),
+        ("d*/x/*.txt", "data/x", True),
+        ("d*/x/*.txt", "data/y", False),
+    ],
+)
+def test_may_contain(pattern, directory, expected):
+    assert Pattern(pattern).may_contain(directory.split("/")) == expected
+
+
+def test_name_patterns_match_at_any_depth():
+    pattern, = name_patterns(["*.txt"])
+    assert pattern.match(["a", "b", "c.txt"])
+    assert pattern.match(["c.txt"])
+
+
+# a hierarchy of files, with their directories implied
+FILES = [
+    "a.txt",
+    "b.csv",
+    "data/2020-01/x.txt",
+    "data/2020-01/y.csv",
+    "data/2020-02/x.txt",
+    "data/2021-01/x.txt",
+    "data/other/deep/z.txt",
+    "logs/1.log",
+]
+
+
+class FakeTree(Tree):
+    """ `FILES`, recording the listings made """
+
+    def __init__(self, flat=False):
+        self.flat = flat
+        self.listed = []
+
+    def children(self, directory, prefix, recursive):
+        self.listed.append(directory + prefix)
+        names = set()
+        for path in FILES:
+            if path.startswith(directory + prefix):
+                name, slash, _ = path[len(directory) :].partition("/")
+                names.add((name, bool(slash)))
+        return [(name, is_dir, None) for name, is_dir in sorted(names)]
+
+    def descendants(self, directory):
+        self.listed.append(directory + "**")
+        paths = set()
+        for path in FILES:
+            if path.startswith(directory):
+                parts = path[len(directory) :].split("/")
+                paths.update(("/".join(parts[:i]), True) for i in range(1, len(parts)))
+                paths.add((path[len(directory) :], False))
+        return [(name, is_dir, None) for name, is_dir in sorted(paths)]
+
+
+def _glob(pattern, flat=False):
+    tree = FakeTree(flat)
+    return sorted(name for name, _, _ in glob(Pattern(pattern), tree)), tree.listed
+
+
+@pytest.mark.parametrize("flat", [False, True])
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("*.txt", ["a.txt"]),
+        ("*", ["a.txt", "b.csv", "data", "logs"]),
+        ("data/2020-*/x.txt", ["data/2020-01/x.txt", "data/2020-02/x.txt"]),
+        ("data/*/*.csv", ["data/2020-01/y.csv"]),
+        (
+            "**/*.txt",
+            [
+                "a.txt",
+                "data/2020-01/x.txt",
+                "data/2020-02/x.txt",
+                "data/2021-01/x.txt",
+                "data/other/deep/z.txt",
+            ],
+        ),
+        ("data/**/deep", ["data/other/deep"]),
+        ("data/**/2021-*", ["data/2021-01"]),
+        ("logs/1.log", ["logs/1.log"]),
+        ("missing/*", []),
+    ],
+)
+def test_glob(pattern, expected, flat):
+    assert _glob(pattern, flat)[0] == expected
+
+
+def test_glob_lists_only_what_may_match():
+    _, listed = _glob("data/2020-*/x.txt")
+    assert listed == ["data/2020-", "data/2020-01/x.txt", "data/2020-02/x.txt"]
+    _, listed = _glob("data/**/*.txt", flat=True)
+    assert listed == ["data/**"]
+
+
+def test_trees_are_abstract(tmpdir):
+    with pytest.raises(TypeError):
+        Tree()
+
+    for path in FILES:
+        tmpdir.join(*path.split("/")).ensure()
+    local = _LocalTree(str(tmpdir))
+    for directory in ("", "data/"):
+        expected = sorted(name for name, _, _ in FakeTree().descendants(directory))
+        assert sorted(name for name, _, _ in local.descendants(directory)) == expected
+
+
+def test_literal_prefix():
+    pattern = Pattern("data/2020-*/x.txt")
+    assert pattern.literal_child(pattern.start()) == "data"
+    states = pattern.states(["data"])
+    assert pattern.literal_child(states) is None
+    assert pattern.literal_prefix(states) == "2020-"
+    assert Pattern("**/x").literal_prefix(Pattern("**/x").start()) == ""
+
+
+@mock_s3
+@pytest.mark.parametrize(
+    "pattern",
+    ["*", "*.txt", "data/2020-*/x.txt", "data/*/*", "**/*.txt", "data/**", "**/deep"],
+)
+def test_local_and_s3_glob_agree(tmpdir, pattern):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="glob-bucket")
+    for path in FILES:
+        s3.put_object(Bucket="glob-bucket", Key="root/" + path, Body=b"x")
+        local = tmpdir.join(*path.split("/"))
+        local.ensure()
+
+    expected = sorted(name for name, _, _ in glob(Pattern(pattern), FakeTree()))
+    s3_root = "s3://glob-bucket/root/"
+    s3_matches = [str(p)[len(s3_root) :] for p in Path(s3_root).glob(pattern)]
+    local_root = str(tmpdir) + "/"
+    local_matches = [str(p)[len(local_root) :] for p in Path(local_root).glob(pattern)]
+    assert sorted(s3_matches) == expected
+    assert sorted(local_matches) == expected
+
+
+@mock_s3
+def test_s3_glob_streams_and_caches_metadata():
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="glob-stream-bucket")
+    for path in FILES:
+        s3.put_object(Bucket="glob-stream-bucket", Key=path, Body=b"xyz")
+
+    matches = Path("s3://glob-stream-bucket").glob("data/*/x.txt")
+    first = next(matches)
+    assert str(first) == "s3://glob-stream-bucket/data/2020-01/x.txt"
+    assert first.stat().size == 3
+    assert len(list(matches)) == 2
+    directory, = Path("s3://glob-stream-bucket").glob("data/other")
+    assert directory.is_dir()
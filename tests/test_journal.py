@@ -0,0 +1,338 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+from datetime import datetime, timezone
+
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+from moto.server import ThreadedMotoServer  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+from pathman._impl.multipart import MIN_PART_SIZE
+from pathman._impl.stat_cache import StatInfo
+from pathman import copy as copy_module
+from pathman.copy import copy_local_s3, copy_s3_local
+from pathman.exc import PathmanException, TransferError
+from pathman.journal import TransferJournal
+
+INFO = StatInfo(
+    type="file", size=3, last_modified=datetime(2020, 1, 1, tzinfo=timezone.utc)
+)
+CHANGED = StatInfo(type="file", size=3, etag='"abc"')
+
+
+def test_journal_replays_records(tmp_path):
+    filename = str(tmp_path / "journal")
+    with TransferJournal(filename, "src", "dest") as journal:
+        journal.done("a", INFO)
+        journal.done("b", INFO)
+        journal.upload_started("c", INFO, "upload-1")
+        journal.upload_started("d", INFO, "upload-2")
+        journal.forget_upload("d")
+
+    with TransferJournal(filename, "src", "dest") as journal:
+        assert journal.is_done("a", INFO) and journal.is_done("b", INFO)
+        assert not journal.is_done("b", CHANGED)
+        assert not journal.is_done("c", INFO)
+        assert journal.upload("c", INFO) == "upload-1"
+        assert journal.upload("c", CHANGED) is None
+        assert journal.stale_upload("c", CHANGED) == "upload-1"
+        assert journal.upload("d", INFO) is None
+        journal.done("c", INFO)
+
+    with TransferJournal(filename, "src", "dest") as journal:
+        assert journal.is_done("c", INFO) and journal.upload("c", INFO) is None
+
+
+def test_journal_of_another_copy(tmp_path):
+    filename = str(tmp_path / "journal")
+    TransferJournal(filename, "src", "dest").close()
+    with pytest.raises(PathmanException):
+        TransferJournal(filename, "src", "elsewhere")
+
+
+def test_journal_ignores_torn_record(tmp_path):
+    filename = str(tmp_path / "journal")
+    with TransferJournal(filename, "src", "dest") as journal:
+        journal.done("a", INFO)
+    with open(filename, "a") as f:
+        f.write('["done", "b", ')
+
+    with TransferJournal(filename, "src", "dest") as journal:
+        assert journal.is_done("a", INFO) and not journal.is_done("b", INFO)
+        journal.done("c", INFO)
+    with TransferJournal(filename, "src", "dest") as journal:
+        assert journal.is_done("c", INFO)
+
+
+def test_journal_batches_syncs(tmp_path, monkeypatch):
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(
+        os, "fsync", lambda fd: synced.append(fd) or fsync(fd)  # type: ignore
+    )
+    filename = str(tmp_path / "journal")
+    with TransferJournal(filename, "src", "dest", sync_interval=60) as journal:
+        for i in range(1000):
+            journal.done(str(i), INFO)
+        # header only: the records wait for the next sync
+        assert len(synced) == 1
+    assert len(synced) == 2
+    with TransferJournal(filename, "src", "dest") as journal:
+        assert all(journal.is_done(str(i), INFO) for i in range(1000))
+
+
+class FailingClient(object):
+    """ An S3 client whose uploads of `fail_on` keys raise """
+
+    def __init__(self, s3, fail_on=()):
+        self.s3 = s3
+        self.fail_on = fail_on
+        self.keys = []
+        self.parts = []
+
+    def __getattr__(self, name):
+        return getattr(self.s3, name)
+
+    def upload_file(self, filename, bucket, key, **kwargs):
+        self.keys.append(key)
+        if key in self.fail_on:
+            raise IOError("connection reset")
+        return self.s3.upload_file(filename, bucket, key, **kwargs)
+
+    def upload_part(self, **kwargs):
+        self.parts.append(kwargs["PartNumber"])
+        if (kwargs["Key"], kwargs["PartNumber"]) in self.fail_on:
+            raise IOError("connection reset")
+        return self.s3.upload_part(**kwargs)
+
+
+@pytest.fixture
+def s3():
+    with mock_s3():
+        clients.clear()
+        client = boto3.client("s3")
+        client.create_bucket(Bucket="bucket")
+        yield client
+    clients.clear()
+
+
+def _use(monkeypatch, client):
+    monkeypatch.setattr(clients, "get_client", lambda **kwargs: client)
+    return client
+
+
+def _tree(root, count):
+    os.makedirs(str(root))
+    for i in range(count):
+        (root / "{:03d}.txt".format(i)).write_bytes(b"x" * i)
+
+
+def test_copy_local_s3_resumes(s3, tmp_path, monkeypatch):
+    _tree(tmp_path / "src", 20)
+    src = Path(str(tmp_path / "src"))._impl
+    dest = Path("s3://bucket/dest")._impl
+    journal = str(tmp_path / "journal")
+
+    failing = _use(monkeypatch, FailingClient(s3, fail_on=("dest/010.txt",)))
+    with pytest.raises(TransferError, match="connection reset"):
+        copy_local_s3(src, dest, parallelism=1, journal=journal)
+    uploaded = set(failing.keys) - {"dest/010.txt"}
+
+    client = _use(monkeypatch, FailingClient(s3))
+    stats = copy_local_s3(src, dest, parallelism=1, journal=journal)
+    assert (stats.files, stats.skipped) == (20 - len(uploaded), len(uploaded))
+    expected = {"dest/{:03d}.txt".format(i) for i in range(20)} - uploaded
+    assert sorted(client.keys) == sorted(expected)
+
+    # only changed files are uploaded again
+    (tmp_path / "src" / "003.txt").write_bytes(b"changed")
+    os.utime(str(tmp_path / "src" / "003.txt"), (0, 0))
+    client = _use(monkeypatch, FailingClient(s3))
+    stats = copy_local_s3(src, dest, parallelism=4, journal=journal)
+    assert client.keys == ["dest/003.txt"]
+    assert Path("s3://bucket/dest/003.txt").read_bytes() == b"changed"
+
+
+def test_copy_local_s3_resumes_multipart_uploads(s3, tmp_path, monkeypatch):
+    os.makedirs(str(tmp_path / "src"))
+    data = os.urandom(MIN_PART_SIZE * 3 + 10)
+    (tmp_path / "src" / "big.bin").write_bytes(data)
+    src = Path(str(tmp_path / "src"))._impl
+    dest = Path("s3://bucket/dest")._impl
+    journal = str(tmp_path / "journal")
+    options = dict(
+        multipart_threshold=MIN_PART_SIZE,
+        multipart_chunksize=MIN_PART_SIZE,
+        max_concurrency=1,
+        journal=journal,
+    )
+
+    # parts are uploaded in order, one at a time: 1 to 3 succeed
+    _use(monkeypatch, FailingClient(s3, fail_on=(("dest/big.bin", 4),)))
+    with pytest.raises(TransferError, match="connection reset"):
+        copy_local_s3(src, dest, **options)
+    assert len(s3.list_multipart_uploads(Bucket="bucket").get("Uploads", [])) == 1
+
+    client = _use(monkeypatch, FailingClient(s3))
+    stats = copy_local_s3(src, dest, **options)
+    assert client.parts == [4]
+    assert stats.files == 1
+    assert Path("s3://bucket/dest/big.bin").read_bytes() == data
+    assert s3.list_multipart_uploads(Bucket="bucket").get("Uploads", []) == []
+
+
+def test_copy_local_s3_aborts_uploads_of_changed_files(s3, tmp_path, monkeypatch):
+    os.makedirs(str(tmp_path / "src"))
+    filename = tmp_path / "src" / "big.bin"
+    filename.write_bytes(os.urandom(MIN_PART_SIZE * 2 + 10))
+    src = Path(str(tmp_path / "src"))._impl
+    dest = Path("s3://bucket/dest")._impl
+    options = dict(
+        multipart_threshold=MIN_PART_SIZE,
+        multipart_chunksize=MIN_PART_SIZE,
+        max_concurrency=1,
+        journal=str(tmp_path / "journal"),
+    )
+
+    _use(monkeypatch, FailingClient(s3, fail_on=(("dest/big.bin", 3),)))
+    with pytest.raises(TransferError, match="connection reset"):
+        copy_local_s3(src, dest, **options)
+    data = os.urandom(MIN_PART_SIZE * 2 + 20)
+    filename.write_bytes(data)
+
+    client = _use(monkeypatch, FailingClient(s3))
+    copy_local_s3(src, dest, **options)
+    assert client.parts == [1, 2, 3]
+    assert Path("s3://bucket/dest/big.bin").read_bytes() == data
+    assert s3.list_multipart_uploads(Bucket="bucket").get("Uploads", []) == []
+
+
+def test_copy_s3_local_resumes(s3, tmp_path, monkeypatch):
+    for i in range(10):
+        s3.put_object(Bucket="bucket", Key="src/{}.txt".format(i), Body=b"abc")
+    src = Path("s3://bucket/src")._impl
+    dest = Path(str(tmp_path / "dest"))._impl
+    journal = str(tmp_path / "journal")
+
+    assert copy_s3_local(src, dest, journal=journal).files == 10
+    s3.put_object(Bucket="bucket", Key="src/4.txt", Body=b"changed")
+    stats = copy_s3_local(src, dest, journal=journal)
+    assert (stats.files, stats.skipped) == (1, 9)
+    assert (tmp_path / "dest" / "4.txt").read_bytes() == b"changed"
+
+
+def test_failed_sync_listing_leaves_no_journal(s3, tmp_path, monkeypatch):
+    def _denied(*args, **kwargs):
+        raise PermissionError("listing denied")
+
+    _tree(tmp_path / "src", 3)
+    s3.put_object(Bucket="bucket", Key="src/a.txt", Body=b"abc")
+    journal = str(tmp_path / "journal")
+    monkeypatch.setattr(copy_module, "_list_objects", _denied)
+    with pytest.raises(PermissionError):
+        copy_local_s3(
+            Path(str(tmp_path / "src"))._impl,
+            Path("s3://bucket/dest")._impl,
+            sync=True,
+            journal=journal,
+        )
+    monkeypatch.setattr(copy_module, "_list_local", _denied)
+    with pytest.raises(PermissionError):
+        copy_s3_local(
+            Path("s3://bucket/src")._impl,
+            Path(str(tmp_path / "dest"))._impl,
+            sync=True,
+            journal=journal,
+        )
+    # the journal is only opened once the listings are made
+    assert not os.path.exists(journal)
+
+
+CHILD = """
+import os
+import sys
+import time
+
+from botocore.endpoint import Endpoint
+
+from pathman import Path
+from pathman.copy import copy_local_s3
+
+original = Endpoint._do_get_response
+
+
+def _slow(self, *args, **kwargs):
+    time.sleep(0.02)
+    return original(self, *args, **kwargs)
+
+
+Endpoint._do_get_response = _slow
+copy_local_s3(
+    Path(sys.argv[1])._impl,
+    Path("s3://bucket/dest", endpoint_url=sys.argv[2])._impl,
+    parallelism=2,
+    journal=sys.argv[3],
+)
+"""
+
+
+def _done(journal):
+    if not os.path.exists(journal):
+        return 0
+    with open(journal) as f:
+        return sum(1 for line in f if line.startswith('["done"'))
+
+
+@pytest.mark.parametrize("count", [200])
+def test_resume_killed_copy(tmp_path, monkeypatch, count):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "fake_key")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "fake_secret")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    try:
+        url = "http://127.0.0.1:{}".format(server._server.server_port)
+        clients.clear()
+        s3 = boto3.client("s3", endpoint_url=url)
+        s3.create_bucket(Bucket="bucket")
+        _tree(tmp_path / "src", count)
+        journal = str(tmp_path / "journal")
+
+        child = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                textwrap.dedent(CHILD),
+                str(tmp_path / "src"),
+                url,
+                journal,
+            ]
+        )
+        deadline = time.monotonic() + 60
+        while _done(journal) < count // 4 and child.poll() is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        child.send_signal(signal.SIGKILL)
+        child.wait()
+        recorded = _done(journal)
+        assert 0 < recorded < count
+
+        stats = copy_local_s3(
+            Path(str(tmp_path / "src"))._impl,
+            Path("s3://bucket/dest", endpoint_url=url)._impl,
+            journal=journal,
+        )
+        # records not yet synced when the copy was killed are uploaded again
+        assert stats.skipped == recorded
+        assert stats.files == count - recorded
+        listed = s3.list_objects_v2(Bucket="bucket", Prefix="dest/")["Contents"]
+        assert len(listed) == count
+    finally:
+        clients.clear()
+        server.stop()
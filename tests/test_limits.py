@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+
+import boto3  # type: ignore
+import pytest
+from botocore.awsrequest import AWSResponse  # type: ignore
+from moto.server import ThreadedMotoServer  # type: ignore
+
+from pathman import Path, limits
+from pathman._impl import clients
+from pathman.copy import copy
+from pathman.limits import AdaptiveConcurrency, TokenBucket
+
+SLOW_DOWN = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n<Error><Code>SlowDown</Code>'
+    b"<Message>Please reduce your request rate.</Message></Error>"
+)
+
+
+class _Raw(object):
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+class ThrottlingS3(object):
+    """Make a client behave like a hot S3 prefix
+
+    Requests beyond `capacity` in flight are answered SlowDown, and retried
+    by botocore at once; the others are held for `latency` seconds.
+    """
+
+    def __init__(self, client, capacity, latency=0.005):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        client.meta.events.register_first("before-send.s3", self._send)
+        client.meta.events.register_first("needs-retry.s3", self._retry)
+
+    def _send(self, request, **kwargs):
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.throttled += 1
+                return AWSResponse(request.url, 503, {}, _Raw(SLOW_DOWN))
+            self.in_flight += 1
+        self._local.accepted = True
+        time.sleep(self.latency)
+
+    def _retry(self, response, **kwargs):
+        if getattr(self._local, "accepted", False):
+            self._local.accepted = False
+            with self._lock:
+                self.in_flight -= 1
+        if response is not None and response[0].status_code == 503:
+            return 0.001
+
+
+@pytest.fixture(autouse=True)
+def no_limits():
+    yield
+    limits.configure()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "fake_key")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "fake_secret")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    clients.clear()
+    url = "http://127.0.0.1:{}".format(server._server.server_port)
+    boto3.client("s3", endpoint_url=url).create_bucket(Bucket="bucket")
+    yield url
+    clients.clear()
+    server.stop()
+
+
+def _tree(root, count):
+    os.makedirs(str(root))
+    for i in range(count):
+        (root / "{:03d}.txt".format(i)).write_bytes(b"x")
+    return Path(str(root))
+
+
+def test_token_bucket():
+    bucket = TokenBucket(100, burst=1)
+    start = time.monotonic()
+    waited = sum(bucket.acquire() for _ in range(21))
+    assert time.monotonic() - start >= 0.18
+    assert waited == pytest.approx(0.2, abs=0.05)
+
+    # more than a burst at once: the debt is paid back afterwards
+    bucket = TokenBucket(1000)
+    assert bucket.acquire(1000) == 0
+    assert bucket.acquire(100) == pytest.approx(0.1, abs=0.02)
+
+
+def test_adaptive_concurrency():
+    concurrency = AdaptiveConcurrency(16, cooldown=60)
+    concurrency.throttle()
+    concurrency.throttle()
+    assert concurrency.limit == 8 and concurrency.throttled == 2
+    for _ in range(8):
+        concurrency.succeeded()
+    assert concurrency.limit == 9
+
+    fixed = AdaptiveConcurrency(16, adaptive=False)
+    fixed.throttle()
+    assert fixed.limit == 16
+
+
+def test_concurrency_cap():
+    concurrency = AdaptiveConcurrency(2)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def _request():
+        concurrency.acquire()
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.pop()
+        concurrency.release()
+
+    threads = [threading.Thread(target=_request) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+
+
+def test_limits_apply_to_every_client(server, tmp_path):
+    src = _tree(tmp_path / "src", 20)
+    spread = tmp_path / "spread"
+    for i in range(20):
+        _tree(spread / str(i), 1)
+    hot = Path("s3://bucket/hot", endpoint_url=server)
+    limits.configure(prefix_requests_per_second=10)
+
+    # one upload to each of 20 prefixes
+    start = time.monotonic()
+    copy(Path(str(spread)), Path("s3://bucket/cold", endpoint_url=server))
+    assert time.monotonic() - start < 0.9
+    # 20 uploads to one prefix, the first 10 in a burst
+    start = time.monotonic()
+    copy(src, hot, parallelism=8)
+    assert time.monotonic() - start >= 0.9
+
+    limits.configure(bytes_per_second=2 ** 20)
+    start = time.monotonic()
+    (hot / "big.bin").write_bytes(os.urandom(2 * 2 ** 20))
+    assert time.monotonic() - start >= 0.9
+    start = time.monotonic()
+    assert len((hot / "big.bin").read_bytes()) == 2 * 2 ** 20
+    assert time.monotonic() - start >= 0.9
+
+
+def _throttled_copy(url, src, prefix, parallelism):
+    throttling = ThrottlingS3(clients.get_client(endpoint_url=url), capacity=4)
+    copy(src, Path("s3://bucket/" + prefix, endpoint_url=url), parallelism=parallelism)
+    listed = boto3.client("s3", endpoint_url=url).list_objects_v2(
+        Bucket="bucket", Prefix=prefix + "/"
+    )
+    assert listed["KeyCount"] == 100
+    return throttling
+
+
+def test_adaptive_concurrency_backs_off(server, tmp_path):
+    src = _tree(tmp_path / "src", 100)
+    unlimited = _throttled_copy(server, src, "unlimited", 16)
+
+    clients.clear()
+    limiter = limits.configure(max_concurrency=16, adaptive=True)
+    limiter.concurrency.cooldown = 0.05
+    adaptive = _throttled_copy(server, src, "adaptive", 16)
+    assert limiter.concurrency.throttled == adaptive.throttled > 0
+    assert limiter.concurrency.limit < 16
+    assert adaptive.throttled < unlimited.throttled / 2
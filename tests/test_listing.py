@@ -0,0 +1,131 @@
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import listing
+from pathman.copy import copy_s3_local
+
+
+def _populate(s3, bucket, keys):
+    s3.create_bucket(Bucket=bucket)
+    for key in keys:
+        s3.put_object(Bucket=bucket, Key=key, Body=b"x")
+
+
+# digits only, a flat layout, and keys outside of printable ASCII
+KEYS = [
+    *("data/{:04d}/f.txt".format(i) for i in range(150)),
+    *("data/{}.txt".format(c * 3) for c in "AZaz~"),
+    *("data/été/{}.txt".format(i) for i in range(20)),
+]
+
+
+@pytest.mark.parametrize(
+    "low, high", [("a", "b"), ("data/", "data/~"), ("abc", "abd"), ("x", "x!")]
+)
+def test_midpoint(low, high):
+    mid = listing.midpoint(low, high)
+    assert low < mid < high
+
+
+def test_midpoint_without_room():
+    assert listing.midpoint("a", "a ") is None
+    assert listing.midpoint("b", "a") is None
+    assert listing.midpoint("a", "a") is None
+
+
+@mock_s3
+@pytest.mark.parametrize("parallel", [2, 8])
+def test_parallel_listing_lists_every_key_once(parallel):
+    s3 = boto3.client("s3")
+    _populate(s3, "listing-bucket", KEYS + ["other/0.txt"])
+
+    keys = [
+        o["Key"]
+        for o in listing.list_objects(
+            s3, "listing-bucket", "data/", parallel=parallel, page_size=10
+        )
+    ]
+    assert len(keys) == len(KEYS)
+    assert sorted(keys) == sorted(KEYS)
+
+
+@mock_s3
+def test_parallel_listing_ordered():
+    s3 = boto3.client("s3")
+    _populate(s3, "ordered-bucket", KEYS)
+
+    keys = [
+        o["Key"]
+        for o in listing.list_objects(
+            s3, "ordered-bucket", "data/", parallel=4, page_size=10, ordered=True
+        )
+    ]
+    assert keys == sorted(KEYS)
+
+
+@mock_s3
+def test_parallel_listing_splits_the_keyspace():
+    s3 = boto3.client("s3")
+    _populate(s3, "split-bucket", KEYS)
+
+    shards = listing.ShardedListing(s3, "split-bucket", "data/", "", 4, 10)
+    assert len(list(shards.unordered())) == len(KEYS)
+    assert len(shards._shards) > 1
+
+
+@mock_s3
+def test_parallel_listing_raises_errors():
+    s3 = boto3.client("s3")
+    _populate(s3, "failing-bucket", KEYS)
+    entries = listing.list_objects(s3, "failing-bucket", "data/", parallel=4)
+    next(entries)
+    s3.delete_objects(
+        Bucket="failing-bucket", Delete={"Objects": [{"Key": k} for k in KEYS]}
+    )
+    s3.delete_bucket(Bucket="failing-bucket")
+    with pytest.raises(s3.exceptions.NoSuchBucket):
+        list(entries)
+
+
+@mock_s3
+def test_walk_parallel():
+    s3 = boto3.client("s3")
+    _populate(s3, "walk-parallel-bucket", KEYS)
+    root = Path("s3://walk-parallel-bucket/data")
+
+    walked = [str(p) for p in root.walk(parallel=4, page_size=10)]
+    expected = ["s3://walk-parallel-bucket/" + k for k in KEYS]
+    assert sorted(walked) == sorted(expected)
+    ordered = [str(p) for p in root.walk(parallel=4, page_size=10, ordered=True)]
+    assert ordered == sorted(expected)
+    assert len(list(root.walk(parallel=4, page_size=10, max_items=42))) == 42
+
+
+@mock_s3
+def test_copy_s3_local_list_parallelism(tmpdir):
+    s3 = boto3.client("s3")
+    _populate(s3, "copy-parallel-bucket", KEYS)
+
+    stats = copy_s3_local(
+        Path("s3://copy-parallel-bucket/data")._impl,
+        Path(str(tmpdir))._impl,
+        list_parallelism=4,
+    )
+    assert stats.files == len(KEYS)
+    copied = sorted(
+        str(p)[len(str(tmpdir)) + 1 :] for p in Path(str(tmpdir)).walk()
+    )
+    assert copied == sorted(k[len("data/") :] for k in KEYS)
+
+
+@mock_s3
+def test_parallel_listing_request_count():
+    s3 = boto3.client("s3")
+    _populate(s3, "count-bucket", KEYS)
+
+    shards = listing.ShardedListing(s3, "count-bucket", "data/", "", 4, 10)
+    assert len(list(shards.unordered())) == len(KEYS)
+    # about one request per page, plus the splits
+    assert shards.requests <= 2 * (len(KEYS) // 10 + 1) + 4
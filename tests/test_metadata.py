@@ -0,0 +1,103 @@
+import os
+
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman import Path, stat_many
+from pathman._impl import clients, listing
+from pathman.exc import UnsupportedPathTypeException
+
+
+class CountingClient(object):
+    """ Records the S3 operations made through a client """
+
+    def __init__(self, s3):
+        self.s3 = s3
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.s3, name)
+
+        def _call(*args, **kwargs):
+            self.calls.append(name)
+            return method(*args, **kwargs)
+
+        return _call
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    with mock_s3():
+        clients.clear()
+        s3 = boto3.client("s3")
+        client = CountingClient(s3)
+        monkeypatch.setattr(clients, "get_client", lambda **kwargs: client)
+        yield s3, client
+        clients.clear()
+
+
+def _populate(s3, bucket, keys):
+    s3.create_bucket(Bucket=bucket)
+    for key in keys:
+        s3.put_object(Bucket=bucket, Key=key, Body=b"xyz")
+
+
+def test_stat_many_lists_directories(counted):
+    s3, client = counted
+    keys = ["dir/{:03d}.txt".format(i) for i in range(50)] + ["dir/sub/a.txt"]
+    _populate(s3, "stat-many-bucket", keys)
+    paths = [
+        "s3://stat-many-bucket/dir/{:03d}.txt".format(i) for i in range(0, 60, 2)
+    ] + ["s3://stat-many-bucket/dir/sub", "s3://stat-many-bucket/dir/000.txt"]
+
+    infos = stat_many(paths)
+    assert [i.type for i in infos[:25]] == ["file"] * 25
+    assert [i.type for i in infos[25:30]] == ["missing"] * 5
+    assert infos[30].type == "directory"
+    assert infos[31] == infos[0]
+    assert (infos[0].size, infos[0].etag) == (3, infos[1].etag)
+    assert infos[0].last_modified is not None
+    assert client.calls == ["list_objects_v2"]
+
+    # answers are cached
+    assert Path(paths[0]).stat() == infos[0]
+    assert stat_many(paths[:10]) == infos[:10]
+    assert client.calls == ["list_objects_v2"]
+
+
+def test_stat_many_gives_up_sparse_listings(counted, monkeypatch):
+    s3, client = counted
+    keys = ["sparse/{:05d}.txt".format(i) for i in range(30)]
+    _populate(s3, "sparse-bucket", keys)
+    monkeypatch.setattr(listing, "PAGE_SIZE", 5)
+
+    infos = stat_many(["s3://sparse-bucket/" + k for k in (keys[0], keys[-1])])
+    assert [i.type for i in infos] == ["file", "file"]
+    # the second page answered nothing: the last key is looked up on its own
+    assert client.calls == ["list_objects_v2", "list_objects_v2"]
+
+
+def test_stat_many_mixes_local_and_s3(counted, tmpdir):
+    s3, client = counted
+    _populate(s3, "mixed-bucket", ["a.txt"])
+    local = tmpdir.join("file.txt")
+    local.write("hello")
+
+    infos = stat_many(
+        [
+            Path(str(local)),
+            str(tmpdir.join("missing.txt")),
+            Path("s3://mixed-bucket/a.txt"),
+            "s3://mixed-bucket/missing.txt",
+            "s3://mixed-bucket",
+        ]
+    )
+    assert [i.type for i in infos] == ["file", "missing", "file", "missing", "directory"]
+    assert infos[0].size == os.path.getsize(str(local))
+    assert Path.stat_many([str(local)]) == infos[:1]
+
+
+def test_stat_many_rejects_other_types():
+    with pytest.raises(UnsupportedPathTypeException):
+        stat_many([42])
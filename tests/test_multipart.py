@@ -0,0 +1,209 @@
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl.multipart import MIN_PART_SIZE, MultipartWriter, upload_file
+
+PART = MIN_PART_SIZE
+DATA = bytes(range(256)) * (PART // 256) * 2 + b"tail"
+
+
+class FailingClient(object):
+    """ An S3 client whose upload of part `fail_on` raises """
+
+    def __init__(self, s3, fail_on):
+        self.s3 = s3
+        self.fail_on = fail_on
+
+    def __getattr__(self, name):
+        return getattr(self.s3, name)
+
+    def upload_part(self, **kwargs):
+        if kwargs["PartNumber"] == self.fail_on:
+            raise IOError("connection reset")
+        return self.s3.upload_part(**kwargs)
+
+
+def _bucket(name):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=name)
+    return s3
+
+
+def _uploads(s3, bucket):
+    return s3.list_multipart_uploads(Bucket=bucket).get("Uploads", [])
+
+
+@mock_s3
+def test_small_object_is_put_at_once():
+    s3 = _bucket("put-bucket")
+    with MultipartWriter(s3, "put-bucket", "key", part_size=PART) as f:
+        f.write(b"hello")
+        assert f.tell() == 5
+    assert f.upload_id is None
+    assert s3.get_object(Bucket="put-bucket", Key="key")["Body"].read() == b"hello"
+
+
+@mock_s3
+@pytest.mark.parametrize("size", [5, len(DATA)])
+def test_writes_honour_s3_additional_kwargs(size):
+    s3 = _bucket("sse-bucket")
+    path = Path(
+        "s3://sse-bucket/key",
+        s3_additional_kwargs={"ServerSideEncryption": "AES256"},
+    )
+    path.write_bytes(DATA[:size], part_size=PART)
+    head = s3.head_object(Bucket="sse-bucket", Key="key")
+    assert head["ServerSideEncryption"] == "AES256"
+    assert head["ContentLength"] == size
+
+
+@mock_s3
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_parts_are_uploaded_in_the_background(max_concurrency):
+    s3 = _bucket("multipart-bucket")
+    path = Path("s3://multipart-bucket/key")
+    assert path.write_bytes(DATA, part_size=PART, max_concurrency=max_concurrency) == (
+        len(DATA)
+    )
+    obj = s3.get_object(Bucket="multipart-bucket", Key="key")
+    assert obj["Body"].read() == DATA
+    assert obj["ETag"].endswith('-3"')
+    assert _uploads(s3, "multipart-bucket") == []
+
+
+@mock_s3
+def test_write_stream():
+    _bucket("stream-bucket")
+    chunks = (DATA[i : i + 100000] for i in range(0, len(DATA), 100000))
+    path = Path("s3://stream-bucket/key")
+    assert path.write_stream(chunks, part_size=PART, max_concurrency=2) == len(DATA)
+    assert path.read_bytes() == DATA
+    assert path.stat().size == len(DATA)
+
+
+def test_local_write_stream(tmpdir):
+    path = Path(str(tmpdir.join("file")))
+    assert path.write_stream(iter([b"ab", b"", b"cd"])) == 4
+    assert path.read_bytes() == b"abcd"
+
+
+@mock_s3
+def test_text_mode():
+    _bucket("text-bucket")
+    path = Path("s3://text-bucket/key")
+    assert path.write_text("héllo", encoding="latin-1") == 5
+    assert path.read_bytes() == "héllo".encode("latin-1")
+    with path.open("w") as f:
+        f.write("line\n")
+    assert path.read_text() == "line\n"
+
+
+@mock_s3
+def test_error_in_with_block_aborts():
+    s3 = _bucket("abort-bucket")
+    path = Path("s3://abort-bucket/key")
+    with pytest.raises(RuntimeError):
+        with path.open("wb", part_size=PART) as f:
+            f.write(DATA)
+            raise RuntimeError()
+    with pytest.raises(RuntimeError):
+        with path.open("w") as f:
+            f.write("partial")
+            raise RuntimeError()
+    assert not path.exists()
+    assert _uploads(s3, "abort-bucket") == []
+
+
+@mock_s3
+def test_failed_part_aborts():
+    s3 = _bucket("failing-part-bucket")
+    writer = MultipartWriter(
+        FailingClient(s3, fail_on=2), "failing-part-bucket", "key", part_size=PART
+    )
+    with pytest.raises(IOError, match="connection reset"):
+        with writer:
+            writer.write(DATA)
+    assert writer.closed
+    assert "Contents" not in s3.list_objects_v2(Bucket="failing-part-bucket")
+    assert _uploads(s3, "failing-part-bucket") == []
+
+
+@mock_s3
+def test_invalid_options():
+    _bucket("options-bucket")
+    path = Path("s3://options-bucket/key")
+    with pytest.raises(ValueError):
+        path.write_bytes(b"x", part_size=1024)
+    with pytest.raises(TypeError):
+        path.write_bytes(b"x", encoding="utf-8")
+
+
+class CountingClient(FailingClient):
+    """ A `FailingClient` recording the parts it uploads """
+
+    def __init__(self, s3, fail_on=None):
+        super().__init__(s3, fail_on)
+        self.parts = []
+
+    def upload_part(self, **kwargs):
+        self.parts.append(kwargs["PartNumber"])
+        return super().upload_part(**kwargs)
+
+
+@mock_s3
+def test_upload_file_resumes(tmp_path):
+    s3 = _bucket("resume-upload-bucket")
+    filename = str(tmp_path / "file.bin")
+    with open(filename, "wb") as f:
+        f.write(DATA)
+    created = []
+    with pytest.raises(IOError):
+        upload_file(
+            FailingClient(s3, fail_on=3),
+            filename,
+            "resume-upload-bucket",
+            "key",
+            PART,
+            max_concurrency=1,
+            on_create=created.append,
+        )
+    # the failed upload is kept, to be resumed
+    assert [u["UploadId"] for u in _uploads(s3, "resume-upload-bucket")] == created
+
+    client = CountingClient(s3)
+    uploaded = upload_file(
+        client, filename, "resume-upload-bucket", "key", PART, upload_id=created[0]
+    )
+    assert client.parts == [3]
+    assert uploaded == len(DATA) - 2 * PART
+    assert Path("s3://resume-upload-bucket/key").read_bytes() == DATA
+    assert _uploads(s3, "resume-upload-bucket") == []
+
+
+@mock_s3
+def test_upload_file_restarts_missing_upload(tmp_path):
+    s3 = _bucket("missing-upload-bucket")
+    filename = str(tmp_path / "file.bin")
+    with open(filename, "wb") as f:
+        f.write(DATA)
+    upload_id = s3.create_multipart_upload(Bucket="missing-upload-bucket", Key="key")[
+        "UploadId"
+    ]
+    s3.abort_multipart_upload(
+        Bucket="missing-upload-bucket", Key="key", UploadId=upload_id
+    )
+    created = []
+    client = CountingClient(s3)
+    upload_file(
+        client,
+        filename,
+        "missing-upload-bucket",
+        "key",
+        PART,
+        upload_id=upload_id,
+        on_create=created.append,
+    )
+    assert sorted(client.parts) == [1, 2, 3] and len(created) == 1
+    assert Path("s3://missing-upload-bucket/key").read_bytes() == DATA
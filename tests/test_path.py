@@ -7,7 +7,7 @@ import pytest
 from moto import mock_s3  # type: ignore
 
 from pathman._impl import LocalPath, S3Path
-from pathman.path import determine_output_location, Path
+from pathman.path import clear_interned, determine_output_location, Path
 
 
 output = functools.partial(resource_filename, "tests.output")
@@ -187,7 +187,7 @@ class TestPath(object):
         ],
     )
     def test_glob(self, base, pattern, expected):
-        assert Path(base).glob(pattern) == [Path(p) for p in expected]
+        assert sorted(map(str, Path(base).glob(pattern))) == sorted(expected)
 
     @pytest.mark.parametrize(
         "path, suffix",
@@ -206,6 +206,84 @@ class TestPath(object):
     def test_stem(self, path, stem):
         assert Path(path).stem == stem
 
+    @pytest.mark.parametrize(
+        "path, method, args",
+        [
+            ["/some/dir/file", "__truediv__", ["child.txt"]],
+            ["/some/dir/file", "join", ["a", "b.txt"]],
+            ["/some/dir/file", "dirname", []],
+            ["/some/dir/file", "with_suffix", [".txt"]],
+            ["s3://test-bucket/dir", "__truediv__", ["child.txt"]],
+            ["s3://test-bucket/dir", "join", ["a", "b.txt"]],
+            ["s3://test-bucket/dir", "dirname", []],
+            ["s3://test-bucket/dir", "with_suffix", [".txt"]],
+        ],
+    )
+    def test_derived_paths_match_constructed(self, path, method, args, monkeypatch):
+        parent = Path(path, anon=False)
+        expected = Path(str(getattr(parent, method)(*args)), anon=False)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("derived paths should not be re-parsed")
+
+        monkeypatch.setattr(Path, "__init__", fail)
+        derived = getattr(parent, method)(*args)
+        assert derived == expected
+        assert derived._location == expected._location
+        assert derived._isfile == expected._isfile
+        assert type(derived._impl) is type(expected._impl)
+        assert derived._original_kwargs is parent._original_kwargs
+
+    def test_derived_s3_paths_share_filesystem(self):
+        parent = Path("s3://test-bucket/test-key")
+        for child in [parent / "x.txt", parent.dirname()] + parent.ls():
+            assert child._impl._path is parent._impl._path
+
+    @pytest.mark.parametrize(
+        "first, second, expectation",
+        [
+            ("/some/dir/", "/some/dir", True),
+            ("/", "//", True),
+            ("/some/dir", "/some/other", False),
+            ("s3://test-bucket/dir/", "s3://test-bucket/dir", True),
+            ("s3://test-bucket", "s3://test-bucket/", True),
+            ("s3://test-bucket/dir", "/test-bucket/dir", False),
+        ],
+    )
+    def test_eq_hash_normalized(self, first, second, expectation):
+        assert (Path(first) == Path(second)) == expectation
+        assert (hash(Path(first)) == hash(Path(second))) == expectation
+        assert (Path(first) in {Path(second)}) == expectation
+
+    def test_eq_s3_bare_bucket_form(self):
+        assert S3Path("test-bucket/dir/file.txt") == S3Path(
+            "s3://test-bucket/dir/file.txt"
+        )
+        assert hash(S3Path("test-bucket/")) == hash(S3Path("s3://test-bucket"))
+
+    @pytest.mark.parametrize("path", ["/some/dir/file.txt", "s3://test-bucket/file"])
+    def test_eq_other_types(self, path):
+        assert Path(path) != path
+        assert not Path(path) == None  # noqa: E711
+        assert Path(path) == Path(path)._impl
+
+    def test_intern(self):
+        table = {}
+        first = Path("s3://test-bucket/file.txt").intern(table)
+        second = Path("s3://test-bucket/file.txt").intern(table)
+        assert first is second
+        assert len(table) == 1
+        assert Path("/some/file.txt").intern() is Path("/some/file.txt").intern()
+        clear_interned()
+
+    @pytest.mark.parametrize("path", ["/some/dir/file.txt", "s3://test-bucket/file"])
+    def test_compact_representation(self, path):
+        p = Path(path)
+        assert not hasattr(p, "__dict__")
+        assert not hasattr(p._impl, "__dict__")
+        assert isinstance(p, os.PathLike)
+        assert os.fspath(p) == path
+
     @pytest.mark.parametrize(
         "path, parts",
         [
@@ -249,6 +327,12 @@ class TestLocalPath(object):
     def test_is_dir(self, path, expectation):
         assert LocalPath(path).is_dir() == expectation
 
+    def test_stat(self):
+        info = LocalPath(local_file()).stat()
+        assert (info.type, info.size) == ("file", os.path.getsize(local_file()))
+        assert info.last_modified.tzinfo is not None
+        assert LocalPath(local_dir()).stat().type == "directory"
+
     @pytest.mark.parametrize(
         "path,expectation",
         [
@@ -260,6 +344,117 @@ class TestLocalPath(object):
     def test_is_file(self, path, expectation):
         assert LocalPath(path).is_file() == expectation
 
+    @pytest.fixture
+    def tree(self, tmp_path):
+        for name in [
+            "a.txt",
+            "b.csv",
+            "sub/c.txt",
+            "sub/deep/d.txt",
+            "sub/deep/e.csv",
+            ".git/objects/f",
+            "other/g.txt",
+        ]:
+            path = tmp_path.joinpath(*name.split("/"))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * len(name))
+        return tmp_path
+
+    @staticmethod
+    def _walked(root, **kwargs):
+        return sorted(
+            os.path.relpath(str(p), str(root)).replace(os.sep, "/")
+            for p in LocalPath(str(root)).walk(**kwargs)
+        )
+
+    def test_walk_filters(self, tree):
+        assert self._walked(tree) == [
+            ".git/objects/f",
+            "a.txt",
+            "b.csv",
+            "other/g.txt",
+            "sub/c.txt",
+            "sub/deep/d.txt",
+            "sub/deep/e.csv",
+        ]
+        assert self._walked(tree, include=["*.txt"], exclude=[".git", "other"]) == [
+            "a.txt",
+            "sub/c.txt",
+            "sub/deep/d.txt",
+        ]
+        assert self._walked(tree, include=["sub/**/*.csv"]) == ["sub/deep/e.csv"]
+        assert self._walked(tree, exclude=["sub/*"]) == [
+            ".git/objects/f",
+            "a.txt",
+            "b.csv",
+            "other/g.txt",
+        ]
+
+    def test_walk_prunes_directories(self, tree, monkeypatch):
+        scanned = []
+        scandir = os.scandir
+
+        def _scandir(path):
+            scanned.append(os.path.relpath(path, str(tree)))
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", _scandir)
+        assert self._walked(tree, include=["sub/deep/*"], exclude=[".git"]) == [
+            "sub/deep/d.txt",
+            "sub/deep/e.csv",
+        ]
+        assert sorted(scanned) == [".", "sub", os.path.join("sub", "deep")]
+
+    @pytest.mark.parametrize("max_depth, count", [(1, 2), (2, 4), (3, 7)])
+    def test_walk_max_depth(self, tree, max_depth, count):
+        assert len(self._walked(tree, max_depth=max_depth)) == count
+
+    @pytest.mark.parametrize("max_depth", [0, -1])
+    def test_walk_max_depth_below_one(self, tree, max_depth):
+        with pytest.raises(ValueError):
+            LocalPath(str(tree)).walk(max_depth=max_depth)
+
+    def test_walk_parallel(self, tree):
+        assert self._walked(tree, parallel=4) == self._walked(tree)
+        assert self._walked(tree, parallel=4, include=["*.csv"]) == [
+            "b.csv",
+            "sub/deep/e.csv",
+        ]
+
+    def test_walk_reuses_directory_entries(self, tree, monkeypatch):
+        walked = {
+            os.path.basename(str(p)): p for p in LocalPath(str(tree)).walk()
+        }
+        monkeypatch.setattr(os, "stat", None)
+        assert walked["a.txt"].is_file()
+        assert walked["a.txt"].stat().size == len("a.txt")
+        assert walked["d.txt"].stat().size == len("sub/deep/d.txt")
+
+    def test_walked_paths_see_their_changes(self, tree):
+        walked = {
+            os.path.basename(str(p)): p for p in Path(str(tree)).walk()
+        }
+        walked["a.txt"].remove()
+        assert not walked["a.txt"].exists()
+        assert not walked["a.txt"].is_file()
+        walked["b.csv"].write_bytes(b"longer contents")
+        assert walked["b.csv"].stat().size == len(b"longer contents")
+        with walked["d.txt"].open("ab") as f:
+            f.write(b"!")
+        assert walked["d.txt"].stat().size == len("sub/deep/d.txt!")
+
+    def test_walk_symlinks(self, tree):
+        os.symlink(str(tree / "sub"), str(tree / "link"))
+        assert "link/c.txt" not in self._walked(tree)
+        assert "link/c.txt" in self._walked(tree, followlinks=True)
+
+    def test_walk_errors(self, tree):
+        errors = []
+        assert list(LocalPath(str(tree / "missing")).walk(onerror=errors.append)) == []
+        assert len(errors) == 1
+        with pytest.raises(TypeError):
+            LocalPath(str(tree)).walk(topdown=False)
+
     def test_mkdir(self):
         to_create = os.path.join(local_dir(), "testdir")
         path = LocalPath(to_create)
@@ -416,6 +611,69 @@ class TestS3Path(object):
     def test_bucket(self, path, expectation):
         assert S3Path(path).bucket == expectation
 
+    def test_parsed_components_cached(self):
+        path = S3Path("s3://some-bucket/dir/file.txt")
+        assert path.parts == ["s3:", "some-bucket", "dir", "file.txt"]
+        path.parts.append("mutated")
+        assert path.parts == ["s3:", "some-bucket", "dir", "file.txt"]
+        assert path.bucket is path.bucket
+        assert path.key is path.key
+
+    def test_derived_paths_share_kwargs(self):
+        path = S3Path("s3://some-bucket/dir", anon=False)
+        child = path.join("file.txt")
+        assert child._original_kwargs is path._original_kwargs
+        assert child.key == "dir/file.txt"
+
+    def test_walk_streams_pages(self):
+        for i in range(12):
+            self.s3.put_object(
+                Body=b"x" * i, Bucket="test-bucket", Key="walk/{:02d}.txt".format(i)
+            )
+        self.s3.put_object(Body=b"", Bucket="test-bucket", Key="walk/")
+        self.s3.put_object(Body=b"", Bucket="test-bucket", Key="walk-other/a.txt")
+
+        paths = list(S3Path("s3://test-bucket/walk").walk(page_size=5))
+        keys = ["walk/{:02d}.txt".format(i) for i in range(12)]
+        assert [p.key for p in paths] == keys
+        assert paths[3].stat().size == 3
+        assert paths[3].stat().etag
+        assert paths[3].stat().last_modified is not None
+
+    def test_walk_max_items_and_resume(self):
+        for i in range(10):
+            self.s3.put_object(
+                Body=b"", Bucket="test-bucket", Key="resume/{}.txt".format(i)
+            )
+        root = S3Path("s3://test-bucket/resume/")
+        first = list(root.walk(max_items=4, page_size=3))
+        assert len(first) == 4
+        rest = list(root.walk(start_after=str(first[-1])))
+        assert [p.key for p in first + rest] == [
+            "resume/{}.txt".format(i) for i in range(10)
+        ]
+
+    def test_walk_max_items_skips_markers(self):
+        self.s3.put_object(Body=b"", Bucket="test-bucket", Key="markers/w/")
+        for i in range(5):
+            self.s3.put_object(
+                Body=b"", Bucket="test-bucket", Key="markers/w/{}.txt".format(i)
+            )
+        walked = list(S3Path("s3://test-bucket/markers").walk(max_items=3))
+        assert [p.key for p in walked] == [
+            "markers/w/{}.txt".format(i) for i in range(3)
+        ]
+
+    def test_walk_rejects_unknown_options(self):
+        with pytest.raises(TypeError):
+            list(S3Path("s3://test-bucket").walk(maxdepth=1))
+
+    def test_stat(self):
+        info = S3Path(real_file).stat()
+        assert (info.type, info.size) == ("file", len(b"Hello World"))
+        with pytest.raises(FileNotFoundError):
+            S3Path("s3://test-bucket/missing.txt").stat()
+
 
 @pytest.mark.parametrize(
     "path,expectation",
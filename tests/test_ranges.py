@@ -0,0 +1,114 @@
+import os
+
+import boto3  # type: ignore
+import pytest
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman.ranges import coalesce, read_ranges, resolve
+
+DATA = bytes(range(256)) * 16
+
+
+@pytest.mark.parametrize(
+    "start,end",
+    [
+        (None, None),
+        (0, 10),
+        (10, None),
+        (-10, None),
+        (5, -5),
+        (-20, -10),
+        (100, 50),
+        (4000, 5000),
+        (-5000, 3),
+        (5000, None),
+    ],
+)
+def test_resolve_matches_slicing(start, end):
+    first, last = resolve(start, end, len(DATA))
+    assert DATA[first:last] == DATA[start:end]
+
+
+def test_resolve_without_size():
+    assert resolve(10, None, None) == (10, -1)
+    assert resolve(10, 20, None) == (10, 20)
+    with pytest.raises(ValueError):
+        resolve(-10, None, None)
+
+
+def test_coalesce():
+    assert coalesce([(100, 200), (0, 10), (15, 20)], max_gap=5) == [(0, 20), (100, 200)]
+    assert coalesce([(0, 10), (5, 30)], max_gap=0) == [(0, 30)]
+    # overlapping ranges are merged even beyond max_span
+    assert coalesce([(0, 10), (5, 30)], max_span=10) == [(0, 30)]
+    assert coalesce([(0, 10), (12, 30)], max_span=10) == [(0, 10), (12, 30)]
+
+
+def test_read_ranges_coalesces():
+    calls = []
+
+    def _read(start, end):
+        calls.append((start, end))
+        return DATA[start:end]
+
+    wanted = [(300, 310), (0, 10), (20, 30), (5, 25), (40, 40)]
+    result = read_ranges(_read, wanted, max_gap=10)
+    assert result == [DATA[s:e] for s, e in wanted]
+    assert sorted(calls) == [(0, 30), (300, 310)]
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    f = tmp_path / "data.bin"
+    f.write_bytes(DATA)
+    return str(f)
+
+
+def test_local_read_bytes_range(data_file):
+    path = Path(data_file)
+    assert path.read_bytes() == DATA
+    assert path.read_bytes(start=10, end=20) == DATA[10:20]
+    assert path.read_bytes(start=-8) == DATA[-8:]
+    assert path.read_bytes(end=4) == DATA[:4]
+    assert path.read_bytes(start=len(DATA) + 1) == b""
+
+
+def test_local_read_ranges(data_file):
+    wanted = [(1000, 1100), (-16, None), (0, 8), (2000, 3000)]
+    result = Path(data_file).read_ranges(wanted, parallelism=4, max_gap=0)
+    assert result == [DATA[s:e] for s, e in wanted]
+
+
+@mock_s3
+def test_s3_read_bytes_range():
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    s3.put_object(Bucket="bucket", Key="data.bin", Body=DATA)
+    path = Path("s3://bucket/data.bin")
+
+    assert path.read_bytes(start=10, end=20) == DATA[10:20]
+    assert path.read_bytes(start=-8) == DATA[-8:]
+    assert path.read_bytes(start=100) == DATA[100:]
+    assert path.read_bytes(start=5, end=-5) == DATA[5:-5]
+    assert path.read_bytes(start=10, end=10) == b""
+    assert path.read_bytes(start=len(DATA) + 10) == b""
+    missing = Path("s3://bucket/missing.bin")
+    with pytest.raises(FileNotFoundError):
+        missing.read_bytes(start=0, end=10)
+    with pytest.raises(FileNotFoundError):
+        missing.read_bytes(start=0, end=-2)
+    with pytest.raises(FileNotFoundError):
+        missing.read_ranges([(0, 2), (4, None)])
+
+
+@mock_s3
+def test_s3_read_ranges():
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    body = os.urandom(2 * 2 ** 20)
+    s3.put_object(Bucket="bucket", Key="large.bin", Body=body)
+
+    wanted = [(2 ** 20, 2 ** 20 + 100), (-100, None), (0, 10), (20, 30)]
+    result = Path("s3://bucket/large.bin").read_ranges(wanted, parallelism=4)
+    assert result == [body[s:e] for s, e in wanted]
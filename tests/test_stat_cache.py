@@ -0,0 +1,163 @@
+import time
+from concurrent import futures
+
+import boto3  # type: ignore
+import pytest
+from fsspec.dircache import DirCache  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman import Path
+from pathman._impl import clients
+from pathman._impl.stat_cache import MISSING, StatCache, StatInfo
+
+
+@pytest.fixture
+def s3_bucket():
+    with mock_s3():
+        clients.clear()
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="test-bucket")
+        s3.put_object(Body=b"Hello World", Bucket="test-bucket", Key="dir/file.txt")
+        yield s3
+        clients.clear()
+
+
+def test_get_put():
+    cache = StatCache()
+    assert cache.get("bucket/key") is None
+    cache.put("bucket/key", StatInfo("file", 3))
+    assert cache.get("bucket/key") == StatInfo("file", 3)
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("pathman._impl.stat_cache.time.monotonic", lambda: now[0])
+    cache = StatCache(ttl=10, negative_ttl=5)
+    cache.put("bucket/key", StatInfo("file", 3))
+    cache.put("bucket/missing", MISSING)
+    now[0] += 4
+    assert cache.get("bucket/missing") is MISSING
+    now[0] += 5
+    assert cache.get("bucket/key") == StatInfo("file", 3)
+    assert cache.get("bucket/missing") is None
+    now[0] += 2
+    assert cache.get("bucket/key") is None
+    assert len(cache) == 0
+
+
+def test_missing_not_cached_by_default():
+    cache = StatCache()
+    cache.put("bucket/key", MISSING)
+    assert cache.get("bucket/key") is None
+
+
+def test_disabled():
+    cache = StatCache(ttl=0)
+    cache.put("bucket/key", StatInfo("file", 3))
+    assert cache.get("bucket/key") is None
+
+
+def test_lru_eviction():
+    cache = StatCache(maxsize=2, negative_ttl=30)
+    cache.put("b/1", MISSING)
+    cache.put("b/2", MISSING)
+    cache.get("b/1")
+    cache.put("b/3", MISSING)
+    assert cache.get("b/2") is None
+    assert cache.get("b/1") is MISSING
+    assert cache.evictions == 1
+
+
+def test_invalidate():
+    cache = StatCache(negative_ttl=30)
+    for key in ["b", "b/dir", "b/dir/x", "b/dir/sub/y", "b/dirx", "c/dir"]:
+        cache.put(key, MISSING)
+    cache.invalidate("b/dir/")
+    assert cache.get("b") is None
+    assert cache.get("b/dir/x") is MISSING
+    cache.invalidate("b/dir", recursive=True)
+    assert cache.get("b/dir/sub/y") is None
+    assert cache.get("b/dirx") is MISSING
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_sequential_checks_share_one_lookup(s3_bucket):
+    path = Path("s3://test-bucket/dir/file.txt")
+    cache = clients.get_stat_cache()
+    assert path.exists()
+    assert path.is_file()
+    assert not path.is_dir()
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_listing_populates_cache(s3_bucket):
+    cache = clients.get_stat_cache()
+    (found,) = Path("s3://test-bucket/dir").ls()
+    info = cache.get("test-bucket/dir/file.txt")
+    assert info.type == "file"
+    assert info.size == 11
+    assert info.etag
+    assert found.exists()
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda p: p.write_bytes(b"x"),
+        lambda p: p.write_text("x"),
+        lambda p: p.touch(),
+        lambda p: p.open("wb").close(),
+    ],
+    ids=["write_bytes", "write_text", "touch", "open"],
+)
+def test_writes_invalidate(s3_bucket, mutate):
+    path = Path("s3://test-bucket/new.txt")
+    assert not path.exists()
+    mutate(path)
+    assert path.exists()
+    path.remove()
+    assert not path.exists()
+
+
+def test_external_creation_is_seen(s3_bucket):
+    path = Path("s3://test-bucket/external.txt")
+    assert not path.exists()
+    s3_bucket.put_object(Body=b"x", Bucket="test-bucket", Key="external.txt")
+    assert Path("s3://test-bucket/external.txt").exists()
+
+
+def test_negative_caching_needs_invalidation(s3_bucket):
+    clients.get_stat_cache().negative_ttl = 30
+    path = Path("s3://test-bucket/external-2.txt")
+    assert not path.exists()
+    s3_bucket.put_object(Body=b"x", Bucket="test-bucket", Key="external-2.txt")
+    assert not path.exists()
+    path.invalidate_cache()
+    assert path.exists()
+
+
+class SlowDirCache(DirCache):
+    """ A listing cache leaving other threads time to run between steps """
+
+    def __delitem__(self, key):
+        time.sleep(0.001)
+        super().__delitem__(key)
+
+
+def test_concurrent_invalidation(s3_bucket, monkeypatch):
+    path = Path("s3://test-bucket/dir/file.txt")
+    fs = path._impl._path
+    monkeypatch.setattr(fs, "dircache", SlowDirCache())
+
+    def _invalidate(_):
+        for _ in range(20):
+            # as cached by a listing made meanwhile
+            fs.dircache["test-bucket/dir"] = []
+            path.invalidate_cache()
+
+    with futures.ThreadPoolExecutor(8) as executor:
+        list(executor.map(_invalidate, range(8)))
+    assert path.exists()
@@ -0,0 +1,94 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import boto3  # type: ignore
+import pytest
+from boto3.s3.transfer import TransferConfig  # type: ignore
+from moto import mock_s3  # type: ignore
+
+from pathman._impl.stat_cache import StatInfo
+from pathman.sync import (
+    CHECKSUM,
+    SIZE_MTIME,
+    etag_matches,
+    is_unchanged,
+    local_etag,
+    local_stat,
+)
+
+NOW = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def test_local_stat(tmp_path):
+    f = tmp_path / "f.txt"
+    f.write_bytes(b"hello")
+    info = local_stat(str(f))
+    assert info.type == "file"
+    assert info.size == 5
+    assert info.last_modified.tzinfo is not None
+
+
+def test_size_mtime():
+    src = StatInfo("file", 3, last_modified=NOW)
+    assert is_unchanged(src, src._replace(last_modified=NOW + timedelta(1)))
+    assert is_unchanged(src, src, SIZE_MTIME)
+    assert not is_unchanged(src, src._replace(size=4))
+    assert not is_unchanged(src, src._replace(last_modified=NOW - timedelta(1)))
+    assert not is_unchanged(src, None)
+
+
+def test_size_mtime_ignores_sub_second_differences():
+    src = StatInfo("file", 3, last_modified=NOW.replace(microsecond=500000))
+    assert is_unchanged(src, src._replace(last_modified=NOW))
+
+
+def test_checksum_compares_etags():
+    src = StatInfo("file", 3, etag='"abc"', last_modified=NOW)
+    dest = StatInfo("file", 3, etag="abc", last_modified=NOW - timedelta(1))
+    assert is_unchanged(src, dest, CHECKSUM)
+    assert not is_unchanged(src, dest._replace(etag='"abd"'), CHECKSUM)
+
+
+def test_unknown_compare_mode():
+    with pytest.raises(ValueError):
+        is_unchanged(StatInfo("file"), StatInfo("file"), "size")
+
+
+def test_checksum_hashes_local_files(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.write_bytes(b"same")
+    b.write_bytes(b"same")
+    info = StatInfo("file", 4)
+    assert is_unchanged(info, info, CHECKSUM, src_file=str(a), dest_file=str(b))
+    b.write_bytes(b"diff")
+    assert not is_unchanged(info, info, CHECKSUM, src_file=str(a), dest_file=str(b))
+
+
+@mock_s3
+def test_local_etag_matches_s3(tmp_path):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="bucket")
+    f = tmp_path / "f.bin"
+    f.write_bytes(os.urandom(11 * 2 ** 20))
+    chunksize = 5 * 2 ** 20
+
+    s3.put_object(Bucket="bucket", Key="single", Body=f.read_bytes())
+    s3.upload_file(
+        str(f),
+        "bucket",
+        "multi",
+        Config=TransferConfig(
+            multipart_threshold=chunksize, multipart_chunksize=chunksize
+        ),
+    )
+    single = s3.head_object(Bucket="bucket", Key="single")["ETag"]
+    multi = s3.head_object(Bucket="bucket", Key="multi")["ETag"]
+
+    assert single.strip('"') == local_etag(str(f))
+    assert multi.strip('"') == local_etag(str(f), chunksize)
+    assert etag_matches(str(f), single)
+    assert etag_matches(str(f), multi, chunksize)
+    # the part size is inferred from the number of parts when not given
+    assert etag_matches(str(f), multi)
+    f.write_bytes(os.urandom(11 * 2 ** 20))
+    assert not etag_matches(str(f), multi, chunksize)
@@ -0,0 +1,201 @@
+import threading
+import time
+
+import pytest
+from boto3.exceptions import S3UploadFailedError  # type: ignore
+from botocore.exceptions import ClientError  # type: ignore
+
+from pathman.exc import ChecksumMismatch, TransferError
+from pathman.transfer import (
+    BEST_EFFORT,
+    DONE,
+    FAILED,
+    is_transient,
+    pipeline,
+    RetryPolicy,
+    TransferStats,
+)
+
+
+def test_pipeline_processes_every_item():
+    seen = []
+    lock = threading.Lock()
+
+    def worker(item):
+        with lock:
+            seen.append(item)
+        return item
+
+    stats = pipeline(iter(range(100)), worker, parallelism=4, queue_size=5)
+    assert sorted(seen) == list(range(100))
+    assert stats.files == 100
+    assert stats.bytes == sum(range(100))
+    assert stats.finished is not None
+
+
+def test_pipeline_backpressure():
+    produced = []
+    release = threading.Event()
+
+    def items():
+        for i in range(50):
+            produced.append(i)
+            yield i
+
+    def worker(item):
+        release.wait()
+        return 0
+
+    result = []
+    runner = threading.Thread(
+        target=lambda: result.append(pipeline(items(), worker, 2, queue_size=3))
+    )
+    runner.start()
+    time.sleep(0.3)
+    # two items held by the workers, three in the queue, one blocked on put
+    assert len(produced) <= 6
+    release.set()
+    runner.join()
+    assert result[0].files == 50
+
+
+def test_pipeline_worker_error():
+    def worker(item):
+        if item == 3:
+            raise ValueError("boom")
+        return 0
+
+    with pytest.raises(TransferError, match="3: boom") as e:
+        pipeline(iter(range(1000)), worker, parallelism=2, queue_size=2)
+    assert isinstance(e.value.__cause__, ValueError)
+    # the transfer stopped: most items were never started
+    report = e.value.report
+    assert [result.key for result in report.failures] == ["3"]
+    assert len(report.results) < 1000
+
+
+def test_pipeline_producer_error():
+    def items():
+        yield 1
+        raise RuntimeError("listing failed")
+
+    with pytest.raises(RuntimeError):
+        pipeline(items(), lambda item: 0, parallelism=2)
+
+
+def test_pipeline_interrupted():
+    def worker(item):
+        if item == 3:
+            raise KeyboardInterrupt()
+        return 0
+
+    with pytest.raises(KeyboardInterrupt):
+        pipeline(
+            iter(range(1000)),
+            worker,
+            parallelism=2,
+            queue_size=2,
+            on_error=BEST_EFFORT,
+        )
+
+
+def test_pipeline_retries_transient_errors():
+    attempts = {}
+    lock = threading.Lock()
+
+    def worker(item):
+        with lock:
+            attempts[item] = attempts.get(item, 0) + 1
+        if item % 10 == 0 and attempts[item] < 3:
+            raise ConnectionResetError("connection reset")
+        return 1
+
+    report = pipeline(
+        iter(range(100)), worker, parallelism=4, retry=RetryPolicy(backoff=0)
+    )
+    assert report.files == 100 and report.retries == 20
+    retried = {r.key: r.retries for r in report.results if r.retries}
+    assert retried == {str(i): 2 for i in range(0, 100, 10)}
+    assert all(result.status == DONE for result in report.results)
+
+
+def test_pipeline_gives_up_after_attempts():
+    calls = []
+
+    def worker(item):
+        calls.append(item)
+        raise TimeoutError("timed out")
+
+    with pytest.raises(TransferError) as e:
+        pipeline(iter([1]), worker, retry=RetryPolicy(attempts=4, backoff=0))
+    assert len(calls) == 4
+    (result,) = e.value.report.results
+    assert result.status == FAILED and result.retries == 3
+    assert isinstance(result.error, TimeoutError)
+
+
+def test_pipeline_best_effort():
+    def worker(item):
+        if item % 10 == 3:
+            raise ValueError("bad item")
+        return 2
+
+    with pytest.raises(TransferError) as e:
+        pipeline(iter(range(100)), worker, parallelism=4, on_error=BEST_EFFORT)
+    report = e.value.report
+    assert (report.files, report.bytes) == (90, 180)
+    assert sorted(int(result.key) for result in report.failures) == list(
+        range(3, 100, 10)
+    )
+    # not transient: not retried
+    assert report.retries == 0
+    assert len(report.failed) == 10
+
+
+def _client_error(code, status):
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        "GetObject",
+    )
+
+
+def test_is_transient():
+    assert is_transient(_client_error("SlowDown", 503))
+    assert is_transient(_client_error("InternalError", 500))
+    assert is_transient(ConnectionResetError())
+    assert is_transient(ChecksumMismatch("etag"))
+    assert not is_transient(_client_error("NoSuchKey", 404))
+    assert not is_transient(_client_error("AccessDenied", 403))
+    assert not is_transient(ValueError())
+
+    # boto3 wraps the errors of uploads
+    try:
+        try:
+            raise _client_error("SlowDown", 503)
+        except ClientError:
+            raise S3UploadFailedError("Failed to upload")
+    except S3UploadFailedError as e:
+        assert is_transient(e)
+
+
+def test_retry_policy_backoff():
+    retry = RetryPolicy(backoff=0.1, max_backoff=1.0)
+    for _ in range(100):
+        assert 0 <= retry.delay(1) <= 0.1
+        assert 0 <= retry.delay(3) <= 0.4
+        assert 0 <= retry.delay(10) <= 1.0
+    with pytest.raises(ValueError):
+        RetryPolicy(attempts=0)
+    with pytest.raises(ValueError):
+        pipeline(iter([]), lambda item: 0, on_error="sometimes")
+
+
+def test_stats_rates():
+    stats = TransferStats()
+    stats.add(10)
+    stats.add(30)
+    stats.finish()
+    assert stats.files == 2
+    assert stats.bytes == 40
+    assert stats.bytes_per_second > 0
+    assert "files=2" in repr(stats)